@@ -19,7 +19,15 @@ from src.cli import (
     DebtorCleanup,
     UpdateUserNotificationClientID,
     InactiveCadenceClients,
-    InactiveCadenceDebtors
+    InactiveCadenceDebtors,
+    BackgroundJobsWorker,
+    ApprovalsHistorySnapshots,
+    LogsBenchmark,
+    ClientDetailsBenchmark,
+    SearchIndexRebuild,
+    SearchIndexBenchmark,
+    KeysetPaginationCheck,
+    DisbursementFeesCheck,
 )
 
 
@@ -42,6 +50,14 @@ manager.add_command('debtor_cleanup', DebtorCleanup(db=db))
 manager.add_command('update_user_notification_client_id', UpdateUserNotificationClientID(db=db))
 manager.add_command('inactive_cadence_clients', InactiveCadenceClients(db=db))
 manager.add_command('inactive_cadence_debtors', InactiveCadenceDebtors(db=db))
+manager.add_command('background_jobs_worker', BackgroundJobsWorker(db=db))
+manager.add_command('approvals_history_snapshots', ApprovalsHistorySnapshots(db=db))
+manager.add_command('logs_benchmark', LogsBenchmark(db=db))
+manager.add_command('client_details_benchmark', ClientDetailsBenchmark(db=db))
+manager.add_command('search_index_rebuild', SearchIndexRebuild(db=db))
+manager.add_command('search_index_benchmark', SearchIndexBenchmark(db=db))
+manager.add_command('keyset_pagination_check', KeysetPaginationCheck(db=db))
+manager.add_command('disbursement_fees_check', DisbursementFeesCheck(db=db))
 
 @manager.command
 def set_client_disclaimer_text(filename):
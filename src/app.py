@@ -79,6 +79,14 @@ def create_app(env_name):
     from .route import register_v2_blueprints
     register_v2_blueprints(app)
 
+    # Request profiling, opt-in with PROFILING_ENABLED
+    from .middleware.profiling import init_profiling
+    init_profiling(app)
+
+    # Listings search index maintenance, opt-in with SEARCH_INDEX_ENABLED
+    from .resources.v2.helpers.search_index import init_search_index
+    init_search_index()
+
     # Register Exception Handler
     from .exceptions import error_handler, catch_all
     app.register_error_handler(Exception, error_handler)
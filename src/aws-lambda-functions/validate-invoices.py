@@ -1,5 +1,8 @@
+import ast
 import json
 import time
+import zlib
+import base64
 import requests
 
 
@@ -10,22 +13,35 @@ def lambda_handler(event, context):
     print("Received event: " + json.dumps(event, indent=2))
     client_ref_key = event["client_ref_key"]
     validate_invoices = event["validate_invoices"]
-    debtors = event["debtors"]
-    debtor_swap = event["debtor_swap"]
-    funding_invoices = event["funding_invoices"]
-    funding_unique_invoices = event["funding_unique_invoices"]
-    funding_unique_invoices_update = event["funding_unique_invoices_update"]
     debtor_ref_key_exists = event["debtor_ref_key_exists"]
 
-    # Re-mapping [String to list of tuples]
-    if len(funding_invoices) and len(debtors):
-        debtors = eval(debtors)
-        funding_invoices = list(eval(funding_invoices))
-        funding_unique_invoices = list(eval(funding_unique_invoices))
-        funding_unique_invoices_update = list(eval(funding_unique_invoices_update))
+    if "invoice_sets" in event:
+        # versioned columnar payload
+        invoice_sets = decode_invoice_sets(event["invoice_sets"])
+        debtors = invoice_sets["debtors"]
+        debtor_swap = invoice_sets["debtor_swap"]
+        funding_invoices = invoice_sets["funding_invoices"]
+        funding_unique_invoices = invoice_sets["funding_unique_invoices"]
+        funding_unique_invoices_update = invoice_sets["funding_unique_invoices_update"]
+    else:
+        # legacy payload: str(list of tuples)
+        debtors = event["debtors"]
+        debtor_swap = event["debtor_swap"]
+        funding_invoices = event["funding_invoices"]
+        funding_unique_invoices = event["funding_unique_invoices"]
+        funding_unique_invoices_update = event["funding_unique_invoices_update"]
 
-    if len(debtor_swap):
-        debtor_swap = eval(debtor_swap)
+        # Re-mapping [String to list of tuples]
+        if len(funding_invoices) and len(debtors):
+            debtors = ast.literal_eval(debtors)
+            funding_invoices = list(ast.literal_eval(funding_invoices))
+            funding_unique_invoices = list(ast.literal_eval(funding_unique_invoices))
+            funding_unique_invoices_update = list(
+                ast.literal_eval(funding_unique_invoices_update)
+            )
+
+        if len(debtor_swap):
+            debtor_swap = ast.literal_eval(debtor_swap)
 
     validated_invoices = CadenceValidateInvoices(
         client_ref_key=client_ref_key,
@@ -40,6 +56,27 @@ def lambda_handler(event, context):
     return validated_invoices.get_return_payload
 
 
+# copy of src/resources/v2/helpers/invoice_sets_payload.py decoder, keep in sync
+INVOICE_SETS_PAYLOAD_VERSION = 1
+
+
+def decode_invoice_sets(payload):
+    if payload.get("version") != INVOICE_SETS_PAYLOAD_VERSION:
+        raise ValueError(f"Unsupported invoice sets payload version: {payload.get('version')}")
+
+    data = zlib.decompress(base64.b64decode(payload["data"]))
+    sets = json.loads(data.decode("utf-8"))
+
+    invoice_sets = {}
+    for name, value in sets.items():
+        if value["type"] == "dict":
+            keys, values = value["columns"] if value["columns"] else ([], [])
+            invoice_sets[name] = dict(zip(keys, values))
+        else:
+            invoice_sets[name] = list(zip(*value["columns"])) if value["columns"] else []
+    return invoice_sets
+
+
 class CadenceValidateInvoices:
     def __init__(
         self,
@@ -117,6 +154,14 @@ class CadenceValidateInvoices:
         already_exist_cadence = []
         wrong_invoice_data = []
 
+        # hash indexes, built once per call, for membership checks
+        funding_invoices = set(map(tuple, self.funding_invoices))
+        funding_unique_invoices = set(map(tuple, self.funding_unique_invoices))
+        funding_unique_invoices_update = set(
+            map(tuple, self.funding_unique_invoices_update)
+        )
+        cadence_invoices = set(self.cadence_invoices)
+
         for invoice in self.validate_invoices:
             # Don't need created_at and updated_at from frontend
             if "created_at" in invoice:
@@ -144,7 +189,7 @@ class CadenceValidateInvoices:
                     ref_key = int(invoice["ref_key"])
 
                 # Checking against funding DB debtors - like ((36427,) in self.funding_invoices):
-                if ref_key not in self.debtors.keys():
+                if ref_key not in self.debtors:
                     invoice["msg"] = "Invoice having wrong debtor"
                     wrong_debtors.append(invoice)
                     continue
@@ -154,7 +199,7 @@ class CadenceValidateInvoices:
                 if invoice["debtor"]:
                     debtor_id = int(invoice["debtor"])
 
-                if debtor_id not in self.debtor_swap.keys():
+                if debtor_id not in self.debtor_swap:
                     invoice["msg"] = "Invoice having wrong debtor"
                     wrong_debtors.append(invoice)
                     continue
@@ -173,8 +218,8 @@ class CadenceValidateInvoices:
                         invoice["debtor"],
                         invoice_number,
                     )
-                    in self.funding_unique_invoices
-                    and ((ref_key, invoice_number) not in self.funding_invoices)
+                    in funding_unique_invoices
+                    and ((ref_key, invoice_number) not in funding_invoices)
                 # Checking against ref_key == 0 and funding DB invoices - like ((191590, 1572, 'we13') in self.funding_invoices):
                 ) or (
                     not ref_key
@@ -183,21 +228,21 @@ class CadenceValidateInvoices:
                         invoice["client_id"],
                         invoice_number,
                     )
-                    in self.funding_unique_invoices_update
-                    and ((ref_key, invoice_number) not in self.funding_invoices)
+                    in funding_unique_invoices_update
+                    and ((ref_key, invoice_number) not in funding_invoices)
                 # Checking against funding DB invoices - like ((0, 'we13') not in self.funding_invoices):
-                ) or ((ref_key, invoice_number) not in self.funding_invoices):
+                ) or ((ref_key, invoice_number) not in funding_invoices):
                     update_invoices.append(invoice)
                     continue
 
             # Checking against funding DB invoices- like ((36427, '43d2d17c6d0b51f69d049541e3977a3133xx') in self.funding_invoices):
-            if (ref_key, invoice_number) in self.funding_invoices:
+            if (ref_key, invoice_number) in funding_invoices:
                 already_exist_funding.append(invoice)
                 continue
 
             # Checking against funding DB invoices- like ('4606|OA-7353 in self.cadence_invoices):
             # And invoice isn't updating
-            if f"{ref_key}|{invoice_number}" in self.cadence_invoices:
+            if f"{ref_key}|{invoice_number}" in cadence_invoices:
                 already_exist_cadence.append(invoice)
                 continue
 
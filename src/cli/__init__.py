@@ -18,3 +18,11 @@ from . debtor_cleanup_script import DebtorCleanup
 from . update_user_notification_client_id import UpdateUserNotificationClientID
 from . inactive_cadence_clients import InactiveCadenceClients
 from . inactive_cadence_debtors import InactiveCadenceDebtors
+from . background_jobs_worker import BackgroundJobsWorker
+from . approvals_history_snapshots import ApprovalsHistorySnapshots
+from . logs_benchmark import LogsBenchmark
+from . client_details_benchmark import ClientDetailsBenchmark
+from . search_index_rebuild import SearchIndexRebuild
+from . search_index_benchmark import SearchIndexBenchmark
+from . keyset_pagination_check import KeysetPaginationCheck
+from . disbursement_fees_check import DisbursementFeesCheck
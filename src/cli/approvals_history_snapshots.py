@@ -0,0 +1,69 @@
+import json
+from flask_script import Command, Option
+from src.models import ApprovalsHistory
+
+
+class ApprovalsHistorySnapshots(Command):
+    """
+    Move large approvals history attribute values to approvals_history_snapshots
+    """
+
+    option_list = (
+        Option("--batch-size", dest="batch_size", type=int, default=500),
+    )
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def commit(self):
+        self.db.session.commit()
+
+    def rollback(self):
+        self.db.session.rollback()
+
+    def run(self, batch_size=500):
+        # python manage.py approvals_history_snapshots
+        # python manage.py approvals_history_snapshots --batch-size 1000
+        print("<-- script start -->")
+        last_id = 0
+        converted = 0
+        size_before = 0
+        size_after = 0
+        while True:
+            try:
+                approvals_history = (
+                    ApprovalsHistory.query.filter(
+                        ApprovalsHistory.id > last_id,
+                        ApprovalsHistory.stored_attribute != None,
+                    )
+                    .order_by(ApprovalsHistory.id.asc())
+                    .limit(batch_size)
+                    .all()
+                )
+                if not approvals_history:
+                    break
+
+                for history in approvals_history:
+                    last_id = history.id
+                    stored_attribute = history.stored_attribute
+                    if not isinstance(stored_attribute, dict):
+                        continue
+
+                    # re-saving the attribute replaces large values with snapshot refs
+                    history.attribute = history.attribute
+                    if history.stored_attribute != stored_attribute:
+                        converted += 1
+                        size_before += len(json.dumps(stored_attribute))
+                        size_after += len(json.dumps(history.stored_attribute))
+
+                self.commit()
+                print(f"-- approvals history converted: {converted}, last id: {last_id} --")
+            except Exception as e:
+                print(e)
+                self.rollback()
+                return
+
+        print(
+            f"-- total approvals history converted: {converted}, "
+            f"attribute bytes: {size_before} -> {size_after} --"
+        )
@@ -0,0 +1,17 @@
+from flask_script import Command, Option
+from src.resources.v2.helpers.background_jobs import BackgroundJobsWorker as Worker
+
+
+class BackgroundJobsWorker(Command):
+    option_list = (
+        Option("--once", dest="once", action="store_true", default=False),
+    )
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def run(self, once=False):
+        # python manage.py background_jobs_worker
+        # python manage.py background_jobs_worker --once
+        worker = Worker()
+        worker.run(once=once)
@@ -0,0 +1,65 @@
+import sys
+import time
+from flask_script import Command, Option
+from sqlalchemy import event
+
+
+class ClientDetailsBenchmark(Command):
+    """
+    Queries and time of ClientDetails(client).debtors per client
+    """
+
+    option_list = (
+        Option("--client_ids", dest="client_ids", type=str, required=True),
+        Option("--repeat", dest="repeat", type=int, default=3),
+        Option("--max_queries", dest="max_queries", type=int, default=None),
+    )
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def benchmark(self, client, repeat):
+        from src.resources.v2.helpers.client_details import ClientDetails
+
+        queries = []
+
+        def count_query(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        event.listen(self.db.engine, "before_cursor_execute", count_query)
+        try:
+            elapsed = []
+            for _ in range(repeat):
+                del queries[:]
+                started_at = time.monotonic()
+                debtors = ClientDetails(client).debtors
+                elapsed.append(time.monotonic() - started_at)
+        finally:
+            event.remove(self.db.engine, "before_cursor_execute", count_query)
+
+        return len(debtors), len(queries), min(elapsed) * 1000
+
+    def run(self, client_ids, repeat=3, max_queries=None):
+        # python manage.py client_details_benchmark --client_ids 12,48,305
+        # python manage.py client_details_benchmark --client_ids 12 --max_queries 10
+        from src.models import Client
+
+        failed = False
+        for client_id in client_ids.split(","):
+            client = Client.get_one_client(int(client_id))
+            if not client:
+                print(f"-- client {client_id} not found --")
+                continue
+
+            debtors, queries, elapsed_ms = self.benchmark(client, repeat)
+            print(
+                f"-- client {client_id}: {debtors} debtors, "
+                f"{queries} queries, {elapsed_ms:.1f} ms --"
+            )
+            # the query count must not grow with the number of debtors
+            if max_queries is not None and queries > max_queries:
+                print(f"-- client {client_id}: more than {max_queries} queries --")
+                failed = True
+
+        if failed:
+            sys.exit(1)
@@ -0,0 +1,225 @@
+import sys
+import random
+from decimal import Decimal
+from flask_script import Command, Option
+from sqlalchemy import func
+
+
+class DisbursementFeesCheck(Command):
+    """
+    Fee totals of DisbursementFees(aggregated query) against the per
+    disbursement loop they replaced, for soa and reserve release ids with
+    their client settings and random client settings
+    """
+
+    option_list = (
+        Option("--soa_ids", dest="soa_ids", type=str, default=None),
+        Option("--rr_ids", dest="rr_ids", type=str, default=None),
+        Option("--sample", dest="sample", type=int, default=100),
+        Option("--settings_samples", dest="settings_samples", type=int, default=5),
+        Option("--seed", dest="seed", type=int, default=None),
+    )
+
+    fields = [
+        "fees_to_client",
+        "third_party_fees",
+        "total_fee_to_client",
+        "total_fees_asap",
+        "total_amount",
+        "asap_amount",
+        "high_priority_amount",
+    ]
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def disbursements(self, request_type, request_object):
+        from src.models import (
+            Disbursements,
+            ReserveReleaseDisbursements,
+            Client,
+            ClientPayee,
+        )
+
+        if request_type == "soa":
+            query = Disbursements.query.filter(Disbursements.soa_id == request_object.id)
+        else:
+            query = Disbursements.query.join(ReserveReleaseDisbursements).filter(
+                ReserveReleaseDisbursements.reserve_release_id == request_object.id,
+                ReserveReleaseDisbursements.is_deleted == False,
+            )
+        return query.filter(
+            Disbursements.is_deleted == False,
+            Client.id == Disbursements.client_id,
+            ClientPayee.client_id == Client.id,
+            ClientPayee.payee_id == Disbursements.payee_id,
+        )
+
+    def legacy_totals(self, request_type, request_object, client_settings):
+        """[Fee totals with the per disbursement loop of cal_disbursement_total_fees before DisbursementFees]"""
+        high_priority_fee = Decimal(0)
+        same_day_ach_fee = Decimal(0)
+        wire_fee = Decimal(0)
+        third_party_fee = Decimal(0)
+        high_priority_amount = Decimal(0)
+
+        if client_settings:
+            high_priority_fee = Decimal(client_settings["high_priority_fee"])
+            same_day_ach_fee = Decimal(client_settings["same_day_ach_fee"])
+            wire_fee = Decimal(client_settings["wire_fee"])
+            third_party_fee = Decimal(client_settings["third_party_fee"])
+            high_priority_amount = Decimal(client_settings["high_priority_fee"])
+
+        fee_to_client = Decimal(0)
+        total_fees_asap = Decimal(0)
+        asap_amount = Decimal(0)
+        total_amount = Decimal(0)
+        get_payees = []
+
+        if request_object.high_priority:
+            fee_to_client += high_priority_fee
+            total_fees_asap += high_priority_fee
+            asap_amount = high_priority_fee
+
+        from src.models import ClientPayee
+
+        fees_total = {}
+        for ref_type in ["client", "payee"]:
+            third_party_fee_total = Decimal(0)
+            client_fee_total = Decimal(0)
+            for disbursement in (
+                self.disbursements(request_type, request_object)
+                .filter(ClientPayee.ref_type == ref_type)
+                .all()
+            ):
+                get_payees.append(disbursement.payee.id)
+
+                payment_method = disbursement.payment_method.value
+                if payment_method == "wire":
+                    fee_to_client += wire_fee
+                if payment_method == "same_day_ach":
+                    fee_to_client += same_day_ach_fee
+                if ref_type == "payee" and payment_method in [
+                    "wire",
+                    "same_day_ach",
+                    "direct_deposit",
+                ]:
+                    fee_to_client += third_party_fee
+
+                third_party_fee_total += (
+                    Decimal(disbursement.third_party_fee)
+                    if disbursement.third_party_fee is not None
+                    else Decimal(0)
+                )
+                client_fee_total += (
+                    Decimal(disbursement.client_fee)
+                    if disbursement.client_fee is not None
+                    else Decimal(0)
+                )
+                total_amount += Decimal(disbursement.amount)
+
+            fees_total[ref_type] = (third_party_fee_total, client_fee_total)
+
+        total_fees_asap += fees_total["client"][1] + sum(fees_total["payee"])
+
+        return {
+            "fees_to_client": sum(fees_total["client"]),
+            "third_party_fees": sum(fees_total["payee"]),
+            "total_fee_to_client": fee_to_client,
+            "total_fees_asap": total_fees_asap,
+            "payee_ids": get_payees,
+            "total_amount": total_amount,
+            "asap_amount": asap_amount,
+            "high_priority_amount": high_priority_amount,
+        }
+
+    def random_client_settings(self):
+        def fee():
+            return Decimal(random.randint(0, 10000)) / 100
+
+        return {
+            "high_priority_fee": fee(),
+            "same_day_ach_fee": fee(),
+            "wire_fee": fee(),
+            "third_party_fee": fee(),
+        }
+
+    def mismatches(self, expected, actual):
+        mismatches = [
+            f"{field}: {expected[field]} != {actual[field]}"
+            for field in self.fields
+            if Decimal(expected[field]) != Decimal(actual[field])
+        ]
+        # same payees, in group order instead of row order
+        if sorted(expected["payee_ids"]) != sorted(actual["payee_ids"]):
+            mismatches.append("payee_ids")
+        return mismatches
+
+    def check(self, request_type, request_object, settings_samples):
+        from src.resources.v2.helpers.disbursement_fees import DisbursementFees
+
+        if request_type == "soa":
+            client_settings = request_object.soa_client_settings()
+        else:
+            client_settings = request_object.rr_client_settings()
+
+        failed = False
+        for settings in [client_settings, {}] + [
+            self.random_client_settings() for _ in range(settings_samples)
+        ]:
+            try:
+                expected = self.legacy_totals(request_type, request_object, settings)
+            except (TypeError, AttributeError) as e:
+                # a null disbursement amount/payment method raised before
+                print(f"-- {request_type} {request_object.id}: skipped, {e} --")
+                return True
+
+            actual = DisbursementFees(request_type).totals(request_object, settings)
+            mismatches = self.mismatches(expected, actual)
+            if mismatches:
+                print(
+                    f"-- {request_type} {request_object.id}: MISMATCH "
+                    f"{', '.join(mismatches)} --"
+                )
+                failed = True
+        return not failed
+
+    def request_ids(self, model, ids, sample):
+        if ids:
+            return [int(id) for id in ids.split(",")]
+        return [
+            id
+            for id, in self.db.session.query(model.id)
+            .order_by(func.rand())
+            .limit(sample)
+        ]
+
+    def run(self, soa_ids=None, rr_ids=None, sample=100, settings_samples=5, seed=None):
+        # python manage.py disbursement_fees_check
+        # python manage.py disbursement_fees_check --soa_ids 12,48 --rr_ids 7 --settings_samples 20
+        from src.models import SOA, ReserveRelease
+
+        random.seed(seed)
+        failed = False
+        checked = 0
+        for request_type, model, ids in [
+            ("soa", SOA, soa_ids),
+            ("reserve_release", ReserveRelease, rr_ids),
+        ]:
+            # only the given ids, when ids are given for one of them
+            if (soa_ids or rr_ids) and not ids:
+                continue
+
+            for request_id in self.request_ids(model, ids, sample):
+                request_object = model.query.get(request_id)
+                if not request_object:
+                    print(f"-- {request_type} {request_id} not found --")
+                    continue
+
+                checked += 1
+                if not self.check(request_type, request_object, settings_samples):
+                    failed = True
+
+        print(f"-- {checked} requests checked --")
+        if failed:
+            sys.exit(1)
@@ -0,0 +1,106 @@
+import sys
+from flask_script import Command, Option
+
+
+class KeysetPaginationCheck(Command):
+    """
+    Walks every keyset page of model listing queries and compares the ids
+    with the offset pages of the same queries, pages must not skip or repeat rows
+    """
+
+    # model:ordering[:join path], the client control accounts joins give
+    # joined duplicates, as in the generic request/compliance repository listings
+    default_checks = ",".join(
+        [
+            "SOA:-updated_at",
+            "Client:name:client_debtor",
+            "GenericRequest:status:client.clients_control_account",
+            "GenericRequest:-status:client.clients_control_account",
+            "ComplianceRepository:status:client.clients_control_account",
+            "ComplianceRepository:-status:client.clients_control_account",
+        ]
+    )
+
+    option_list = (
+        Option("--checks", dest="checks", type=str, default=default_checks),
+        Option("--rpp", dest="rpp", type=int, default=20),
+    )
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def listing_query(self, model, ordering, join=None):
+        column = getattr(model, ordering.lstrip("-"))
+        query = model.query
+        # a one to many join gives joined duplicates of the rows
+        joined = model
+        for relationship in join.split(".") if join else []:
+            relationship = getattr(joined, relationship)
+            query = query.join(relationship)
+            joined = relationship.property.mapper.class_
+        return query.order_by(column.desc() if ordering.startswith("-") else column.asc())
+
+    def keyset_ids(self, query, rpp, id_column):
+        from src.resources.v2.helpers.keyset_pagination import keyset_paginate
+
+        ids = []
+        pages = 0
+        cursor = ""
+        while True:
+            page = keyset_paginate(query, rpp, id_column, cursor=cursor)
+            pages += 1
+            ids.extend(item.id for item in page.items)
+            if page.has_next and len(page.items) != rpp:
+                print(f"-- keyset page {pages}: {len(page.items)} rows, has_next --")
+                return ids, pages, False
+            if not page.has_next:
+                return ids, pages, True
+            cursor = page.next_cursor
+
+    def offset_ids(self, query, rpp, id_column, desc):
+        # same id tie-break as the keyset pages
+        query = query.order_by(id_column.desc() if desc else id_column.asc())
+        ids = []
+        pagination = query.paginate(1, rpp, False)
+        while pagination.items:
+            for item in pagination.items:
+                # joined duplicates split over two pages
+                if not ids or ids[-1] != item.id:
+                    ids.append(item.id)
+            pagination = query.paginate(pagination.page + 1, rpp, False)
+        return ids
+
+    def check(self, model, ordering, join, rpp):
+        query = self.listing_query(model, ordering, join=join)
+
+        keyset_ids, pages, full_pages = self.keyset_ids(query, rpp, model.id)
+        offset_ids = self.offset_ids(query, rpp, model.id, ordering.startswith("-"))
+        print(
+            f"-- {model.__name__} {ordering} {join or ''}: {len(keyset_ids)} rows in "
+            f"{pages} keyset pages, {len(offset_ids)} rows in offset pages --"
+        )
+
+        failed = not full_pages
+        if len(set(keyset_ids)) != len(keyset_ids):
+            print("-- keyset pages repeat rows --")
+            failed = True
+        if keyset_ids != offset_ids:
+            missing = set(offset_ids) - set(keyset_ids)
+            print(f"-- MISMATCH: {len(missing)} rows missing from keyset pages --")
+            failed = True
+        return not failed
+
+    def run(self, checks="", rpp=20):
+        # python manage.py keyset_pagination_check
+        # python manage.py keyset_pagination_check --checks "GenericRequest:-status:client.clients_control_account" --rpp 5
+        import src.models
+
+        failed = False
+        for each_check in checks.split(","):
+            model, ordering, join = (each_check.split(":") + [None])[:3]
+            if not self.check(getattr(src.models, model), ordering, join, rpp):
+                failed = True
+
+        if failed:
+            sys.exit(1)
+        print("-- keyset pages match offset pages --")
@@ -0,0 +1,49 @@
+import time
+from flask_script import Command, Option
+from src.resources.v2.helpers.logs import Logs, logs_backend, logs_shipper
+
+
+class LogsBenchmark(Command):
+    """
+    Throughput of Logs(...).save_logs(), file and aws(local sink) paths
+    """
+
+    option_list = (
+        Option("--count", dest="count", type=int, default=10000),
+        Option("--files", dest="files", type=int, default=4),
+    )
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def benchmark(self, name, count, files, save_as_file):
+        data = {"benchmark": name, "payload": "x" * 200}
+
+        started_at = time.monotonic()
+        for i in range(count):
+            logs = Logs(
+                save_as_file=save_as_file,
+                filename=f"logs_benchmark_{name}_{i % files}",
+                data=data,
+            )
+            logs.save_logs()
+        queued_at = time.monotonic()
+
+        if save_as_file:
+            logs_backend.flush()
+        else:
+            logs_shipper.flush()
+        written_at = time.monotonic()
+
+        print(
+            f"-- {name}: {count} logs, "
+            f"{count / (queued_at - started_at):.0f}/s on the caller thread, "
+            f"{count / (written_at - started_at):.0f}/s written --"
+        )
+
+    def run(self, count=10000, files=4):
+        # python manage.py logs_benchmark
+        # python manage.py logs_benchmark --count 50000 --files 8
+        self.benchmark("file", count, files, save_as_file=True)
+        self.benchmark("aws", count, files, save_as_file=False)
+        print("-- shipper --", logs_shipper.stats())
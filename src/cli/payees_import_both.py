@@ -1,19 +1,8 @@
 import json
-from src import db
 from flask_script import Command
-from datetime import datetime
-from src.models import (
-    Client,
-    ClientControlAccounts,
-    ControlAccount,
-    ClientPayee,
-    Payee,
-)
-from src.resources.v2.helpers import PaymentServices
-from sqlalchemy import and_, or_, not_
 import pandas as pd
 import numpy as np
-from src.resources.v2.helpers.logs import Logs
+from src.cli.payees_import_engine import PayeesImportEngine
 
 
 class PayeesImportBoth(Command):
@@ -66,12 +55,7 @@ class PayeesImportBoth(Command):
     def import_both(self):
         file_data = self.read_file()
         # print("--import ach--", file_data.columns)
-        import_payees_list = []
-        payees_to_be_imported_flag = 0
-        payees_already_exist_flag = 0
-        payees_imported_flag = 0
-        payees_approved_flag = 0
-        payees_draft_flag = 0
+        rows = []
 
         for i in file_data.index:
             print("====start====")
@@ -236,173 +220,53 @@ class PayeesImportBoth(Command):
             ):
                 payee_as_third_party = True
 
-            # checking, if client exists having control account == "LCEI. US"
-            client = (
-                Client.query.join(ClientControlAccounts, ControlAccount)
-                .filter(
-                    ControlAccount.is_deleted == False,
-                    ClientControlAccounts.is_deleted == False,
-                    Client.is_deleted == False,
-                    not_(
-                        Client.ref_client_no.in_(
-                            [
-                                "TODO-cadence",
-                                "Cadence:sync-pending",
-                                "TODO-factorcloud",
-                            ]
-                        )
-                    ),
-                    ControlAccount.name == "LCEI. US",
-                    Client.lcra_client_accounts_number == lcra_client_accounts_number,
-                )
-                .first()
-            )
-            print(lcra_client_accounts_number, '--client--', client)
-            if client:
-                
-                client_payee_ref_type = "client"
-                if payee_as_third_party:
-                    client_payee_ref_type = "payee"
-
-                # checking, if payee exists having account_nickname == beneficiary_name
-                payee = (
-                    Payee.query.join(ClientPayee)
-                    .filter(
-                        Payee.account_nickname == beneficiary_name,
-                        Payee.is_deleted == False,
-                        Payee.is_active == True,
-                        ClientPayee.is_deleted == False,
-                        ClientPayee.ref_type == client_payee_ref_type,
-                        ClientPayee.client_id == client.id,
-                        ClientPayee.payee_id == Payee.id,
-                    )
-                    .first()
-                )
-
-                payee_already_exist = False
-                payee_not_exists = False
-                # checking, if payee exists
-                if payee:
-                    payees_already_exist_flag += 1
-                    payee_already_exist = True
-                    # append word "import" if beneficinary name exists for approved payee
-                    if payee.status.value == "approved":
-                        beneficiary_name = f"{beneficiary_name} - import"
-                        payee_not_exists = True
-
-                else:
-                    payee_not_exists = True
-
-                # data to be saved
-                req_data = {
-                    "account_nickname": beneficiary_name,
-                    "address_line_1": beneficiary_address_line_1,
-                    "city": beneficiary_city,
-                    "province": beneficiary_state,
-                    "state_or_province": beneficiary_state,  # for payee table
-                    "country": country,
-                    "postal_code": beneficiary_zip,
-                    "phone": "",
-                    "email": "",
-                    "ref_type": client_payee_ref_type,
+            client_payee_ref_type = "client"
+            if payee_as_third_party:
+                client_payee_ref_type = "payee"
+
+            # data to be saved
+            req_data = {
+                "account_nickname": beneficiary_name,
+                "address_line_1": beneficiary_address_line_1,
+                "city": beneficiary_city,
+                "province": beneficiary_state,
+                "state_or_province": beneficiary_state,  # for payee table
+                "country": country,
+                "postal_code": beneficiary_zip,
+                "phone": "",
+                "email": "",
+                "ref_type": client_payee_ref_type,
+                "bank_name": beneficiary_bank_name,
+                "bank_address_line_1": beneficiary_bank_address_1,
+                "bank_address_line_2": beneficiary_bank_address_2,
+                "bank_city": beneficiary_bank_city,
+                "bank_province": beneficiary_bank_state,
+                "bank_country": country,
+                "bank_postal_code": beneficiary_bank_zip,
+                "bank_account_name": bank_account_name,
+                "us_wire_banking_info": {
+                    "swift_code": None,
+                    "institution_routing": None, # Institution Routing (WIRE)
+                },
+                "us_wire_intermediary_banking_info": {
+                    "intermediary_bank_name": None,
+                    "intermediary_bank_account": None,
+                    "intermediary_bank_routing": None,
+                },
+                "us_ach_banking_info": {
+                    "type": beneficiary_account_type,
                     "bank_name": beneficiary_bank_name,
-                    "bank_address_line_1": beneficiary_bank_address_1,
-                    "bank_address_line_2": beneficiary_bank_address_2,
-                    "bank_city": beneficiary_bank_city,
-                    "bank_province": beneficiary_bank_state,
-                    "bank_country": country,
-                    "bank_postal_code": beneficiary_bank_zip,
-                    "bank_account_name": bank_account_name,
-                    "us_wire_banking_info": {
-                        "swift_code": None,
-                        "institution_routing": None, # Institution Routing (WIRE)
-                    },
-                    "us_wire_intermediary_banking_info": {
-                        "intermediary_bank_name": None,
-                        "intermediary_bank_account": None,
-                        "intermediary_bank_routing": None,
-                    },
-                    "us_ach_banking_info": {
-                        "type": beneficiary_account_type,
-                        "bank_name": beneficiary_bank_name,
-                        "bank_id_ach": beneficiary_bank_id, # Institution Routing (ACH)
-                        "account_number": beneficiary_account_number,
-                    },
-                }
-
-                payee_imported = False
-                if payee_not_exists:
-                    payee_status_to_be = "draft"
-                    payees_draft_flag += 1
-
-                    # save payee
-                    payee = Payee(req_data)
-                    payee.last_processed_at = datetime.utcnow()
-                    payee.status = payee_status_to_be
-                    payee.save()
-
-                    # client payee
-                    client_payee_json = {
-                        "client_id": client.id,
-                        "payee_id": payee.id,
-                        "ref_type": req_data["ref_type"],
-                    }
-                    # save client payee
-                    client_payee = ClientPayee(client_payee_json)
-                    client_payee.save()
-
-                    payee_imported = True
-                    payees_imported_flag += 1
-
-                import_payees_list.append(
-                    {
-                        "index": i,
-                        "client_id": client.id,
-                        "lcra_client_accounts_number": lcra_client_accounts_number,
-                        "control_account": client.clients_control_account[
-                            0
-                        ].control_account.name,
-                        "payee": payee.account_nickname,
-                        "payee_id": payee.id,
-                        "status": payee.status.value,
-                        "payee_already_exist": payee_already_exist,
-                        "payee_imported": payee_imported,
-                        "import_data": req_data,
-                    }
-                )
-
-                payees_to_be_imported_flag += 1
-
-                # delete state_or_province
-                if "state_or_province" in req_data:
-                    del req_data["state_or_province"]
-
-                # payment services
-                payment_services = PaymentServices(
-                    request_type=payee, req_data=req_data
-                )
-                payment_services.add_in_payment_services()
-
-                db.session.flush()
+                    "bank_id_ach": beneficiary_bank_id, # Institution Routing (ACH)
+                    "account_number": beneficiary_account_number,
+                },
+            }
 
-                print(client.id, f"--added as {client_payee_ref_type}--", payee.id)
+            rows.append((i, lcra_client_accounts_number, req_data))
             print(beneficiary_name, "--import both - beneficiary--", i)
             print("====end====")
 
-        import_payees_list.append(
-            {
-                "sheetname": self.sheetname,
-                "total_payees_to_be_imported": payees_to_be_imported_flag,
-                "total_payees_already_exist": payees_already_exist_flag,
-                "total_payees_imported": payees_imported_flag,
-                # "total_payees_approved": payees_approved_flag,
-                "total_payees_draft": payees_draft_flag,
-            }
-        )
-
-        # save imort payees data in logs
-        logs = Logs(
-            filename=f"payee_{self.sheetname_lower}_logs", data=import_payees_list
+        # clients/payees lookups, inserts and payment services syncs
+        engine = PayeesImportEngine(
+            db=self.db, filename=self.filename, sheetname=self.sheetname
         )
-        logs.save_logs()
-        self.commit()
+        return engine.run(rows)
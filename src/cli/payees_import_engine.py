@@ -0,0 +1,409 @@
+import os
+import json
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+from sqlalchemy import not_
+from sqlalchemy.orm import joinedload
+from src.models import (
+    Client,
+    ClientControlAccounts,
+    ControlAccount,
+    ClientPayee,
+    Payee,
+    PayeeStatus,
+)
+from src.resources.v2.helpers import PaymentServices
+from src.resources.v2.helpers.logs import Logs
+
+
+class PayeesImportEngine:
+    """
+    Bulk import of spreadsheet payees, shared by the payees_import_* commands.
+
+    Clients and existing payees are loaded once into dicts, new payees are
+    inserted in chunks (one transaction per chunk) and synced to payment
+    services by a bounded pool of workers after their chunk is committed.
+    Progress is kept in a checkpoint file, a failed or stopped import is
+    resumed by running the same command again.
+    """
+
+    def __init__(self, db=None, filename=None, sheetname=None, chunk_size=None, sync_workers=None):
+        self.db = db
+        self.filename = filename
+        self.sheetname = sheetname
+        self.sheetname_lower = self.sheetname.lower().replace(" ", "_")
+        self.chunk_size = chunk_size or int(os.getenv("PAYEES_IMPORT_CHUNK_SIZE", 100))
+        self.sync_workers = sync_workers or int(
+            os.getenv("PAYEES_IMPORT_SYNC_WORKERS", 4)
+        )
+        self.app = current_app._get_current_object()
+        self.checkpoint_path = f"{self.filename}.{self.sheetname_lower}.checkpoint.json"
+
+        self.clients = {}
+        self.payees = {}
+        self.chunk = []
+        self.executor = None
+        # payee id -> future, in flight payment services syncs
+        self.syncs = {}
+
+        # progress, saved in checkpoint
+        self.last_index = None
+        self.import_payees_list = []
+        self.pending_syncs = {}
+        self.failed_syncs = {}
+        self.counters = {
+            "payees_to_be_imported_flag": 0,
+            "payees_already_exist_flag": 0,
+            "payees_imported_flag": 0,
+            "payees_draft_flag": 0,
+        }
+
+    @staticmethod
+    def payee_key(client_id, ref_type, account_nickname):
+        # mysql compares account_nickname case insensitive, ignoring trailing spaces
+        return (
+            client_id,
+            ref_type,
+            (account_nickname or "").rstrip().casefold(),
+        )
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return
+
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+
+        self.last_index = checkpoint["last_index"]
+        self.import_payees_list = checkpoint["import_payees_list"]
+        self.counters = checkpoint["counters"]
+        # failed syncs are retried on resume
+        self.pending_syncs = dict(
+            checkpoint["pending_syncs"], **checkpoint.get("failed_syncs", {})
+        )
+        print(
+            f"-- resuming from checkpoint {self.checkpoint_path}, last row: {self.last_index} --"
+        )
+
+    def save_checkpoint(self):
+        checkpoint = {
+            "filename": self.filename,
+            "sheetname": self.sheetname,
+            "last_index": self.last_index,
+            "counters": self.counters,
+            "pending_syncs": self.pending_syncs,
+            "failed_syncs": self.failed_syncs,
+            "import_payees_list": self.import_payees_list,
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def preload(self, lcra_client_accounts_numbers):
+        """[Load clients and their active payees of the file]
+
+        Args:
+            lcra_client_accounts_numbers (list): client ids of the file
+        """
+        lcra_client_accounts_numbers = list(
+            {number for number in lcra_client_accounts_numbers if number}
+        )
+        if not lcra_client_accounts_numbers:
+            return
+
+        # clients having control account == "LCEI. US"
+        clients = (
+            Client.query.join(ClientControlAccounts, ControlAccount)
+            .options(
+                joinedload(Client.clients_control_account).joinedload(
+                    ClientControlAccounts.control_account
+                )
+            )
+            .filter(
+                ControlAccount.is_deleted == False,
+                ClientControlAccounts.is_deleted == False,
+                Client.is_deleted == False,
+                not_(
+                    Client.ref_client_no.in_(
+                        [
+                            "TODO-cadence",
+                            "Cadence:sync-pending",
+                            "TODO-factorcloud",
+                        ]
+                    )
+                ),
+                ControlAccount.name == "LCEI. US",
+                Client.lcra_client_accounts_number.in_(lcra_client_accounts_numbers),
+            )
+            .all()
+        )
+        for client in clients:
+            self.clients[client.lcra_client_accounts_number] = {
+                "id": client.id,
+                "control_account": client.clients_control_account[
+                    0
+                ].control_account.name,
+            }
+
+        client_ids = [client["id"] for client in self.clients.values()]
+        if not client_ids:
+            return
+
+        client_payees = (
+            self.db.session.query(ClientPayee.client_id, ClientPayee.ref_type, Payee)
+            .join(Payee, ClientPayee.payee_id == Payee.id)
+            .filter(
+                Payee.is_deleted == False,
+                Payee.is_active == True,
+                ClientPayee.is_deleted == False,
+                ClientPayee.client_id.in_(client_ids),
+            )
+            .order_by(Payee.id.asc())
+            .all()
+        )
+        for client_id, ref_type, payee in client_payees:
+            key = self.payee_key(client_id, ref_type.value, payee.account_nickname)
+            self.payees.setdefault(key, payee)
+
+        # detached: payees are read by the sync workers and outlive chunk commits
+        self.db.session.expunge_all()
+
+    def start(self, lcra_client_accounts_numbers):
+        self.load_checkpoint()
+        self.preload(lcra_client_accounts_numbers)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.sync_workers, thread_name_prefix="payees-import-sync"
+        )
+
+        if self.pending_syncs:
+            payees = Payee.query.filter(
+                Payee.id.in_([int(payee_id) for payee_id in self.pending_syncs])
+            ).all()
+            self.db.session.expunge_all()
+            for payee in payees:
+                self.submit_sync(payee, self.pending_syncs[str(payee.id)])
+
+    def run(self, rows):
+        """[Import parsed spreadsheet rows]
+
+        Args:
+            rows (list): (row index, Client ID, payee data)
+
+        Returns:
+            list: import payees list
+        """
+        self.start([lcra_client_accounts_number for _, lcra_client_accounts_number, _ in rows])
+        try:
+            for index, lcra_client_accounts_number, req_data in rows:
+                self.add_row(index, lcra_client_accounts_number, req_data)
+            return self.finish()
+        except Exception:
+            self.abort()
+            raise
+
+    def add_row(self, index, lcra_client_accounts_number, req_data):
+        """[Import a spreadsheet row]
+
+        Args:
+            index (int): row index
+            lcra_client_accounts_number (str): Client ID
+            req_data (dict): payee data, account_nickname is the beneficiary name
+        """
+        index = int(index)
+        # already imported, before the checkpoint
+        if self.last_index is not None and index <= self.last_index:
+            return
+
+        self.chunk.append((index, lcra_client_accounts_number, req_data))
+        if len(self.chunk) >= self.chunk_size:
+            self.import_chunk()
+
+    def import_chunk(self):
+        if not self.chunk:
+            return
+
+        imported = []
+        for index, lcra_client_accounts_number, req_data in self.chunk:
+            client = self.clients.get(lcra_client_accounts_number)
+            if not client:
+                continue
+
+            beneficiary_name = req_data["account_nickname"]
+            payee = self.payees.get(
+                self.payee_key(client["id"], req_data["ref_type"], beneficiary_name)
+            )
+
+            payee_already_exist = False
+            payee_not_exists = False
+            # checking, if payee exists
+            if payee:
+                self.counters["payees_already_exist_flag"] += 1
+                payee_already_exist = True
+                # append word "import" if beneficinary name exists for approved payee
+                if payee.status.value == "approved":
+                    req_data["account_nickname"] = f"{beneficiary_name} - import"
+                    payee_not_exists = True
+            else:
+                payee_not_exists = True
+
+            payee_imported = False
+            if payee_not_exists:
+                self.counters["payees_draft_flag"] += 1
+
+                # save payee
+                payee = Payee(req_data)
+                payee.last_processed_at = datetime.utcnow()
+                payee.status = PayeeStatus.draft
+                self.db.session.add(payee)
+
+                # save client payee
+                client_payee = ClientPayee(
+                    {
+                        "client_id": client["id"],
+                        "ref_type": req_data["ref_type"],
+                    }
+                )
+                client_payee.payee = payee
+                self.db.session.add(client_payee)
+
+                self.payees[
+                    self.payee_key(
+                        client["id"], req_data["ref_type"], req_data["account_nickname"]
+                    )
+                ] = payee
+
+                payee_imported = True
+                self.counters["payees_imported_flag"] += 1
+
+            self.counters["payees_to_be_imported_flag"] += 1
+            imported.append(
+                (index, lcra_client_accounts_number, client, payee, payee_already_exist, payee_imported, req_data)
+            )
+
+        # one transaction per chunk
+        self.db.session.flush()
+        for index, lcra_client_accounts_number, client, payee, payee_already_exist, payee_imported, req_data in imported:
+            self.import_payees_list.append(
+                {
+                    "index": index,
+                    "client_id": client["id"],
+                    "lcra_client_accounts_number": lcra_client_accounts_number,
+                    "control_account": client["control_account"],
+                    "payee": payee.account_nickname,
+                    "payee_id": payee.id,
+                    "status": payee.status.value,
+                    "payee_already_exist": payee_already_exist,
+                    "payee_imported": payee_imported,
+                    "import_data": req_data,
+                }
+            )
+
+            # delete state_or_province
+            if "state_or_province" in req_data:
+                del req_data["state_or_province"]
+
+            self.pending_syncs[str(payee.id)] = req_data
+            print(client["id"], f"--added as {req_data['ref_type']}--", payee.id)
+
+        for payee in {id(payee): payee for _, _, _, payee, _, _, _ in imported}.values():
+            if payee in self.db.session:
+                self.db.session.expunge(payee)
+
+        self.last_index = self.chunk[-1][0]
+        self.db.session.commit()
+        self.save_checkpoint()
+        print(f"-- {self.sheetname}: imported up to row {self.last_index} --")
+        self.chunk = []
+
+        # payment services, after the payees are committed
+        for _, _, _, payee, _, _, req_data in imported:
+            self.submit_sync(payee, req_data)
+
+    def sync_payee(self, payee, req_data):
+        with self.app.app_context():
+            payment_services = PaymentServices(request_type=payee, req_data=req_data)
+            payment_services.add_in_payment_services()
+
+    def submit_sync(self, payee, req_data):
+        # same payee imported again, syncs of a payee run in file order
+        previous = self.syncs.get(payee.id)
+        if previous:
+            wait([previous])
+            self.collect_syncs()
+
+        # bounded, rows are not read ahead of the syncs
+        while len(self.syncs) >= self.sync_workers * 2:
+            wait(list(self.syncs.values()), return_when=FIRST_COMPLETED)
+            self.collect_syncs()
+
+        self.syncs[payee.id] = self.executor.submit(self.sync_payee, payee, req_data)
+
+    def collect_syncs(self):
+        done = False
+        for payee_id, future in list(self.syncs.items()):
+            if not future.done():
+                continue
+
+            del self.syncs[payee_id]
+            req_data = self.pending_syncs.pop(str(payee_id), None)
+            self.failed_syncs.pop(str(payee_id), None)
+            error = future.exception()
+            if error:
+                print(f"--payment services sync failed-- payee {payee_id}: {error}")
+                self.failed_syncs[str(payee_id)] = req_data
+            done = True
+
+        if done:
+            self.save_checkpoint()
+
+    def finish(self):
+        """[Import remaining rows, wait for the syncs and save import logs]
+
+        Returns:
+            list: import payees list
+        """
+        self.import_chunk()
+        wait(list(self.syncs.values()))
+        self.collect_syncs()
+        self.executor.shutdown()
+
+        import_payees_list = list(self.import_payees_list)
+        import_payees_list.append(
+            {
+                "sheetname": self.sheetname,
+                "total_payees_to_be_imported": self.counters["payees_to_be_imported_flag"],
+                "total_payees_already_exist": self.counters["payees_already_exist_flag"],
+                "total_payees_imported": self.counters["payees_imported_flag"],
+                # "total_payees_approved": payees_approved_flag,
+                "total_payees_draft": self.counters["payees_draft_flag"],
+                "total_payees_sync_failed": len(self.failed_syncs),
+            }
+        )
+
+        # save imort payees data in logs
+        logs = Logs(
+            filename=f"payee_{self.sheetname_lower}_logs", data=import_payees_list
+        )
+        logs.save_logs()
+
+        if self.failed_syncs:
+            # kept, failed syncs are retried by running the import again
+            print(
+                f"-- {len(self.failed_syncs)} payment services syncs failed, run the import again to retry --"
+            )
+        elif os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        return import_payees_list
+
+    def abort(self):
+        # rows of the current chunk are imported again on resume
+        self.db.session.rollback()
+        self.chunk = []
+        if self.executor:
+            wait(list(self.syncs.values()))
+            self.collect_syncs()
+            self.executor.shutdown()
@@ -0,0 +1,117 @@
+import sys
+import time
+import random
+from flask_script import Command, Option
+from sqlalchemy import text
+
+WORDS = [
+    "north", "river", "supply", "logistics", "foods", "global", "metal",
+    "pacific", "trading", "systems", "holdings", "freight", "energy", "labs",
+]
+
+
+class SearchIndexBenchmark(Command):
+    """
+    LIKE vs FULLTEXT(ngram) + LIKE search on a scratch copy of search_index
+    filled with synthetic rows, rows found by both must be the same
+    """
+
+    option_list = (
+        Option("--rows", dest="rows", type=int, default=1000000),
+        Option("--terms", dest="terms", type=str, default="SOAID4242,river,1250,north sup"),
+        Option("--repeat", dest="repeat", type=int, default=3),
+        Option("--keep", dest="keep", action="store_true", default=False),
+    )
+
+    table = "search_index_benchmark"
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def execute(self, statement, params=None):
+        return self.db.session.execute(text(statement), params or {})
+
+    def value(self, i):
+        # soa/reserve release refs, client names and amounts
+        kind = i % 4
+        if kind == 0:
+            return "soa", "soa_ref_id", f"{random.randint(1, 99999)}"
+        if kind == 1:
+            return "soa", "reference_number", f"C{i % 9000:04d}-SOAID{i}"
+        if kind == 2:
+            return "client", "name", " ".join(random.sample(WORDS, 3))
+        return "soa", "disbursement_amount", f"{random.randint(1, 10 ** 7) / 100:.2f}"
+
+    def fill(self, rows, batch_size=10000):
+        started_at = time.monotonic()
+        for start in range(0, rows, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, rows)):
+                ref_type, field, value = self.value(i)
+                batch.append(
+                    {"ref_type": ref_type, "ref_id": i, "field": field, "value": value}
+                )
+            self.execute(
+                f"INSERT INTO {self.table} (ref_type, ref_id, field, value) "
+                "VALUES (:ref_type, :ref_id, :field, :value)",
+                batch,
+            )
+            self.db.session.commit()
+        print(f"-- {rows} rows inserted in {time.monotonic() - started_at:.1f} s --")
+
+        started_at = time.monotonic()
+        self.execute(
+            f"ALTER TABLE {self.table} ADD FULLTEXT INDEX ftx_value (value) WITH PARSER ngram"
+        )
+        print(f"-- fulltext index built in {time.monotonic() - started_at:.1f} s --")
+
+    def timed(self, statement, params, repeat):
+        elapsed = []
+        for _ in range(repeat):
+            started_at = time.monotonic()
+            ref_ids = {row[0] for row in self.execute(statement, params)}
+            elapsed.append(time.monotonic() - started_at)
+        return ref_ids, min(elapsed) * 1000
+
+    def run(self, rows=1000000, terms="", repeat=3, keep=False):
+        # python manage.py search_index_benchmark
+        # python manage.py search_index_benchmark --rows 100000 --terms "SOAID12,river" --keep
+        from src.models import SearchIndex
+
+        random.seed(rows)
+        self.execute(f"DROP TABLE IF EXISTS {self.table}")
+        self.execute(
+            f"CREATE TABLE {self.table} ("
+            "id INT AUTO_INCREMENT PRIMARY KEY, ref_type VARCHAR(50) NOT NULL, "
+            "ref_id INT NOT NULL, field VARCHAR(50) NOT NULL, "
+            "value VARCHAR(255) NOT NULL)"
+        )
+        failed = False
+        try:
+            self.fill(rows)
+            like = f"SELECT ref_id FROM {self.table} WHERE value LIKE :like"
+            fulltext = (
+                f"SELECT ref_id FROM {self.table} WHERE value LIKE :like "
+                "AND MATCH (value) AGAINST (:phrase IN BOOLEAN MODE)"
+            )
+            for term in terms.split(","):
+                params = {"like": f"%{term}%", "phrase": f'"{term}"'}
+                like_ids, like_ms = self.timed(like, params, repeat)
+                message = f"-- {term!r}: {len(like_ids)} rows, like {like_ms:.1f} ms"
+
+                # the same terms listings send to the fulltext index
+                if term.isalnum() and len(term) >= SearchIndex.ngram_size:
+                    fulltext_ids, fulltext_ms = self.timed(fulltext, params, repeat)
+                    message += f", fulltext {fulltext_ms:.1f} ms"
+                    if fulltext_ids != like_ids:
+                        message += f", MISMATCH: {len(fulltext_ids)} rows"
+                        failed = True
+                else:
+                    message += ", like only"
+                print(message + " --")
+        finally:
+            if not keep:
+                self.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+        if failed:
+            sys.exit(1)
@@ -0,0 +1,53 @@
+from flask_script import Command, Option
+from src.models import SearchIndex
+from src.resources.v2.models.search_index_model import SEARCH_INDEX_FIELDS
+
+
+class SearchIndexRebuild(Command):
+    """
+    Re-index search_index rows of soa, reserve release, client, debtor and client debtor
+    """
+
+    option_list = (
+        Option("--ref_types", dest="ref_types", type=str, default=None),
+        Option("--batch-size", dest="batch_size", type=int, default=1000),
+    )
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def rebuild(self, ref_type, batch_size):
+        model, _ = SearchIndex.source(ref_type)
+        last_id = 0
+        indexed = 0
+        while True:
+            ref_ids = [
+                row[0]
+                for row in self.db.session.query(model.id)
+                .filter(model.id > last_id)
+                .order_by(model.id.asc())
+                .limit(batch_size)
+                .all()
+            ]
+            if not ref_ids:
+                break
+
+            try:
+                SearchIndex.refresh(self.db.session.connection(), ref_type, ref_ids)
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                print(f"-- {ref_type}: failed after id {last_id}: {e} --")
+                raise
+
+            last_id = ref_ids[-1]
+            indexed += len(ref_ids)
+            print(f"-- {ref_type}: {indexed} indexed, last id: {last_id} --")
+
+    def run(self, ref_types=None, batch_size=1000):
+        # python manage.py search_index_rebuild
+        # python manage.py search_index_rebuild --ref_types soa,client --batch-size 5000
+        print("<-- script start -->")
+        for ref_type in ref_types.split(",") if ref_types else SEARCH_INDEX_FIELDS:
+            self.rebuild(ref_type, batch_size)
+        print("<-- script end -->")
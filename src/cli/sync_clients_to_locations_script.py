@@ -1,5 +1,6 @@
 import os
 import requests
+from src.http_client import get_http_client
 import json
 from src import db
 from flask_script import Command
@@ -123,7 +124,7 @@ class SyncClientsToLocationsScript(Command):
             }
 
             # sending post request
-            result = requests.post(url=url, headers=headers, json=params)
+            result = get_http_client("locations").post(url=url, headers=headers, json=params)
 
             # extracting data in json format
             result_json = result.json()
@@ -5,7 +5,7 @@ from flask_cors import CORS
 # initialize our db
 db = SQLAlchemy()
 bcrypt = Bcrypt()
-cors = CORS(expose_headers="Current-Date")
+cors = CORS(expose_headers=["Current-Date", "Server-Timing"])
 
 def register_extensions(app):
     """
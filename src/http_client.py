@@ -0,0 +1,220 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# per upstream defaults, timeout(seconds) can be overridden with HTTP_TIMEOUT_<UPSTREAM>
+UPSTREAMS = {
+    "auth": {"timeout": 10},
+    "third_party": {"timeout": 8},
+    "payment_services": {"timeout": 30},
+    "resources": {"timeout": 60},
+    "documents": {"timeout": 60},
+    "mail": {"timeout": 10},
+    "aws_lambda": {"timeout": 30},
+    "locations": {"timeout": 30},
+}
+
+# retried on connection errors and these statuses, only for idempotent verbs
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUS = (502, 503, 504)
+
+# latency histogram buckets in ms
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+# called after every request with (upstream, method, url, duration_ms, status_code),
+# status_code is None when the upstream was not reachable
+_request_listeners = []
+
+
+def add_request_listener(listener):
+    if listener not in _request_listeners:
+        _request_listeners.append(listener)
+
+
+def notify_request_listeners(upstream, method, url, duration_ms, status_code):
+    for listener in _request_listeners:
+        try:
+            listener(upstream, method, url, duration_ms, status_code)
+        except Exception as e:
+            print(f"--http request listener failed-- {e}")
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised without calling the upstream while its circuit is open
+    """
+
+
+class HttpClient(object):
+    """
+    Pooled keep-alive session for one upstream, with timeouts, retries on
+    idempotent verbs, a circuit breaker and latency histogram
+    """
+
+    def __init__(
+        self,
+        name,
+        timeout=30,
+        retries=2,
+        backoff_factor=0.3,
+        pool_maxsize=10,
+        failure_threshold=5,
+        reset_timeout=30,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            method_whitelist=IDEMPOTENT_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._buckets = [0] * len(LATENCY_BUCKETS)
+        self._count = 0
+        self._total_ms = 0.0
+        self._failures = 0
+        self._rejected = 0
+
+    @property
+    def circuit_state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def _before_request(self):
+        with self._lock:
+            if self.circuit_state == "open":
+                self._rejected += 1
+                raise CircuitOpenError(
+                    f"{self.name}: circuit open after {self._consecutive_failures} failures"
+                )
+
+    def _after_request(self, duration_ms, failed):
+        with self._lock:
+            self._count += 1
+            self._total_ms += duration_ms
+            for i, bucket in enumerate(LATENCY_BUCKETS):
+                if duration_ms <= bucket:
+                    self._buckets[i] += 1
+                    break
+
+            if failed:
+                self._failures += 1
+                self._consecutive_failures += 1
+                # half open probe failed or too many failures: (re)open circuit
+                if (
+                    self._opened_at is not None
+                    or self._consecutive_failures >= self.failure_threshold
+                ):
+                    self._opened_at = time.monotonic()
+            else:
+                self._consecutive_failures = 0
+                self._opened_at = None
+
+    def request(self, method, url, **kwargs):
+        self._before_request()
+
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method=method, url=url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            duration_ms = (time.perf_counter() - start) * 1000
+            self._after_request(duration_ms, failed=True)
+            notify_request_listeners(self.name, method, url, duration_ms, None)
+            raise
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        self._after_request(duration_ms, failed=response.status_code >= 500)
+        notify_request_listeners(
+            self.name, method, url, duration_ms, response.status_code
+        )
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "count": self._count,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "total_ms": round(self._total_ms, 1),
+                "circuit_state": self.circuit_state,
+                "latency_histogram_ms": {
+                    str(bucket): count
+                    for bucket, count in zip(LATENCY_BUCKETS, self._buckets)
+                },
+            }
+
+
+_http_clients = {}
+_http_clients_lock = threading.Lock()
+
+
+def get_http_client(upstream):
+    """[Get pooled http client of upstream]
+
+    Args:
+        upstream (str): key of UPSTREAMS
+
+    Returns:
+        HttpClient
+    """
+    with _http_clients_lock:
+        if upstream not in _http_clients:
+            settings = UPSTREAMS.get(upstream, {})
+            timeout = float(
+                os.getenv(f"HTTP_TIMEOUT_{upstream.upper()}", settings.get("timeout", 30))
+            )
+            _http_clients[upstream] = HttpClient(
+                name=upstream,
+                timeout=timeout,
+                retries=int(os.getenv("HTTP_RETRIES", 2)),
+                failure_threshold=int(os.getenv("HTTP_CIRCUIT_FAILURE_THRESHOLD", 5)),
+                reset_timeout=int(os.getenv("HTTP_CIRCUIT_RESET_TIMEOUT", 30)),
+            )
+        return _http_clients[upstream]
+
+
+def http_clients_stats():
+    """
+    Latency histogram and circuit state per upstream
+    """
+    with _http_clients_lock:
+        http_clients = dict(_http_clients)
+    return {name: http_client.stats() for name, http_client in http_clients.items()}
@@ -3,6 +3,7 @@ import datetime
 from flask import json, Response, request, g, jsonify
 from functools import wraps
 import requests
+from src.http_client import get_http_client
 
 class Auth():
     @staticmethod
@@ -34,7 +35,7 @@ class Auth():
             msg = "auth/verify Error: Something went wrong, please login again"
             status_code = 401
             try:
-                get_request = requests.get(url=url, headers=headers, params=params)
+                get_request = get_http_client("auth").get(url=url, headers=headers, params=params)
 
                 # extracting data in json format
                 data = get_request.json()
@@ -56,6 +57,11 @@ class Auth():
                 status_code = 400
 
             if status_code != 200:
+                # token is no longer valid, drop its cached permissions
+                if status_code == 401:
+                    from src.middleware.permissions_cache import permissions_cache
+                    permissions_cache.invalidate(auth_token=auth_token)
+
                 return Response(
                     mimetype="application/json",
                     response=json.dumps({"status": "error", "msg": str(msg)}),
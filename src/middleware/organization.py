@@ -1,8 +1,220 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from flask import g, has_request_context
+from sqlalchemy import event, and_, not_, false
+from sqlalchemy.orm import Session, object_session
 from src.middleware.permissions import Permissions
 from src import db
 
+# clients left out of organization scoping
+EXCLUDED_REF_CLIENT_NO = ["TODO-cadence", "Cadence:sync-pending", "TODO-factorcloud"]
+
+
+class OrganizationClientsCache(object):
+    """
+    Process wide LRU of organization ids -> client ids. Cleared when a
+    session that changed Client/OrganizationClientAccount rows commits,
+    entries also expire after ORGANIZATION_CLIENTS_CACHE_TTL seconds for
+    changes made by other processes.
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = (
+            ttl
+            if ttl is not None
+            else int(os.getenv("ORGANIZATION_CLIENTS_CACHE_TTL", 300))
+        )
+        self.max_size = (
+            max_size
+            if max_size is not None
+            else int(os.getenv("ORGANIZATION_CLIENTS_CACHE_MAX_SIZE", 256))
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped on clear, a list loaded before a clear is not cached
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            return None
+
+    def set(self, key, client_ids, generation):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, client_ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+organization_clients_cache = OrganizationClientsCache()
+
+_invalidation_registered = False
+_invalidation_lock = threading.Lock()
+
+
+def mark_organization_clients_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["_organization_clients_changed"] = True
+
+
+def clear_organization_clients_cache(session):
+    if session.info.pop("_organization_clients_changed", False):
+        organization_clients_cache.clear()
+
+
+def discard_organization_clients_changed(session, previous_transaction):
+    session.info.pop("_organization_clients_changed", None)
+
+
+def register_organization_clients_invalidation():
+    global _invalidation_registered
+
+    with _invalidation_lock:
+        if _invalidation_registered:
+            return
+
+        from src.models import Client, OrganizationClientAccount
+
+        for model in [Client, OrganizationClientAccount]:
+            for event_name in ["after_insert", "after_update", "after_delete"]:
+                event.listen(model, event_name, mark_organization_clients_changed)
+        event.listen(Session, "after_commit", clear_organization_clients_cache)
+        event.listen(
+            Session, "after_soft_rollback", discard_organization_clients_changed
+        )
+        _invalidation_registered = True
+
 
 class Organization:
+    @staticmethod
+    def get_organization_access():
+        """
+        Organization ids of the logged user, None if permissions are not available
+        """
+        get_user_role_permissions = Permissions.get_user_role_permissions()
+        if (
+            not isinstance(get_user_role_permissions, dict)
+            or get_user_role_permissions.get("status_code") != 200
+        ):
+            return None
+        return get_user_role_permissions["organization_access"] or []
+
+    @staticmethod
+    def get_user_role():
+        """
+        Role of the logged user, None if permissions are not available
+        """
+        get_user_role_permissions = Permissions.get_user_role_permissions()
+        if not isinstance(get_user_role_permissions, dict):
+            return None
+        return get_user_role_permissions.get("user_role")
+
+    @staticmethod
+    def client_ids_query(organization_access):
+        """[Query of client ids of organizations]
+
+        Args:
+            organization_access (list): organization ids
+
+        Returns:
+            Query: Client.id
+        """
+        from src.models import Client, OrganizationClientAccount
+
+        return (
+            db.session.query(Client.id)
+            .join(
+                OrganizationClientAccount,
+                and_(
+                    OrganizationClientAccount.lcra_client_account_id
+                    == Client.lcra_client_accounts_id,
+                    OrganizationClientAccount.is_deleted == False,
+                ),
+            )
+            .filter(
+                Client.is_deleted == False,
+                not_(Client.ref_client_no.in_(EXCLUDED_REF_CLIENT_NO)),
+                OrganizationClientAccount.organization_id.in_(
+                    list(organization_access)
+                ),
+            )
+        )
+
+    @staticmethod
+    def client_filter(column):
+        """[Limit column(client id) to clients of the logged user's organizations]
+
+        The clients are selected by a subquery, instead of binding every
+        client id of the organizations.
+
+        Args:
+            column (Column): client id column, e.g. SOA.client_id
+
+        Returns:
+            BinaryExpression: filter criterion
+        """
+        organization_access = Organization.get_organization_access()
+        if not organization_access:
+            return false()
+        return column.in_(Organization.client_ids_query(organization_access))
+
+    @staticmethod
+    def get_client_ids(organization_access):
+        """[Client ids of organizations, cached]
+
+        Args:
+            organization_access (list): organization ids
+
+        Returns:
+            list: client ids
+        """
+        if not organization_access:
+            return []
+
+        register_organization_clients_invalidation()
+
+        key = tuple(sorted(set(organization_access)))
+        # same list for the whole request
+        if has_request_context():
+            request_cache = g.setdefault("_organization_client_ids", {})
+            if key in request_cache:
+                return request_cache[key]
+
+        client_list = organization_clients_cache.get(key)
+        if client_list is None:
+            generation = organization_clients_cache.generation
+            client_list = [
+                row[0]
+                for row in Organization.client_ids_query(organization_access)
+                .distinct()
+                .all()
+            ]
+            organization_clients_cache.set(key, client_list, generation)
+
+        if has_request_context():
+            request_cache[key] = client_list
+        # callers may change their list
+        return list(client_list)
+
     @staticmethod
     def get_locations():
         # user role and permissions
@@ -16,34 +228,11 @@ class Organization:
 
         client_list = []
         if get_user_role_permissions["status_code"] == 200:
-            # Get organization ids
-            organization_access = get_user_role_permissions["organization_access"]
-            organization_ids = (
-                ",".join(map(lambda k: "'" + k + "'", organization_access))
-                if organization_access
-                else None
+            # Pull clients based of organization ids
+            client_list = Organization.get_client_ids(
+                get_user_role_permissions["organization_access"]
             )
 
-            # Pull clients based of organization_ids
-            if organization_ids:
-                sql_query = f"SELECT \
-                            c.id \
-                            FROM organization_client_account oca, \
-                            clients c \
-                            WHERE c.lcra_client_accounts_id = oca.lcra_client_account_id \
-                            AND c.is_deleted = false \
-                            AND c.ref_client_no NOT IN ('TODO-cadence', 'Cadence:sync-pending', 'TODO-factorcloud') \
-                            AND oca.is_deleted = false \
-                            AND oca.organization_id IN ({organization_ids})"
-
-                # Returns a list of data in tuples
-                client_data = db.session.execute(db.text(sql_query)).fetchall()
-
-                # client data
-                if client_data:
-                    [client_list.append(row[0]) for row in client_data]
-                    # client_list = list(map(lambda row: row[0], client_data))
-
         return_obj = {"client_list": client_list, "user_role": user_role}
 
         return return_obj
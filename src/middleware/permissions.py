@@ -3,7 +3,9 @@ import datetime
 from flask import json, Response, request, g, jsonify, abort
 from functools import wraps
 import requests
+from src.http_client import get_http_client
 from src.middleware.authentication import Auth
+from src.middleware.permissions_cache import permissions_cache
 
 
 class Permissions(object):
@@ -37,6 +39,11 @@ class Permissions(object):
             "organization_access": organization ids,
         """
         try:
+            # background jobs run as the user who enqueued them
+            job_user = g.get("background_job_user")
+            if job_user and job_user.get("user_role_permissions"):
+                return dict(job_user["user_role_permissions"])
+
             if ("auth-token" not in request.headers) or (
                 not request.headers["auth-token"]
             ):
@@ -52,91 +59,129 @@ class Permissions(object):
 
             auth_token = request.headers["auth-token"]
 
-            # api endpoint
-            url = (
-                os.getenv("AUTH_URL")
-                + f'v2/permissions?app_identifier={os.getenv("APP_IDENTIFIER")}'
+            # permissions are cached per request and, for PERMISSIONS_CACHE_TTL seconds, per process
+            cache_key = (auth_token, active)
+            cached = permissions_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+
+            user_role_permissions = Permissions._fetch_user_role_permissions(
+                auth_token=auth_token, active=active
             )
 
-            # will return only the permissions that are available for the user
-            if active:
-                url = url + f"&active=true"
+            # only successful lookups are cached
+            if user_role_permissions["status_code"] == 200:
+                permissions_cache.set(cache_key, user_role_permissions)
 
-            # defining a headers dict for the parameters to be sent to the API
-            headers = {"auth-token": auth_token, "api-token": os.getenv("API_TOKEN")}
+            return dict(user_role_permissions)
 
-            # get user permissions and user role
-            user_role = None
-            user_permissions = {}
-            organization_ids = []
-            status_code = 500
-            get_msg = "Get users Role Permissions- Error: Something went wrong, please login again"
-            try:
-                # sending get request and saving the response as response object
-                result = requests.get(url=url, headers=headers)
+        except Exception as e:
+            print("Exception- ", str(e))
+            return jsonify({"status": "error", "msg": "Exception: " + str(e)}), 404
 
-                # extracting data in json format
-                result_json = result.json()
-                status_code = result.status_code
+    @staticmethod
+    def _fetch_user_role_permissions(auth_token, active=True):
+        """[Get users Role Permissions from auth api, uncached]
 
-                if "msg" in result_json:
-                    get_msg = result_json["msg"]
+        Args:
+            auth_token ([str]): auth token
+            active (bool, optional): [description]. Defaults to True.
+        """
+        # api endpoint
+        url = (
+            os.getenv("AUTH_URL")
+            + f'v2/permissions?app_identifier={os.getenv("APP_IDENTIFIER")}'
+        )
 
-                payload = result_json["payload"] if "payload" in result_json else {}
+        # will return only the permissions that are available for the user
+        if active:
+            url = url + f"&active=true"
 
-                if payload:
-                    # get app_flow(principal/ae/bo) which has value True
-                    if (
-                        "app_flow" in payload
-                        and payload["app_flow"]
-                        and isinstance(payload["app_flow"], dict)
-                    ):
-                        app_flow = payload["app_flow"]
-                        user_role = list(app_flow.keys())[0]
+        # defining a headers dict for the parameters to be sent to the API
+        headers = {"auth-token": auth_token, "api-token": os.getenv("API_TOKEN")}
 
-                    # Get all organization ids from organization_access which have value True
-                    if (
-                        "organization_access" in payload
-                        and payload["organization_access"]
-                    ):
-                        organization_access = payload["organization_access"]
-                        organization_ids = (
-                            [k for k, v in organization_access.items() if v == True]
-                            if organization_access
-                            and isinstance(organization_access, dict)
-                            else []
-                        )
-
-                    user_permissions = payload
-
-            except requests.ConnectionError as e:
-                get_msg = f"Connection Error: {e}"
-                status_code = 502
-            except requests.HTTPError as e:
-                get_msg = f"HTTP Error: {e}"
-            except requests.Timeout as e:
-                get_msg = f"Timeout Error: {e}"
-                status_code = 408
-            except Exception as e:
-                get_msg = f"Get users Role Permissions- RequestException Error: {e}"
-
-            show_requests = user_permissions.get("show_requests", {})
-            show_info = user_permissions.get("show_info", {})
-            create_edit_permission = user_permissions.get("create_edit_permission", {})
-            return {
-                "status_code": status_code,
-                "msg": f"{get_msg}",
-                "user_role": user_role,
-                "user_permissions": user_permissions,
-                "organization_access": organization_ids,
-                "show_requests": show_requests,
-                "show_info": show_info,
-                "create_edit_permission": create_edit_permission,
-            }
+        # get user permissions and user role
+        user_role = None
+        user_permissions = {}
+        organization_ids = []
+        status_code = 500
+        get_msg = "Get users Role Permissions- Error: Something went wrong, please login again"
+        try:
+            # sending get request and saving the response as response object
+            result = get_http_client("auth").get(url=url, headers=headers)
+
+            # extracting data in json format
+            result_json = result.json()
+            status_code = result.status_code
 
+            if "msg" in result_json:
+                get_msg = result_json["msg"]
+
+            payload = result_json["payload"] if "payload" in result_json else {}
+
+            if payload:
+                # get app_flow(principal/ae/bo) which has value True
+                if (
+                    "app_flow" in payload
+                    and payload["app_flow"]
+                    and isinstance(payload["app_flow"], dict)
+                ):
+                    app_flow = payload["app_flow"]
+                    user_role = list(app_flow.keys())[0]
+
+                # Get all organization ids from organization_access which have value True
+                if (
+                    "organization_access" in payload
+                    and payload["organization_access"]
+                ):
+                    organization_access = payload["organization_access"]
+                    organization_ids = (
+                        [k for k, v in organization_access.items() if v == True]
+                        if organization_access
+                        and isinstance(organization_access, dict)
+                        else []
+                    )
+
+                user_permissions = payload
+
+        except requests.ConnectionError as e:
+            get_msg = f"Connection Error: {e}"
+            status_code = 502
+        except requests.HTTPError as e:
+            get_msg = f"HTTP Error: {e}"
+        except requests.Timeout as e:
+            get_msg = f"Timeout Error: {e}"
+            status_code = 408
         except Exception as e:
-            print("Exception- ", str(e))
-            return jsonify({"status": "error", "msg": "Exception: " + str(e)}), 404
+            get_msg = f"Get users Role Permissions- RequestException Error: {e}"
+
+        show_requests = user_permissions.get("show_requests", {})
+        show_info = user_permissions.get("show_info", {})
+        create_edit_permission = user_permissions.get("create_edit_permission", {})
+        return {
+            "status_code": status_code,
+            "msg": f"{get_msg}",
+            "user_role": user_role,
+            "user_permissions": user_permissions,
+            "organization_access": organization_ids,
+            "show_requests": show_requests,
+            "show_info": show_info,
+            "create_edit_permission": create_edit_permission,
+        }
+
+    @staticmethod
+    def invalidate_user_role_permissions(auth_token=None):
+        """[Invalidate cached users Role Permissions]
+
+        Args:
+            auth_token ([str], optional): Defaults to None(all users).
+        """
+        permissions_cache.invalidate(auth_token=auth_token)
+
+    @staticmethod
+    def user_role_permissions_cache_stats():
+        """[Get users Role Permissions cache hit/miss counters]"""
+        return permissions_cache.stats()
 
     @staticmethod
     def get_user_details(branding=True):
@@ -156,6 +201,11 @@ class Permissions(object):
             "business_name": None,
             "branding": {}
         """
+        # background jobs run as the user who enqueued them
+        job_user = g.get("background_job_user")
+        if job_user and job_user.get("user_details"):
+            return dict(job_user["user_details"])
+
         if ("auth-token" not in request.headers) or (not request.headers["auth-token"]):
             return (
                 jsonify(
@@ -182,7 +232,7 @@ class Permissions(object):
         headers = {"auth-token": auth_token, "api-token": os.getenv("API_TOKEN")}
 
         # sending get request and saving the response as response object
-        profile_result = requests.get(url=url, headers=headers)
+        profile_result = get_http_client("auth").get(url=url, headers=headers)
 
         # extracting data in json format
         profile_result_json = profile_result.json()
@@ -269,7 +319,7 @@ class Permissions(object):
         headers = {"auth-token": auth_token, "api-token": os.getenv("API_TOKEN")}
 
         # sending get request and saving the response as response object
-        result = requests.get(url=url, headers=headers)
+        result = get_http_client("auth").get(url=url, headers=headers)
 
         # extracting data in json format
         result_json = result.json()
@@ -363,7 +413,7 @@ class Permissions(object):
                 }
 
             # sending get request and saving the response as response object
-            result = requests.post(url=url, headers=headers, json=params)
+            result = get_http_client("auth").post(url=url, headers=headers, json=params)
 
             # extracting data in json format
             result_json = result.json()
@@ -631,7 +681,7 @@ class Permissions(object):
         params = {"property": "email", "values": emails}
 
         # sending get request and saving the response as response object
-        result = requests.post(url=url, headers=headers, json=params)
+        result = get_http_client("auth").post(url=url, headers=headers, json=params)
 
         # extracting data in json format
         result_json = result.json()
@@ -897,7 +947,7 @@ class Permissions(object):
         headers = {"api-token": os.getenv("API_TOKEN")}
 
         # sending get request and saving the response as response object
-        result = requests.get(url=auth_url, headers=headers)
+        result = get_http_client("auth").get(url=auth_url, headers=headers)
 
         # extracting data in json format
         result_json = result.json()
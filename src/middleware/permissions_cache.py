@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from flask import g, has_request_context
+
+
+class PermissionsCache(object):
+    """
+    Two tier cache for auth service permission lookups, keyed by auth token:
+    - per request memo stored in flask.g
+    - process wide LRU, entries expire after PERMISSIONS_CACHE_TTL seconds
+    """
+
+    g_key = "_permissions_cache"
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = (
+            ttl if ttl is not None else int(os.getenv("PERMISSIONS_CACHE_TTL", 60))
+        )
+        self.max_size = (
+            max_size
+            if max_size is not None
+            else int(os.getenv("PERMISSIONS_CACHE_MAX_SIZE", 1024))
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.request_hits = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _request_memo(self):
+        if not has_request_context():
+            return None
+
+        if not hasattr(g, self.g_key):
+            setattr(g, self.g_key, {})
+        return getattr(g, self.g_key)
+
+    def get(self, key):
+        """[Get cached value for key]
+
+        Args:
+            key ([tuple]): (auth token, *lookup args)
+
+        Returns:
+            cached value or None
+        """
+        request_memo = self._request_memo()
+        if request_memo is not None and key in request_memo:
+            with self._lock:
+                self.request_hits += 1
+            return request_memo[key]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[1]
+            else:
+                if entry:
+                    # expired
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+        if request_memo is not None:
+            request_memo[key] = value
+        return value
+
+    def set(self, key, value):
+        request_memo = self._request_memo()
+        if request_memo is not None:
+            request_memo[key] = value
+
+        # ttl 0 disables the process wide tier, per request memo is kept
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, auth_token=None):
+        """[Drop cached permissions]
+
+        Args:
+            auth_token ([str], optional): drop only entries of this token. Defaults to None(drop all).
+        """
+        with self._lock:
+            if auth_token is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == auth_token]:
+                    del self._entries[key]
+
+        request_memo = self._request_memo()
+        if request_memo is not None:
+            if auth_token is None:
+                request_memo.clear()
+            else:
+                for key in [k for k in request_memo if k[0] == auth_token]:
+                    del request_memo[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "request_hits": self.request_hits,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+            }
+
+
+permissions_cache = PermissionsCache()
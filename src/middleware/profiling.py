@@ -0,0 +1,241 @@
+import os
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.http_client import add_request_listener
+
+
+def is_profiling_enabled():
+    return os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+
+class RequestProfile(object):
+    """
+    Timings of one profiled request, kept in flask.g
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        # upstream host -> [count, ms]
+        self.http = {}
+        self.serialization_ms = 0.0
+        self.serialization_depth = 0
+
+    def add_http(self, host, duration_ms):
+        http = self.http.setdefault(host, [0, 0.0])
+        http[0] += 1
+        http[1] += duration_ms
+
+    def server_timing(self, total_ms):
+        timings = [
+            f'sql;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+        ]
+        for host, (count, ms) in self.http.items():
+            name = "http-" + "".join(c if c.isalnum() else "-" for c in host)
+            timings.append(f'{name};dur={ms:.1f};desc="{count} calls"')
+        timings.append(f"serialization;dur={self.serialization_ms:.1f}")
+        timings.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(timings)
+
+
+class RouteStats(object):
+    """
+    Process wide aggregated timings of profiled requests per route
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def add(self, route, profile, total_ms, status_code):
+        with self._lock:
+            stats = self._routes.get(route)
+            if not stats:
+                stats = {
+                    "count": 0,
+                    "errors": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "sql_count": 0,
+                    "sql_max_count": 0,
+                    "sql_ms": 0.0,
+                    "serialization_ms": 0.0,
+                    "http": {},
+                }
+                self._routes[route] = stats
+
+            stats["count"] += 1
+            if status_code >= 500:
+                stats["errors"] += 1
+            stats["total_ms"] += total_ms
+            stats["max_ms"] = max(stats["max_ms"], total_ms)
+            stats["sql_count"] += profile.sql_count
+            stats["sql_max_count"] = max(stats["sql_max_count"], profile.sql_count)
+            stats["sql_ms"] += profile.sql_ms
+            stats["serialization_ms"] += profile.serialization_ms
+            for host, (count, ms) in profile.http.items():
+                http = stats["http"].setdefault(host, {"count": 0, "ms": 0.0})
+                http["count"] += count
+                http["ms"] += ms
+
+    def snapshot(self):
+        """[Aggregated stats per route, with averages per request]
+
+        Returns:
+            dict: route -> stats
+        """
+        with self._lock:
+            routes = {}
+            for route, stats in self._routes.items():
+                count = stats["count"]
+                routes[route] = {
+                    "count": count,
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["total_ms"] / count, 1),
+                    "max_ms": round(stats["max_ms"], 1),
+                    "avg_sql_count": round(stats["sql_count"] / count, 1),
+                    "max_sql_count": stats["sql_max_count"],
+                    "avg_sql_ms": round(stats["sql_ms"] / count, 1),
+                    "avg_serialization_ms": round(stats["serialization_ms"] / count, 1),
+                    "http": {
+                        host: {
+                            "avg_count": round(http["count"] / count, 1),
+                            "avg_ms": round(http["ms"] / count, 1),
+                        }
+                        for host, http in stats["http"].items()
+                    },
+                }
+            return routes
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+
+route_stats = RouteStats()
+
+
+def current_profile():
+    if not has_request_context():
+        return None
+    return g.get("_request_profile")
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile():
+        conn.info.setdefault("_profiling_started_at", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    started_at = conn.info.get("_profiling_started_at")
+    if profile and started_at:
+        profile.sql_count += 1
+        profile.sql_ms += (time.perf_counter() - started_at.pop()) * 1000
+
+
+def handle_error(exception_context):
+    # failed statement, no after_cursor_execute
+    conn = exception_context.connection
+    started_at = conn.info.get("_profiling_started_at") if conn is not None else None
+    if started_at:
+        started_at.pop()
+
+
+def on_http_request(upstream, method, url, duration_ms, status_code):
+    # calls made on worker threads (document downloads, payment services
+    # steps) have no request context and are not counted
+    profile = current_profile()
+    if profile:
+        profile.add_http(urlsplit(url).netloc or upstream, duration_ms)
+
+
+class profile_serialization(object):
+    """
+    Times schema dumps/json encoding of the current profiled request,
+    nested dumps are counted once
+    """
+
+    def __enter__(self):
+        self.profile = current_profile()
+        if self.profile:
+            self.profile.serialization_depth += 1
+            self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profile:
+            self.profile.serialization_depth -= 1
+            if not self.profile.serialization_depth:
+                self.profile.serialization_ms += (
+                    time.perf_counter() - self.started_at
+                ) * 1000
+        return False
+
+
+def profile_schema_dumps():
+    from marshmallow import Schema
+
+    if getattr(Schema.dump, "_profiled", False):
+        return
+
+    dump = Schema.dump
+
+    def profiled_dump(self, *args, **kwargs):
+        with profile_serialization():
+            return dump(self, *args, **kwargs)
+
+    profiled_dump._profiled = True
+    Schema.dump = profiled_dump
+
+
+def before_request():
+    sample_rate = float(os.getenv("PROFILING_SAMPLE_RATE", 0.1))
+    if request.method != "OPTIONS" and random.random() < sample_rate:
+        g._request_profile = RequestProfile()
+
+
+def after_request(response):
+    profile = current_profile()
+    if not profile:
+        return response
+
+    total_ms = (time.perf_counter() - profile.started_at) * 1000
+    # keep metrics set by the view or an upstream proxy
+    response.headers["Server-Timing"] = ", ".join(
+        filter(
+            None,
+            [response.headers.get("Server-Timing"), profile.server_timing(total_ms)],
+        )
+    )
+
+    rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+    route_stats.add(f"{request.method} {rule}", profile, total_ms, response.status_code)
+    return response
+
+
+def init_profiling(app):
+    """[Profile a sample of requests, if PROFILING_ENABLED]
+
+    Profiled requests get a Server-Timing header (sql, http per upstream
+    host, serialization, total) and are aggregated per route in route_stats.
+    PROFILING_SAMPLE_RATE (0.1) of the requests are profiled.
+    """
+    if not is_profiling_enabled():
+        return
+
+    if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(Engine, "handle_error", handle_error)
+    add_request_listener(on_http_request)
+    profile_schema_dumps()
+
+    app.before_request(before_request)
+    app.after_request(after_request)
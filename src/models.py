@@ -86,6 +86,7 @@ from src.resources.v2.models.lcra_export_model import (
 )
 from src.resources.v2.models.approvals_history_model import (
     ApprovalsHistory,
+    ApprovalsHistorySnapshot,
 )
 from src.resources.v2.models.user_notifications_model import (
     UserNotifications,
@@ -143,4 +144,12 @@ from src.resources.v2.models.verification_notes_approval_history_model import (
 )
 from src.resources.v2.models.invoice_supporting_documents_model import (
     InvoiceSupportingDocuments,
-)
\ No newline at end of file
+)
+from src.resources.v2.models.background_jobs_model import (
+    BackgroundJob,
+    BackgroundJobType,
+    BackgroundJobStatus,
+)
+from src.resources.v2.models.search_index_model import (
+    SearchIndex,
+)
@@ -31,7 +31,9 @@ def get_all():
   Get All ApprovalsHistory
   """
   try:
-    approvals_history = ApprovalsHistory.get_all_approvals_history()
+    approvals_history = ApprovalsHistory.get_all_approvals_history().all()
+    # snapshots of all rows with one query, not one per attribute
+    ApprovalsHistory.prefetch_attributes(approvals_history)
     data = approvals_history_schema.dump(approvals_history, many=True).data
     return custom_response(data, 200)
   except Exception as e:
@@ -0,0 +1,121 @@
+from flask import request
+from src.models import BackgroundJob
+from src.middleware.authentication import Auth
+from src.middleware.permissions import Permissions
+from src.resources.v2.helpers import custom_response
+from src.resources.v2.schemas import BackgroundJobSchema
+
+background_job_schema = BackgroundJobSchema()
+
+
+def background_jobs_permission(user_roles, action="view"):
+    """[Error response if the logged user's role is not in user_roles]
+
+    Args:
+        user_roles (list): allowed roles
+        action (str, optional): for the error message. Defaults to "view".
+
+    Returns:
+        Response|None
+    """
+    get_user_role = Permissions.get_user_role_permissions()
+    user_role = (
+        get_user_role.get("user_role") if isinstance(get_user_role, dict) else None
+    )
+
+    # user role not assigned to user
+    if not user_role:
+        return custom_response(
+            {"status": "error", "msg": "user role not found, please assign role"}, 403
+        )
+
+    if user_role.lower() not in user_roles:
+        return custom_response(
+            {
+                "status": "error",
+                "msg": f"{user_role} doesn't have permission to {action} background jobs",
+            },
+            403,
+        )
+    return None
+
+
+@Auth.auth_required
+def get_all():
+    """
+    Get BackgroundJobs of a soa/reserve release
+    """
+    try:
+        permission_error = background_jobs_permission(Permissions.user_roles)
+        if permission_error:
+            return permission_error
+
+        ref_type = request.args.get("ref_type", None, type=str)
+        ref_id = request.args.get("ref_id", None, type=int)
+        if not ref_type or not ref_id:
+            return custom_response(
+                {"status": "error", "msg": "ref_type and ref_id are required"}, 400
+            )
+
+        background_jobs = BackgroundJob.get_by_ref(ref_type=ref_type, ref_id=ref_id)
+        data = background_job_schema.dump(background_jobs, many=True).data
+        return custom_response(data, 200)
+    except Exception as e:
+        return custom_response({"status": "error", "msg": str(e)}, 404)
+
+
+@Auth.auth_required
+def get_one(background_job_id):
+    """
+    Get A BackgroundJob
+    """
+    try:
+        permission_error = background_jobs_permission(Permissions.user_roles)
+        if permission_error:
+            return permission_error
+
+        background_job = BackgroundJob.get_one_for_organization(background_job_id)
+        if not background_job:
+            return custom_response(
+                {"status": "error", "msg": "background job not found"}, 404
+            )
+        data = background_job_schema.dump(background_job).data
+        return custom_response(data, 200)
+    except Exception as e:
+        return custom_response({"status": "error", "msg": str(e)}, 404)
+
+
+@Auth.auth_required
+def retry(background_job_id):
+    """
+    Retry A failed BackgroundJob
+    """
+    try:
+        # payments and lcra exports are run by principal/bo
+        permission_error = background_jobs_permission(
+            [Permissions.principal, Permissions.bo], action="retry"
+        )
+        if permission_error:
+            return permission_error
+
+        background_job = BackgroundJob.get_one_for_organization(background_job_id)
+        if not background_job:
+            return custom_response(
+                {"status": "error", "msg": "background job not found"}, 404
+            )
+
+        if not background_job.can_retry():
+            msg = "only failed background jobs can be retried"
+            if background_job.payment_started_at:
+                msg = (
+                    "payment was already started at "
+                    f"{background_job.payment_started_at}, "
+                    "check the transaction instead of retrying"
+                )
+            return custom_response({"status": "error", "msg": msg}, 400)
+
+        background_job.retry()
+        data = background_job_schema.dump(background_job).data
+        return custom_response(data, 200)
+    except Exception as e:
+        return custom_response({"status": "error", "msg": str(e)}, 404)
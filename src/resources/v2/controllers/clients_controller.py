@@ -53,15 +53,19 @@ def get_all():
     try:
         page = request.args.get("page", 0, type=int)
         rpp = request.args.get("rpp", 20, type=int)
+        cursor = request.args.get("cursor", None, type=str)
+        total = request.args.get("total", None, type=str)
         ordering = request.args.get("ordering", None, type=str)
         search = request.args.get("search", None, type=str)
         control_account = request.args.get("control_account", None, type=str)
         active = request.args.get("active", None, type=str)
 
-        if page > 0:
+        if page > 0 or cursor is not None:
             data = ClientListing.get_paginated_clients(
                 page=page,
                 rpp=rpp,
+                cursor=cursor,
+                total=total,
                 ordering=ordering,
                 search=search,
                 control_account=control_account,
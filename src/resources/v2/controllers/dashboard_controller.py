@@ -1,5 +1,4 @@
 from flask import request
-from sqlalchemy.sql.sqltypes import DateTime
 from src.models import *
 from src.resources.v2.schemas import *
 from src.resources.v2.helpers import (
@@ -7,12 +6,18 @@ from src.resources.v2.helpers import (
     calculate_time_remaining,
     principal_settings,
 )
+from src.resources.v2.helpers.lanes import (
+    run_lanes,
+    is_concurrent_lanes_enabled,
+    server_timing_header,
+)
 from decimal import Decimal
 from src.middleware.authentication import Auth
 from src.middleware.permissions import Permissions
 from src.middleware.organization import Organization
 from datetime import date, datetime
-from sqlalchemy import cast, Date, or_
+from sqlalchemy import Date, and_, case, func
+from src import db
 from src.resources.v2.helpers.convert_datetime import *
 
 
@@ -133,12 +138,8 @@ def get_dashboard():
         high_priority = request.args.get("high_priority", None, type=str)
         dashboard = True
 
-        # client ids
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # user role
-        user_role = get_locations["user_role"]
+        user_role = Organization.get_user_role()
         
         # control accounts
         business_control_accounts = Permissions.get_business_settings()["control_accounts"]
@@ -164,368 +165,108 @@ def get_dashboard():
             start_date = None
             end_date = None
 
-        ## SOA Listing ##
-        soa_resource = SOAListing.get_paginated_soa(
-            page=page,
-            rpp=rpp,
-            ordering=ordering,
-            search=search,
-            start_date=start_date,
-            end_date=end_date,
-            control_account=control_account,
-            stage=stage,
-            use_ref=use_ref,
-            high_priority=high_priority,
-            dashboard=dashboard,
-            client_ids=client_ids,
-            user_role=user_role,
-            business_control_accounts=business_control_accounts,
-        )
-        
-        # soa: data
-        soa_data = (
-            soa_resource["data"] if soa_resource and "data" in soa_resource else []
-        )
-        
-        # soa: total count
-        soa_total_count = (
-            int(soa_resource["total_count"])
-            if soa_resource and "total_count" in soa_resource
-            else int(0)
-        )
-        
-        # soa: total pages
-        soa_total_pages = (
-            int(soa_resource["total_pages"])
-            if soa_resource and "total_pages" in soa_resource
-            else int(0)
-        )
-        
-        # soa: rpp
-        soa_rpp = (
-            int(soa_resource["per_page"])
-            if soa_resource and "per_page" in soa_resource
-            else int(0)
-        )
-
-        # Reserve Release Listing 
-        reserve_release_resource = ReserveReleaseListing.get_paginated_reserve_release(
-            page=page,
-            rpp=rpp,
-            ordering=ordering,
-            search=search,
-            start_date=start_date,
-            end_date=end_date,
-            control_account=control_account,
-            stage=stage,
-            use_ref=use_ref,
-            high_priority=high_priority,
-            dashboard=dashboard,
-            client_ids=client_ids,
-            user_role=user_role,
-            business_control_accounts=business_control_accounts,
-        )
-
-        # reserve release: data
-        reserve_release_data = (
-            reserve_release_resource["data"]
-            if reserve_release_resource and "data" in reserve_release_resource
-            else []
-        )
-
-        # reserve release: total count
-        reserve_release_total_count = (
-            int(reserve_release_resource["total_count"])
-            if reserve_release_resource and "total_count" in reserve_release_resource
-            else int(0)
-        )
-
-        # reserve release: total pages
-        reserve_release_total_pages = (
-            int(reserve_release_resource["total_pages"])
-            if reserve_release_resource and "total_pages" in reserve_release_resource
-            else int(0)
-        )
-
-        # reserve release: rpp
-        reserve_release_rpp = (
-            int(reserve_release_resource["per_page"])
-            if reserve_release_resource and "per_page" in reserve_release_resource
-            else int(0)
-        )
-        
-        # total count: soa total count + reserve release total count
-        total_count = soa_total_count + reserve_release_total_count
-
-        # total_pages: soa total_pages + reserve release total_pages
-        total_pages = (
-            soa_total_pages
-            if soa_total_pages > reserve_release_total_pages
-            else reserve_release_total_pages
-        )
-        
-        # per_page: soa rpp + reserve release rpp
-        per_page = soa_rpp + reserve_release_rpp
+        lane_kwargs = {
+            "page": page,
+            "rpp": rpp,
+            "ordering": ordering,
+            "search": search,
+            "start_date": start_date,
+            "end_date": end_date,
+            "control_account": control_account,
+            "stage": stage,
+            "dashboard": dashboard,
+            "user_role": user_role,
+            "business_control_accounts": business_control_accounts,
+        }
 
-        # merged soa data and reserve release data
-        soa_data.extend(reserve_release_data)
+        ## SOA and Reserve Release Listing ##
+        lanes = [
+            (
+                "soa",
+                SOAListing.get_paginated_soa,
+                dict(lane_kwargs, use_ref=use_ref, high_priority=high_priority),
+            ),
+            (
+                "reserve_release",
+                ReserveReleaseListing.get_paginated_reserve_release,
+                dict(lane_kwargs, use_ref=use_ref, high_priority=high_priority),
+            ),
+        ]
 
-        ## Payee Listing ##
         # for payee(LC-1650): show in principal dashboard(Client's Request)
+        # compliance repository(LC-2083): show in principal dashboard(Client's Request)
         if stage and stage == "client_submission":
-            # payee resource
-            payee_resource = PayeeListing.get_paginated_payees(
-                page=page,
-                rpp=rpp,
-                ordering=ordering,
-                search=search,
-                start_date=start_date,
-                end_date=end_date,
-                control_account=control_account,
-                stage=stage,
-                dashboard=dashboard,
-                client_ids=client_ids,
-                user_role=user_role,
-                business_control_accounts=business_control_accounts,
-            )
-
-            # payee: total count
-            payee_total_count = (
-                int(payee_resource["total_count"])
-                if payee_resource and "total_count" in payee_resource
-                else int(0)
-            )
-
-            # payee: total pages
-            payee_total_pages = (
-                int(payee_resource["total_pages"])
-                if payee_resource and "total_pages" in payee_resource
-                else int(0)
-            )
-
-            # payee: rpp
-            payee_rpp = (
-                int(payee_resource["per_page"])
-                if payee_resource and "per_page" in payee_resource
-                else int(0)
-            )
-            
-            # total count: total count + payee total count
-            total_count = total_count + payee_total_count
-            
-            # total pages: total pages + payee total pages
-            total_pages = (
-                total_pages
-                if total_pages > payee_total_pages
-                else payee_total_pages
-            )
-
-            # per page: per page + payee rpp
-            per_page = per_page + payee_rpp
-
-            # payee: data
-            payee_data = (
-                payee_resource["data"]
-                if payee_resource
-                and "data" in payee_resource
-                and payee_resource["data"]
-                else []
-            )
-
-            # merged payee data
-            soa_data.extend(payee_data)
-
-            ## Compliance Repository Listing ##
-            # LC-2083: show in principal dashboard(Client's Request)
-            cr_resource = ComplianceRepositoryListing.get_paginated(
-                page=page,
-                rpp=rpp,
-                ordering=ordering,
-                search=search,
-                start_date=start_date,
-                end_date=end_date,
-                control_account=control_account,
-                stage=stage,
-                dashboard=dashboard,
-                client_ids=client_ids,
-                user_role=user_role,
-                business_control_accounts=business_control_accounts,
-            )
-
-            # cr: total count
-            cr_total_count = (
-                int(cr_resource["total_count"])
-                if cr_resource and "total_count" in cr_resource
-                else int(0)
-            )
-
-            # cr: total pages
-            cr_total_pages = (
-                int(cr_resource["total_pages"])
-                if cr_resource and "total_pages" in cr_resource
-                else int(0)
-            )
-
-            # cr: rpp
-            cr_rpp = (
-                int(cr_resource["per_page"])
-                if cr_resource and "per_page" in cr_resource
-                else int(0)
-            )
-            
-            # total count: total count + cr total count
-            total_count = total_count + cr_total_count
-            
-            # total pages: total pages + cr total pages
-            total_pages = (
-                total_pages
-                if total_pages > cr_total_pages
-                else cr_total_pages
-            )
-
-            # per page: per page + cr rpp
-            per_page = per_page + cr_rpp
-
-            # cr: data
-            cr_data = (
-                cr_resource["data"]
-                if cr_resource
-                and "data" in cr_resource
-                and cr_resource["data"]
-                else []
+            lanes.append(("payee", PayeeListing.get_paginated_payees, lane_kwargs))
+            lanes.append(
+                (
+                    "compliance_repository",
+                    ComplianceRepositoryListing.get_paginated,
+                    lane_kwargs,
+                )
             )
-            
-            # merged cr data
-            soa_data.extend(cr_data)
 
         ## "Today's Pending Working Items" lane (dashboard) ##
+        # Debtor Limit Approvals(Credit Limit) for LC-1909, Generic Request for LC-2014
         if stage and stage == "pending" and start_date:
-            ## Debtor Limit Approvals(Credit Limit) Listing ##
-            # for LC-1909: show in "Today's Pending Working Items" lane (dashboard)
-            dla_resource = DebtorLimitApprovalsListing.get_paginated(
-                page=page,
-                rpp=rpp,
-                ordering=ordering,
-                search=search,
-                start_date=start_date,
-                end_date=end_date,
-                control_account=control_account,
-                stage=stage,
-                dashboard=dashboard,
-                client_ids=client_ids,
-                user_role=user_role,
-                business_control_accounts=business_control_accounts,
+            lanes.append(
+                ("credit_limit", DebtorLimitApprovalsListing.get_paginated, lane_kwargs)
             )
-
-            # dla: total count
-            dla_total_count = (
-                int(dla_resource["total_count"])
-                if dla_resource and "total_count" in dla_resource
-                else int(0)
+            lanes.append(
+                ("generic_request", GenericRequestListing.get_paginated, lane_kwargs)
             )
 
-            # dla: total pages
-            dla_total_pages = (
-                int(dla_resource["total_pages"])
-                if dla_resource and "total_pages" in dla_resource
+        # lanes are independent: optionally run them concurrently
+        concurrent = is_concurrent_lanes_enabled() or (
+            request.args.get("concurrent", "false").lower() == "true"
+        )
+        lanes_results = run_lanes(lanes, concurrent=concurrent)
+
+        # merge lanes, in lanes order
+        soa_data = []
+        total_count = int(0)
+        total_pages = int(0)
+        per_page = int(0)
+        for _, resource, _ in lanes_results:
+            # lane: total count
+            lane_total_count = (
+                int(resource["total_count"])
+                if resource and "total_count" in resource
                 else int(0)
             )
 
-            # dla: rpp
-            dla_rpp = (
-                int(dla_resource["per_page"])
-                if dla_resource and "per_page" in dla_resource
+            # lane: total pages
+            lane_total_pages = (
+                int(resource["total_pages"])
+                if resource and "total_pages" in resource
                 else int(0)
             )
-            
-            # total count: total count + dla total count
-            total_count = total_count + dla_total_count
-            
-            # total pages: total pages + dla total pages
-            total_pages = (
-                total_pages
-                if total_pages > dla_total_pages
-                else dla_total_pages
-            )
-
-            # per page: per page + dla rpp
-            per_page = per_page + dla_rpp
-
-            # dla: data
-            dla_data = (
-                dla_resource["data"]
-                if dla_resource
-                and "data" in dla_resource
-                and dla_resource["data"]
-                else []
-            )
-
-            # merged dla data
-            soa_data.extend(dla_data)
-
-            ## Generic Request Listing ##
-            # for LC-2014: show in "Today's Pending Working Items" lane (dashboard)
-            gn_resource = GenericRequestListing.get_paginated(
-                page=page,
-                rpp=rpp,
-                ordering=ordering,
-                search=search,
-                start_date=start_date,
-                end_date=end_date,
-                control_account=control_account,
-                stage=stage,
-                dashboard=dashboard,
-                client_ids=client_ids,
-                user_role=user_role,
-                business_control_accounts=business_control_accounts,
-            )
 
-            # gn: total count
-            gn_total_count = (
-                int(gn_resource["total_count"])
-                if gn_resource and "total_count" in gn_resource
+            # lane: rpp
+            lane_rpp = (
+                int(resource["per_page"])
+                if resource and "per_page" in resource
                 else int(0)
             )
 
-            # gn: total pages
-            gn_total_pages = (
-                int(gn_resource["total_pages"])
-                if gn_resource and "total_pages" in gn_resource
-                else int(0)
-            )
+            # total count: sum of lanes total count
+            total_count = total_count + lane_total_count
 
-            # gn: rpp
-            gn_rpp = (
-                int(gn_resource["per_page"])
-                if gn_resource and "per_page" in gn_resource
-                else int(0)
-            )
-            
-            # total count: total count + gn total count
-            total_count = total_count + gn_total_count
-            
-            # total pages: total pages + gn total pages
+            # total pages: max of lanes total pages
             total_pages = (
-                total_pages
-                if total_pages > gn_total_pages
-                else gn_total_pages
+                total_pages if total_pages > lane_total_pages else lane_total_pages
             )
 
-            # per page: per page + gn rpp
-            per_page = per_page + gn_rpp
+            # per page: sum of lanes rpp
+            per_page = per_page + lane_rpp
 
-            # gn: data
-            gn_data = (
-                gn_resource["data"]
-                if gn_resource
-                and "data" in gn_resource
-                and gn_resource["data"]
+            # merged lane data
+            lane_data = (
+                resource["data"]
+                if resource and "data" in resource and resource["data"]
                 else []
             )
-            
-            # merged gn data
-            soa_data.extend(gn_data)
-        
+            soa_data.extend(lane_data)
+
         msg = "Records not found"
 
         # sort list
@@ -560,7 +301,10 @@ def get_dashboard():
             "data": data,  # soa + reserve release
         }
 
-        return custom_response(response_data, 200)
+        response = custom_response(response_data, 200)
+        # per lane timing
+        response.headers["Server-Timing"] = server_timing_header(lanes_results)
+        return response
     except Exception as e:
         print(f"Dashboard Exception: {e}")
         return custom_response({"status": "error", "msg": str(e)}, 404)
@@ -569,24 +313,16 @@ def get_dashboard():
 @Auth.auth_required
 def get_soa_total():
     try:
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         control_account_id = request.args.get("control_account_id", None)
         # control accounts
         business_control_accounts = Permissions.get_business_settings()["control_accounts"]
 
-        # current est date: for comparing with last_processed_at(utc)
-        today = date_concat_time(date_concat="current")
-        next_day = date_concat_time(date_concat="next")
-        
+        # current est day: for comparing with last_processed_at(utc)
         soa = (
             SOA.query.join(Client, ClientControlAccounts, ControlAccount)
             .filter(
-                SOA.is_deleted == False, SOA.client_id.in_(client_ids),
-                cast(SOA.last_processed_at, DateTime) >= today,
-                cast(SOA.last_processed_at, DateTime) <= next_day,
+                SOA.is_deleted == False, Organization.client_filter(SOA.client_id),
+                date_window(SOA.last_processed_at),
                 Client.is_active == True,
                 ControlAccount.name.in_(business_control_accounts),
             )
@@ -600,9 +336,8 @@ def get_soa_total():
             ReserveRelease.query.join(Client, ClientControlAccounts, ControlAccount)
             .filter(
                 ReserveRelease.is_deleted == False,
-                ReserveRelease.client_id.in_(client_ids),
-                cast(ReserveRelease.last_processed_at, DateTime) >= today,
-                cast(ReserveRelease.last_processed_at, DateTime) <= next_day,
+                Organization.client_filter(ReserveRelease.client_id),
+                date_window(ReserveRelease.last_processed_at),
                 Client.is_active == True,
                 ControlAccount.name.in_(business_control_accounts),
             )
@@ -620,152 +355,46 @@ def get_soa_total():
                 ClientControlAccounts.control_account_id == control_account_id
             )
 
-        # ToDo: commented code to be removed
-        # SOA Approvals by BO Count
-        # get_soa_completed = soa.filter(SOA.status == "completed")
-        # soa_completed_total = get_soa_completed.count()
-
-        # # SOA pending Count
-        # soa_pending_total = soa.filter(SOA.status == "pending").count()
-
-        # # SOA action required Count
-        # soa_action_required_total = soa.filter(SOA.status == "action_required").count()
-
-        # # SOA rejected Count
-        # soa_rejected_total = soa.filter(SOA.status == "rejected").count()
-
-        # # SOA reviewed Count
-        # soa_reviewed_total = soa.filter(SOA.status == "reviewed").count()
-
-        # # SOA approved by AE Count
-        # soa_approved_total = soa.filter(SOA.status == "approved").count()
-
-        # SOA current day principal, ae, bo requests submitted total
-        soa_total_submitted = soa.filter(
-            or_(
-                SOA.status == "completed",
-                SOA.status == "pending",
-                SOA.status == "action_required",
-                SOA.status == "rejected",
-                SOA.status == "reviewed",
-                SOA.status == "approved",
-            )
-        ).count()
-        # soa_total_submitted = (
-        #     soa_pending_total
-        #     + soa_action_required_total
-        #     + soa_rejected_total
-        #     + soa_reviewed_total
-        #     + soa_approved_total
-        #     + soa_completed_total
-        # )
-
-        # soa approved by BO
-        get_soa_completed = soa.filter(SOA.status == "completed")
-        all_soa_completed = get_soa_completed.all()
-
-        # soa approved by BO count
-        soa_completed_total = get_soa_completed.count()
-
-        soa_approved_amount = Decimal(0)
-        total_invoice_amount = Decimal(0)
-        if all_soa_completed:
-            for each_soa in all_soa_completed:
-                # total soa disbursement_amount
-                if each_soa.disbursement_amount is not None:
-                    soa_approved_amount += each_soa.disbursement_amount
-
-                # total soa invoice_total
-                if each_soa.invoice_total is not None:
-                    total_invoice_amount += each_soa.invoice_total
-
-            # soa_approved_amount = sum(
-            #     soa_completed.disbursement_amount
-            #     for soa_completed in get_soa_completed
-            #     if soa_completed.disbursement_amount is not None
-            # )
-        # ToDo: commented code to be removed
-        # Soa Invoice Total
-        # get_invoice_total = soa.filter(SOA.status == "completed")
-        # total_invoice_amount = Decimal(0)
-        # if get_invoice_total:
-        #     total_invoice_amount = sum(
-        #         invoice.invoice_total
-        #         for invoice in get_invoice_total
-        #         if invoice.invoice_total is not None
-        #     )
-
-        # # For Reserve Release count
-        # reserve_release_submitted_total = int(0)
-        # rr_completed_total = int(0)
-        total_rr_completed_amount = Decimal(0)
-        # if reserve_release:
-        #     # Reserve Release Approvals by BO Count
-        #     get_rr_completed = reserve_release.filter(
-        #         ReserveRelease.status == "completed"
-        #     )
-        #     rr_completed_total = get_rr_completed.count()
-
-        #     # Reserve Release pending Count
-        #     rr_pending_total = reserve_release.filter(
-        #         ReserveRelease.status == "pending"
-        #     ).count()
-
-        #     # Reserve Release action required Count
-        #     rr_action_required_total = reserve_release.filter(
-        #         ReserveRelease.status == "action_required"
-        #     ).count()
-
-        #     # Reserve Release rejected Count
-        #     rr_rejected_total = reserve_release.filter(
-        #         ReserveRelease.status == "rejected"
-        #     ).count()
-
-        #     # Reserve Release reviewed Count
-        #     rr_reviewed_total = reserve_release.filter(
-        #         ReserveRelease.status == "reviewed"
-        #     ).count()
-
-        #     # Reserve Release approved Count
-        #     rr_approved_total = reserve_release.filter(
-        #         ReserveRelease.status == "approved"
-        #     ).count()
-
-        # Reserve Release: current day requests submitted total by principal, ae, bo 
-        reserve_release_submitted_total = reserve_release.filter(
-            or_(
-                ReserveRelease.status == "completed",
-                ReserveRelease.status == "pending",
-                ReserveRelease.status == "action_required",
-                ReserveRelease.status == "rejected",
-                ReserveRelease.status == "reviewed",
-                ReserveRelease.status == "approved",
-            )
-        ).count()
-            # reserve_release_submitted_total = (
-            #     rr_pending_total
-            #     + rr_action_required_total
-            #     + rr_rejected_total
-            #     + rr_reviewed_total
-            #     + rr_approved_total
-            #     + rr_completed_total
-            # )
-
-        # Reserve Release approved by BO
-        get_rr_completed = reserve_release.filter(
-            ReserveRelease.status == "completed"
-        )
-        all_rr_completed = get_rr_completed.all()
-        # Reserve Release approved by BO count
-        rr_completed_total = get_rr_completed.count()
-        
-        # total reserve release disbursement amount
-        if all_rr_completed:
-            total_rr_completed_amount = sum(
-                rr_completed.disbursement_amount
-                for rr_completed in all_rr_completed
-                if rr_completed.disbursement_amount is not None
-            )
+        # current day principal, ae, bo requests submitted
+        submitted_status = [
+            "completed",
+            "pending",
+            "action_required",
+            "rejected",
+            "reviewed",
+            "approved",
+        ]
+
+        # SOA: submitted total, approved by BO count and amounts in one aggregate query
+        soa_subquery = soa.subquery()
+        soa_completed = soa_subquery.c.status == "completed"
+        (
+            soa_total_submitted,
+            soa_completed_total,
+            soa_approved_amount,
+            total_invoice_amount,
+        ) = db.session.query(
+            func.count(case([(soa_subquery.c.status.in_(submitted_status), 1)])),
+            func.count(case([(soa_completed, 1)])),
+            func.sum(case([(soa_completed, soa_subquery.c.disbursement_amount)])),
+            func.sum(case([(soa_completed, soa_subquery.c.invoice_total)])),
+        ).one()
+        soa_approved_amount = soa_approved_amount or Decimal(0)
+        total_invoice_amount = total_invoice_amount or Decimal(0)
+
+        # Reserve Release: submitted total, approved by BO count and amount in one aggregate query
+        rr_subquery = reserve_release.subquery()
+        rr_completed = rr_subquery.c.status == "completed"
+        (
+            reserve_release_submitted_total,
+            rr_completed_total,
+            total_rr_completed_amount,
+        ) = db.session.query(
+            func.count(case([(rr_subquery.c.status.in_(submitted_status), 1)])),
+            func.count(case([(rr_completed, 1)])),
+            func.sum(case([(rr_completed, rr_subquery.c.disbursement_amount)])),
+        ).one()
+        total_rr_completed_amount = total_rr_completed_amount or Decimal(0)
 
         # Cash Advanced: Total soa and reserve release disbursement amount
         total_approved_advance = soa_approved_amount + total_rr_completed_amount
@@ -790,16 +419,9 @@ def get_soa_total():
 @Auth.auth_required
 def total_soa_amount():
     try:
-        # Organization
-        get_locations = Organization.get_locations()
-        client_id_list = get_locations["client_list"]
-        
         # control accounts
         business_control_accounts = Permissions.get_business_settings()["control_accounts"]
 
-        # current est date: for comparing with last_processed_at(utc)
-        today = date_concat_time(date_concat="current")
-        next_day = date_concat_time(date_concat="next")
 
         control_account_id = request.args.get("control_account_id", None)
 
@@ -807,7 +429,7 @@ def total_soa_amount():
             SOA.query.join(Client, ClientControlAccounts, ControlAccount)
             .filter(
                 SOA.is_deleted == False, 
-                SOA.client_id.in_(client_id_list),
+                Organization.client_filter(SOA.client_id),
                 Client.is_active == True,
                 ControlAccount.name.in_(business_control_accounts),
             )
@@ -823,7 +445,7 @@ def total_soa_amount():
             ReserveRelease.query.join(Client, ClientControlAccounts, ControlAccount)
             .filter(
                 ReserveRelease.is_deleted == False,
-                ReserveRelease.client_id.in_(client_id_list),
+                Organization.client_filter(ReserveRelease.client_id),
                 Client.is_active == True,
                 ControlAccount.name.in_(business_control_accounts),
             )
@@ -841,81 +463,58 @@ def total_soa_amount():
                 ClientControlAccounts.control_account_id == control_account_id
             )
 
-        # get Reserve Release total
-        total_rr_pending_amount = Decimal(0)
-        total_rr_approved_amount = Decimal(0)
-        total_rr_completed_amount = Decimal(0)
-        if reserve_release:
-            # get Reserve Release total_pending_amount
-            get_rr_pending = reserve_release.filter(ReserveRelease.status == "pending")
-            if get_rr_pending:
-                total_rr_pending_amount = sum(
-                    rr_pending.disbursement_amount
-                    for rr_pending in get_rr_pending
-                    if rr_pending.disbursement_amount is not None
-                )
-
-            # get Reserve Release total_approved_amount
-            get_rr_approved = reserve_release.filter(
-                ReserveRelease.status == "approved"
-            )
-            if get_rr_approved:
-                total_rr_approved_amount = sum(
-                    rr_approved.disbursement_amount
-                    for rr_approved in get_rr_approved
-                    if rr_approved.disbursement_amount is not None
-                )
-
-            # get Reserve Release total_completed_amount
-            get_rr_completed = reserve_release.filter(
-                ReserveRelease.status == "completed",
-                cast(ReserveRelease.last_processed_at, DateTime) >= today,
-                cast(ReserveRelease.last_processed_at, DateTime) <= next_day
-            )
-            if get_rr_completed:
-                total_rr_completed_amount = sum(
-                    rr_completed.disbursement_amount
-                    for rr_completed in get_rr_completed
-                    if rr_completed.disbursement_amount is not None
-                )
-
-        # get total_pending_amount
-        get_pending_value = soa.filter(SOA.status == "pending")
-        total_pending_value = Decimal(0)
-        for pending_value in get_pending_value:
-            total_pending_value += (
-                pending_value.disbursement_amount
-                if pending_value.disbursement_amount is not None
-                else Decimal(0)
-            )
-        total_pending_value = total_pending_value + total_rr_pending_amount
-
-        # get total_approved_amount
-        get_approved_value = soa.filter(SOA.status == "approved")
-        total_approved_amount = Decimal(0)
-        for approved_value in get_approved_value:
-            total_approved_amount += (
-                approved_value.disbursement_amount
-                if approved_value.disbursement_amount is not None
-                else Decimal(0)
-            )
-
-        total_approved_amount = total_approved_amount + total_rr_approved_amount
-
-        # get total_completed_amount
-        get_completed_value = soa.filter(SOA.status == "completed").filter(            
-            cast(SOA.last_processed_at, DateTime) >= today,
-            cast(SOA.last_processed_at, DateTime) <= next_day,
+        # completed: current day only
+        def completed_today(subquery):
+            return and_(
+                subquery.c.status == "completed",
+                date_window(subquery.c.last_processed_at),
+            )
+
+        # get Reserve Release total pending, approved and completed amount in one aggregate query
+        rr_subquery = reserve_release.subquery()
+        (
+            total_rr_pending_amount,
+            total_rr_approved_amount,
+            total_rr_completed_amount,
+        ) = db.session.query(
+            func.sum(
+                case([(rr_subquery.c.status == "pending", rr_subquery.c.disbursement_amount)])
+            ),
+            func.sum(
+                case([(rr_subquery.c.status == "approved", rr_subquery.c.disbursement_amount)])
+            ),
+            func.sum(
+                case([(completed_today(rr_subquery), rr_subquery.c.disbursement_amount)])
+            ),
+        ).one()
+
+        # get soa total pending, approved and completed amount in one aggregate query
+        soa_subquery = soa.subquery()
+        (
+            total_pending_value,
+            total_approved_amount,
+            total_completed_amount,
+        ) = db.session.query(
+            func.sum(
+                case([(soa_subquery.c.status == "pending", soa_subquery.c.disbursement_amount)])
+            ),
+            func.sum(
+                case([(soa_subquery.c.status == "approved", soa_subquery.c.disbursement_amount)])
+            ),
+            func.sum(
+                case([(completed_today(soa_subquery), soa_subquery.c.disbursement_amount)])
+            ),
+        ).one()
+
+        total_pending_value = (total_pending_value or Decimal(0)) + (
+            total_rr_pending_amount or Decimal(0)
+        )
+        total_approved_amount = (total_approved_amount or Decimal(0)) + (
+            total_rr_approved_amount or Decimal(0)
+        )
+        total_completed_amount = (total_completed_amount or Decimal(0)) + (
+            total_rr_completed_amount or Decimal(0)
         )
-        total_completed_amount = Decimal(0)
-        for completed_value in get_completed_value:
-            total_completed_amount += (
-                completed_value.disbursement_amount
-                if completed_value.disbursement_amount is not None
-                else Decimal(0)
-            )
-
-        total_completed_amount = total_completed_amount + total_rr_completed_amount
 
         soa_obj.update(
             {
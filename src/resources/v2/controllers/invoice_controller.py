@@ -16,6 +16,7 @@ from src import db
 from src.resources.v2.schemas import InvoiceAEReadOnlySchema, InvoiceSchema, InvoiceDebtorSchema
 from src.middleware.permissions import Permissions
 import hashlib
+import os
 from src.resources.v2.helpers.convert_datetime import current_date
 
 invoice_schema = InvoiceSchema()
@@ -873,9 +874,18 @@ def upload_invoices():
 
         # Get invoice list from cadance db
         validated_invoice_list = validate_invoice(soa.client.ref_key)
+        validated_invoice_numbers = (
+            {
+                invoice_number
+                for invoice_number in validated_invoice_list
+                if isinstance(invoice_number, (str, int, float))
+            }
+            if isinstance(validated_invoice_list, list)
+            else set()
+        )
 
         get_existing_invoice = (
-            Invoice.query.with_entities(Invoice.invoice_number)
+            Invoice.query.with_entities(Invoice.id, Invoice.invoice_number)
             .filter(
                 Invoice.is_deleted == False,
                 Invoice.invoice_number.in_(invoice_number_list),
@@ -883,6 +893,8 @@ def upload_invoices():
             )
             .all()
         )
+        existing_invoice_ids = {item[0] for item in get_existing_invoice}
+        existing_invoice_numbers = {item[1] for item in get_existing_invoice}
 
         # Changed debtor name to ref no in csv (LC-516)
         invoice_debtor_list = [
@@ -899,33 +911,32 @@ def upload_invoices():
             .with_entities(Debtor.id, Debtor.ref_key)
             .all()
         )
+        # debtor id by ref key
+        debtors = {}
+        for debtor_id, debtor_ref_key in get_all_debtor:
+            debtors.setdefault(debtor_ref_key, debtor_id)
 
         seen = set()
+        rows = []
+        row_objs = []
         for row_obj in invoices:
             row = row_obj.copy()
 
             if row["debtorkey"] == "":
                 wrong_debtors.append(row_obj)
                 continue
-            debtor_obj = [
-                item for item in get_all_debtor if item[1] == int(row["debtorkey"])
-            ]
-            if not debtor_obj:
+            debtor_id = debtors.get(int(row["debtorkey"]))
+            if not debtor_id:
                 wrong_debtors.append(row_obj)
                 continue
 
             # check for existing invoice
-            invoice_number_obj = [
-                item
-                for item in get_existing_invoice
-                if item[0] == row["invoice_number"]
-            ]
-            if invoice_number_obj:
+            if row["invoice_number"] in existing_invoice_numbers:
                 data_list_exists.append(row_obj)
                 continue
 
             # check invoice with cadance db
-            if row["invoice_number"] in validated_invoice_list:
+            if row["invoice_number"] in validated_invoice_numbers:
                 data_list_exists.append(row_obj)
                 continue
 
@@ -939,23 +950,60 @@ def upload_invoices():
                 {
                     "client_id": soa.client_id,
                     "soa_id": soa.id,
-                    "debtor": debtor_obj[0][0],
+                    "debtor": debtor_id,
                     "invoice": row["invoice_number"],
                 }
             )
+            rows.append(row)
+            row_objs.append(row_obj)
+
+        # load and insert invoices in chunks
+        chunk_size = int(os.getenv("INVOICE_UPLOAD_CHUNK_SIZE", 1000))
+        for i in range(0, len(rows), chunk_size):
+            rows_chunk = rows[i : i + chunk_size]
+            row_objs_chunk = row_objs[i : i + chunk_size]
+
+            data, errors = invoice_schema.load(rows_chunk, many=True)
+            invoices_chunk = []
+            for index, row_obj in enumerate(row_objs_chunk):
+                if index in errors:
+                    row_obj["error"] = errors[index]
+                    wrong_values.append(row_obj)
+                else:
+                    invoices_chunk.append(Invoice(data[index]))
 
-            data, error = invoice_schema.load(row)
-            if not error:
-                invoice = Invoice(data)
-                data_list_added.append(invoice)
-            else:
-                row_obj["error"] = error
-                wrong_values.append(row_obj)
+            if not invoices_chunk:
+                continue
 
-        db.session.add_all(data_list_added)
-        db.session.commit()
+            # executemany insert
+            db.session.bulk_save_objects(invoices_chunk)
 
-        data_list_added = invoice_schema.dump(data_list_added, many=True).data
+            # get inserted invoices, for response
+            invoice_numbers_chunk = {
+                invoice.invoice_number for invoice in invoices_chunk
+            }
+            get_added_invoices = (
+                Invoice.query.filter(
+                    Invoice.is_deleted == False,
+                    Invoice.soa_id == soa.id,
+                    Invoice.invoice_number.in_(invoice_numbers_chunk),
+                )
+                .order_by(Invoice.id.asc())
+                .all()
+            )
+            data_list_added.extend(
+                invoice_schema.dump(
+                    [
+                        invoice
+                        for invoice in get_added_invoices
+                        if invoice.id not in existing_invoice_ids
+                        and invoice.invoice_number in invoice_numbers_chunk
+                    ],
+                    many=True,
+                ).data
+            )
+
+        db.session.commit()
 
         [
             (
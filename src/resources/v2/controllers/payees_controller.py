@@ -149,16 +149,20 @@ def get_all():
     try:
         page = request.args.get("page", 0, type=int)
         rpp = request.args.get("rpp", 20, type=int)
+        cursor = request.args.get("cursor", None, type=str)
+        total = request.args.get("total", None, type=str)
         search = request.args.get("search", None, type=str)
         ordering = request.args.get("ordering", None, type=str)
         stage = request.args.get("stage", None, type=str)
         control_account = request.args.get("control_account", None, type=int)
         active = request.args.get("active", None, type=str)
 
-        if page > 0:
+        if page > 0 or cursor is not None:
             data = PayeeListing.get_paginated_payees(
                 page=page,
                 rpp=rpp,
+                cursor=cursor,
+                total=total,
                 search=search,
                 ordering=ordering,
                 stage=stage,
@@ -0,0 +1,35 @@
+import os
+from src.middleware.authentication import Auth
+from src.middleware.profiling import route_stats, is_profiling_enabled
+from src.http_client import http_clients_stats
+from src.resources.v2.helpers import custom_response
+
+
+@Auth.auth_required
+def get_all():
+    """
+    Get profiling stats per route of this process
+    """
+    try:
+        data = {
+            "enabled": is_profiling_enabled(),
+            "sample_rate": float(os.getenv("PROFILING_SAMPLE_RATE", 0.1)),
+            "pid": os.getpid(),
+            "routes": route_stats.snapshot(),
+            "upstreams": http_clients_stats(),
+        }
+        return custom_response(data, 200)
+    except Exception as e:
+        return custom_response({"status": "error", "msg": str(e)}, 404)
+
+
+@Auth.auth_required
+def reset():
+    """
+    Reset profiling stats of this process
+    """
+    try:
+        route_stats.reset()
+        return custom_response({"status": "success", "msg": "profiling stats reset"}, 200)
+    except Exception as e:
+        return custom_response({"status": "error", "msg": str(e)}, 404)
@@ -2,17 +2,19 @@ from flask import request, json
 from src.models import *
 from datetime import datetime
 from decimal import Decimal
-import os
 from src.middleware.authentication import Auth
 from src.middleware.permissions import Permissions
 from src.resources.v2.helpers import (
-    SendMails,
     custom_response,
     PermissionExceptions,
     ReserveReleasePDF,
     generate_reserve_release_lcra_csv,
     ReserveReleaseDetails,
     principal_settings,
+    is_background_jobs_enabled,
+    enqueue_request_jobs,
+    request_status_mails,
+    send_request_mails,
 )
 from src import db
 from src.resources.v2.schemas import *
@@ -118,6 +120,8 @@ def get_all():
     try:
         page = request.args.get("page", 0, type=int)
         rpp = request.args.get("rpp", 20, type=int)
+        cursor = request.args.get("cursor", None, type=str)
+        total = request.args.get("total", None, type=str)
         ordering = request.args.get("ordering", None, type=str)
         search = request.args.get("search", None, type=str)
         start_date = request.args.get("start_date", None, type=str)
@@ -141,10 +145,12 @@ def get_all():
                 400,
             )
 
-        if page > 0:
+        if page > 0 or cursor is not None:
             data = ReserveReleaseListing.get_paginated_reserve_release(
                 page=page,
                 rpp=rpp,
+                cursor=cursor,
+                total=total,
                 ordering=ordering,
                 search=search,
                 start_date=start_date,
@@ -200,6 +206,8 @@ def update(reserve_release_id):
         request_advance_amount = request_data.get("advance_amount", Decimal(0))
         status_to_be_updated = request_data.get("status", None)
         business_settings = {}
+        # LCRA export, payment process and mails run in the background jobs worker
+        background_jobs_enabled = is_background_jobs_enabled()
 
         reserve_release = ReserveRelease.get_one_based_off_control_accounts(reserve_release_id)
         if not reserve_release:
@@ -459,6 +467,31 @@ def update(reserve_release_id):
             if "status" in request_data:
                 data["last_processed_at"] = datetime.utcnow()
 
+            # jobs are committed in the same transaction as the reserve release update
+            if background_jobs_enabled:
+                reserve_release_status_list = [
+                    status.value for status in ReserveReleaseStatus
+                ]
+                request_status = (
+                    request_data["status"]
+                    if "status" in request_data
+                    and request_data["status"] in reserve_release_status_list
+                    else None
+                )
+                enqueue_request_jobs(
+                    request_type=reserve_release,
+                    ref_type="reserve_release",
+                    request_status=request_status,
+                    mails=request_status_mails(
+                        request_status,
+                        had_client_submitted=(
+                            request_status == "pending"
+                            and reserve_release.had_client_submitted()
+                        ),
+                    ),
+                    approvals_history_key=approvals_history_data.get("key"),
+                )
+
             reserve_release.update(data)
 
             # to be saved in approval history
@@ -571,113 +604,30 @@ def update(reserve_release_id):
             approvals_history = ApprovalsHistory(approvals_history_data)
             approvals_history.save()
 
-        if data["status"] == "completed":
-            # Auto generate the LCRA export file and upload to LCRA system after BO has approved(LC-1044)
-            generate_reserve_release_lcra_csv(reserve_release_id=reserve_release_id)
-            # Auto money transfer after the BO has clicked “Set Up” checkboxes and approved the request.(LC-1668)
-            reserve_release.rr_payment_process()
-
-        # Get organization ids
-        organization_client_account = OrganizationClientAccount.query.filter_by(
-            lcra_client_account_id=reserve_release.client.lcra_client_accounts_id
-        ).first()
-
-        organization_id = None
-        if organization_client_account:
-            organization_id = organization_client_account.organization_id
-
-        request_type = reserve_release
-        # reserve release status
-        reserve_release_status_list = [status.value for status in ReserveReleaseStatus]
-        request_status = (
-            request_data["status"]
-            if "status" in request_data
-            and request_data["status"] in reserve_release_status_list
-            else None
-        )
-
-        # get client_id
-        client_id = request_type.client_id
-
-        if request_status == "pending":
-            # Mail to AE
-            template_name = os.environ.get(
-                "REQUEST_SUBMITTED_TO_ACCOUNT_EXECUTIVE_MAIL"
-            )
-            recipient_role_name = "AE"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
+        if not background_jobs_enabled:
+            if data["status"] == "completed":
+                # Auto generate the LCRA export file and upload to LCRA system after BO has approved(LC-1044)
+                generate_reserve_release_lcra_csv(reserve_release_id=reserve_release_id)
+                # Auto money transfer after the BO has clicked “Set Up” checkboxes and approved the request.(LC-1668)
+                reserve_release.rr_payment_process()
+
+            # reserve release status
+            reserve_release_status_list = [status.value for status in ReserveReleaseStatus]
+            request_status = (
+                request_data["status"]
+                if "status" in request_data
+                and request_data["status"] in reserve_release_status_list
+                else None
             )
-            send_mails.send_mail_request_notifications()
 
-            if reserve_release.had_client_submitted():
-                # Mail to Client
-                template_name = os.environ.get(
-                    "CLIENT_REQUEST_APPROVED_BY_PRINCIPAL_MAIL"
-                )
-                recipient_role_name = "Client"
-                send_mails = SendMails(
-                    request_type=request_type,
-                    client_id=client_id,
-                    recipient_role_name=recipient_role_name,
-                    template_name=template_name,
-                    organization_access=organization_id,
-                )
-                send_mails.send_mail_request_notifications()
-
-        if request_status == "approved":
-            # Mail to Principal
-            template_name = os.environ.get("REQUEST_APPROVED_TO_PRINCIPAL_MAIL")
-            recipient_role_name = "Principal"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
-            )
-            send_mails.send_mail_request_notifications()
-
-            # Mail to BO
-            template_name = os.environ.get("REQUEST_APPROVED_TO_BO_MAIL")
-            recipient_role_name = "BO"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
-            )
-            send_mails.send_mail_request_notifications()
-
-        if request_status == "completed":
-            # Mail to Principal
-            template_name = os.environ.get("REQUEST_PROCESSED_TO_PRINCIPAL_MAIL")
-            recipient_role_name = "Principal"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
-            )
-            send_mails.send_mail_request_notifications()
-
-            # Mail to AE
-            template_name = os.environ.get("REQUEST_PROCESSED_TO_AE_MAIL")
-            recipient_role_name = "AE"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
+            mails = request_status_mails(
+                request_status,
+                had_client_submitted=(
+                    request_status == "pending"
+                    and reserve_release.had_client_submitted()
+                ),
             )
-            send_mails.send_mail_request_notifications()
+            send_request_mails(request_type=reserve_release, mails=mails)
 
         # get fee to client
         data.update(
@@ -1,18 +1,21 @@
 from flask import request, json
 from src.models import *
 from datetime import datetime
-import os
 from decimal import Decimal
 from src.middleware.authentication import Auth
 from src.middleware.permissions import Permissions
 from src.resources.v2.helpers import (
-    SendMails,
     custom_response,
     PermissionExceptions,
     SOAPDF,
     generate_soa_lcra_csv,
     SOADetails,
     principal_settings,
+    is_background_jobs_enabled,
+    enqueue_request_jobs,
+    request_status_mails,
+    send_request_mails,
+    tagged_mails,
 )
 from src import db
 from src.resources.v2.schemas import *
@@ -109,6 +112,8 @@ def get_all():
         use_ref = False
         page = request.args.get("page", 0, type=int)
         rpp = request.args.get("rpp", 20, type=int)
+        cursor = request.args.get("cursor", None, type=str)
+        total = request.args.get("total", None, type=str)
         ordering = request.args.get("ordering", None, type=str)
         if request.path == "/requests":
             use_ref = True
@@ -131,10 +136,12 @@ def get_all():
                 400,
             )
 
-        if page > 0:
+        if page > 0 or cursor is not None:
             data = SOAListing.get_paginated_soa(
                 page=page,
                 rpp=rpp,
+                cursor=cursor,
+                total=total,
                 ordering=ordering,
                 search=search,
                 start_date=start_date,
@@ -192,6 +199,8 @@ def update(soa_id):
 
         client_settings = {}
         business_settings = {}
+        # LCRA export, payment process and mails run in the background jobs worker
+        background_jobs_enabled = is_background_jobs_enabled()
 
         soa = SOA.get_one_based_off_control_accounts(soa_id)
         if not soa:
@@ -630,6 +639,28 @@ def update(soa_id):
             if "status" in req_data:
                 data["last_processed_at"] = datetime.utcnow()
 
+            # jobs are committed in the same transaction as the soa update
+            if background_jobs_enabled:
+                soa_status_list = [status.value for status in SOAStatus]
+                request_status = (
+                    req_data["status"]
+                    if "status" in req_data and req_data["status"] in soa_status_list
+                    else None
+                )
+                enqueue_request_jobs(
+                    request_type=soa,
+                    ref_type="soa",
+                    request_status=request_status,
+                    mails=request_status_mails(
+                        request_status,
+                        had_client_submitted=(
+                            request_status == "pending" and soa.had_client_submitted()
+                        ),
+                    )
+                    + tagged_mails(notify_to_tagged),
+                    approvals_history_key=approvals_history_data.get("key"),
+                )
+
             soa.update(data)
 
             # to be saved in approval history
@@ -643,8 +674,6 @@ def update(soa_id):
         else:
             soa = SOA.query.filter_by(is_deleted=False, id=soa_id).first()
 
-        request_type = ""
-        request_id = ""
         data = soa_schema.dump(soa).data
 
         # checking, if user has role 'AE' then add in approvals history
@@ -743,126 +772,37 @@ def update(soa_id):
             approvals_history = ApprovalsHistory(approvals_history_data)
             approvals_history.save()
 
-        if data["status"] == "completed":
-            # Auto generate the LCRA export file and upload to LCRA system after BO has approved(LC-1044)
-            generate_soa_lcra_csv(soa_id=soa_id)
-            # Auto money transfer after the BO has clicked “Set Up” checkboxes and approved the request.(LC-1668)
-            soa.soa_payment_process()
-
-        request_type = soa
-        # request status
-        soa_status_list = [status.value for status in SOAStatus]
-        request_status = (
-            req_data["status"]
-            if "status" in req_data and req_data["status"] in soa_status_list
-            else None
-        )
-
-        # Get organization ids
-        organization_client_account = OrganizationClientAccount.query.filter_by(
-            lcra_client_account_id=soa.client.lcra_client_accounts_id
-        ).first()
-
-        organization_id = None
-        if organization_client_account:
-            organization_id = organization_client_account.organization_id
-
-        # get client_id
-        client_id = request_type.client_id
-
-        if request_status == "pending":
-            # Mail to AE
-            template_name = os.environ.get(
-                "REQUEST_SUBMITTED_TO_ACCOUNT_EXECUTIVE_MAIL"
-            )
-            recipient_role_name = "AE"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
-            )
-            send_mails.send_mail_request_notifications()
-
-            if soa.had_client_submitted():
-                # Mail to Client
-                template_name = os.environ.get(
-                    "CLIENT_REQUEST_APPROVED_BY_PRINCIPAL_MAIL"
-                )
-                recipient_role_name = "Client"
-                send_mails = SendMails(
-                    request_type=request_type,
-                    client_id=client_id,
-                    recipient_role_name=recipient_role_name,
-                    template_name=template_name,
-                    organization_access=organization_id,
+        if background_jobs_enabled:
+            # only tagged users to notify, soa was not updated
+            if not req_data and notify_to_tagged:
+                enqueue_request_jobs(
+                    request_type=soa, ref_type="soa", mails=tagged_mails(notify_to_tagged)
                 )
-                send_mails.send_mail_request_notifications()
-
-        if request_status == "approved":
-            # Mail to Principal
-            template_name = os.environ.get("REQUEST_APPROVED_TO_PRINCIPAL_MAIL")
-            recipient_role_name = "Principal"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
-            )
-            send_mails.send_mail_request_notifications()
-
-            # Mail to BO
-            template_name = os.environ.get("REQUEST_APPROVED_TO_BO_MAIL")
-            recipient_role_name = "BO"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
-            )
-            send_mails.send_mail_request_notifications()
-
-        if request_status == "completed":
-            # Mail to Principal
-            template_name = os.environ.get("REQUEST_PROCESSED_TO_PRINCIPAL_MAIL")
-            recipient_role_name = "Principal"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
-            )
-            send_mails.send_mail_request_notifications()
-
-            # Mail to AE
-            template_name = os.environ.get("REQUEST_PROCESSED_TO_AE_MAIL")
-            recipient_role_name = "AE"
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                recipient_role_name=recipient_role_name,
-                template_name=template_name,
-                organization_access=organization_id,
+                db.session.commit()
+        else:
+            if data["status"] == "completed":
+                # Auto generate the LCRA export file and upload to LCRA system after BO has approved(LC-1044)
+                generate_soa_lcra_csv(soa_id=soa_id)
+                # Auto money transfer after the BO has clicked “Set Up” checkboxes and approved the request.(LC-1668)
+                soa.soa_payment_process()
+
+            # request status
+            soa_status_list = [status.value for status in SOAStatus]
+            request_status = (
+                req_data["status"]
+                if "status" in req_data and req_data["status"] in soa_status_list
+                else None
             )
-            send_mails.send_mail_request_notifications()
 
-        if notify_to_tagged:
-            # Mail to users tagged on notes
-            user_emails = notify_to_tagged
-            request_type = soa
-            template_name = os.environ.get("USER_TAGGED_MAIL")
-            send_mails = SendMails(
-                request_type=request_type,
-                client_id=client_id,
-                user_emails=user_emails,
-                template_name=template_name,
-                organization_access=organization_id,
+            mails = request_status_mails(
+                request_status,
+                had_client_submitted=(
+                    request_status == "pending" and soa.had_client_submitted()
+                ),
             )
-            send_mails.send_mail_to_tagged()
+            # Mail to users tagged on notes
+            mails += tagged_mails(notify_to_tagged)
+            send_request_mails(request_type=soa, mails=mails)
 
         # get fee to client
         data.update(
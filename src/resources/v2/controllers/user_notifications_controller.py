@@ -41,12 +41,19 @@ def get_all():
 
         page = request.args.get("page", 0, type=int)
         rpp = request.args.get("rpp", 20, type=int)
+        cursor = request.args.get("cursor", None, type=str)
+        total = request.args.get("total", None, type=str)
         user_uuid = user["user_uuid"] if "user_uuid" in user else None
         is_read = request.args.get("is_read", None, type=str)
 
-        if page > 0:
+        if page > 0 or cursor is not None:
             data = UserNotificationsListing.get_paginated_user_notifications(
-                page=page, rpp=rpp, user_uuid=user_uuid, is_read=is_read
+                page=page,
+                rpp=rpp,
+                cursor=cursor,
+                total=total,
+                user_uuid=user_uuid,
+                is_read=is_read,
             )
         else:
             data = UserNotificationsListing.get_all(user_uuid=user_uuid)
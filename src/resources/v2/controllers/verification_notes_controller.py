@@ -112,6 +112,8 @@ def get_all():
     """
     page = request.args.get("page", 0, type=int)
     rpp = request.args.get("rpp", 20, type=int)
+    cursor = request.args.get("cursor", None, type=str)
+    total = request.args.get("total", None, type=str)
     search = request.args.get("search", None, type=str)
     ordering = request.args.get("ordering", None, type=str)
     start_date = request.args.get("start_date", None, type=str)
@@ -131,10 +133,12 @@ def get_all():
             400,
         )
 
-    if page > 0:
+    if page > 0 or cursor is not None:
         data = VerificationNotesListing.get_paginated(
             page=page,
             rpp=rpp,
+            cursor=cursor,
+            total=total,
             search=search,
             start_date=start_date,
             end_date=end_date,
@@ -7,7 +7,8 @@ from .mails import (
 )
 from .resources import (
     get_presigned_url, 
-    generate_pdf
+    generate_pdf,
+    generate_cached_pdf,
 )
 from .permission_exceptions import PermissionExceptions
 from .bankers_rounding import bankers_rounding
@@ -30,4 +31,12 @@ from .generate_rr_lcra_csv import generate_reserve_release_lcra_csv
 from .reserve_release_details import ReserveReleaseDetails
 from .soa_details import SOADetails
 from .payment_services import PaymentServices
-from .helper import principal_settings
\ No newline at end of file
+from .helper import principal_settings
+from .background_jobs import (
+    BackgroundJobsWorker,
+    enqueue_request_jobs,
+    is_background_jobs_enabled,
+    request_status_mails,
+    send_request_mails,
+    tagged_mails,
+)
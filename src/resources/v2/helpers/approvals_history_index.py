@@ -0,0 +1,212 @@
+import threading
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, defer
+
+# request type -> (history model name, request id column)
+APPROVALS_HISTORY_MODELS = {
+    "soa": ("ApprovalsHistory", "soa_id"),
+    "reserve_release": ("ApprovalsHistory", "reserve_release_id"),
+    "payee": ("ApprovalsHistory", "payee_id"),
+    "debtor_limit_approvals": (
+        "DebtorLimitApprovalsHistory",
+        "debtor_limit_approvals_id",
+    ),
+    "generic_request": ("GenericRequestApprovalsHistory", "generic_request_id"),
+    "compliance_repository": (
+        "ComplianceRepositoryApprovalsHistory",
+        "compliance_repository_id",
+    ),
+}
+
+# request ids per prefetch query
+PREFETCH_CHUNK_SIZE = 500
+
+
+class ApprovalsHistoryIndex:
+    """
+    Approvals history rows of one request type, loaded with one query for
+    one or many request ids and grouped by request id and key (id order).
+    Answers the had_*/request_*_by_* model helpers from memory.
+    """
+
+    def __init__(self, request_type):
+        import src.models
+
+        model_name, request_id_column = APPROVALS_HISTORY_MODELS[request_type]
+        self.request_type = request_type
+        self.model = getattr(src.models, model_name)
+        self.request_id_column = getattr(self.model, request_id_column)
+        # request id -> key -> rows
+        self._rows = {}
+
+    def _deferred_attribute(self):
+        # the helpers read user/key/created_at, not the json attribute(the
+        # request's snapshot), which loads on access. ApprovalsHistory maps the
+        # column to stored_attribute, attribute is a hybrid over it
+        if hasattr(self.model, "stored_attribute"):
+            return defer(self.model.stored_attribute)
+        return defer(self.model.attribute)
+
+    def _not_deleted(self):
+        # ApprovalsHistory soft deletes with is_deleted, the others with deleted_at
+        if hasattr(self.model, "is_deleted"):
+            return self.model.is_deleted == False
+        return self.model.deleted_at == None
+
+    def prefetch(self, request_ids):
+        """[Load history rows of request ids not loaded yet]
+
+        Args:
+            request_ids (iterable): request ids
+        """
+        missing = list({
+            request_id
+            for request_id in request_ids
+            if request_id is not None and request_id not in self._rows
+        })
+
+        for i in range(0, len(missing), PREFETCH_CHUNK_SIZE):
+            chunk = missing[i : i + PREFETCH_CHUNK_SIZE]
+            for request_id in chunk:
+                self._rows[request_id] = {}
+
+            approvals_history = (
+                self.model.query.options(self._deferred_attribute())
+                .filter(self.request_id_column.in_(chunk), self._not_deleted())
+                .order_by(self.model.id.asc())
+                .all()
+            )
+            for each_history in approvals_history:
+                request_id = getattr(each_history, self.request_id_column.key)
+                self._rows.setdefault(request_id, {}).setdefault(
+                    each_history.key, []
+                ).append(each_history)
+
+    def rows(self, request_id, key):
+        self.prefetch([request_id])
+        return self._rows.get(request_id, {}).get(key, [])
+
+    def first(self, request_id, key):
+        rows = self.rows(request_id, key)
+        return rows[0] if rows else None
+
+    def last(self, request_id, key):
+        rows = self.rows(request_id, key)
+        return rows[-1] if rows else None
+
+    def count(self, request_id, key):
+        return len(self.rows(request_id, key))
+
+    def has(self, request_id, key):
+        return bool(self.rows(request_id, key))
+
+    def invalidate(self, request_id=None):
+        """[Drop loaded rows]
+
+        Args:
+            request_id (int, optional): drop only rows of this request. Defaults to None(drop all).
+        """
+        if request_id is None:
+            self._rows = {}
+        else:
+            self._rows.pop(request_id, None)
+
+
+def approvals_history_index(request_type):
+    """[Approvals history index of request type, kept for the current request]
+
+    Outside a request (cli, workers) a new index is returned on each call.
+
+    Args:
+        request_type (str): key of APPROVALS_HISTORY_MODELS, e.g. soa
+
+    Returns:
+        ApprovalsHistoryIndex
+    """
+    if not has_request_context():
+        return ApprovalsHistoryIndex(request_type)
+
+    register_approvals_history_invalidation()
+    indexes = g.setdefault("_approvals_history_index", {})
+    index = indexes.get(request_type)
+    if not index:
+        index = ApprovalsHistoryIndex(request_type)
+        indexes[request_type] = index
+    return index
+
+
+def invalidate_approvals_history_index(model=None, target=None):
+    """[Drop loaded approvals history of the current request]
+
+    Args:
+        model (Model, optional): history model, Defaults to None(all).
+        target (Model, optional): saved history row, drop only its request. Defaults to None.
+    """
+    if not has_request_context():
+        return
+
+    indexes = g.get("_approvals_history_index")
+    if not indexes:
+        return
+
+    for index in indexes.values():
+        if model is not None and index.model is not model:
+            continue
+        if target is None:
+            index.invalidate()
+            continue
+        request_id = getattr(target, index.request_id_column.key)
+        if request_id is not None:
+            index.invalidate(request_id)
+
+
+def on_approvals_history_changed(mapper, connection, target):
+    invalidate_approvals_history_index(model=mapper.class_, target=target)
+
+
+def on_attach(session, instance):
+    # new rows are visible to queries (autoflush) as soon as they are added
+    if type(instance) in _approvals_history_models:
+        invalidate_approvals_history_index(model=type(instance), target=instance)
+
+
+def on_approvals_history_bulk_changed(update_context):
+    # query(...).update()/delete(), rows are not known
+    invalidate_approvals_history_index(model=update_context.mapper.class_)
+
+
+def on_rollback(session, previous_transaction):
+    invalidate_approvals_history_index()
+
+
+_invalidation_registered = False
+_invalidation_lock = threading.Lock()
+_approvals_history_models = set()
+
+
+def register_approvals_history_invalidation():
+    global _invalidation_registered
+
+    if _invalidation_registered:
+        return
+
+    with _invalidation_lock:
+        if _invalidation_registered:
+            return
+
+        import src.models
+
+        model_names = {
+            model_name for model_name, _ in APPROVALS_HISTORY_MODELS.values()
+        }
+        for model_name in model_names:
+            model = getattr(src.models, model_name)
+            _approvals_history_models.add(model)
+            for event_name in ["after_insert", "after_update", "after_delete"]:
+                event.listen(model, event_name, on_approvals_history_changed)
+        event.listen(Session, "after_attach", on_attach)
+        event.listen(Session, "after_bulk_update", on_approvals_history_bulk_changed)
+        event.listen(Session, "after_bulk_delete", on_approvals_history_bulk_changed)
+        event.listen(Session, "after_soft_rollback", on_rollback)
+        _invalidation_registered = True
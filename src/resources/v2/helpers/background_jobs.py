@@ -0,0 +1,444 @@
+import os
+import time
+import uuid
+import socket
+from datetime import datetime, timedelta
+from flask import g, request, has_request_context, current_app
+from src import db
+from src.models import (
+    BackgroundJob,
+    BackgroundJobType,
+    BackgroundJobStatus,
+    ApprovalsHistory,
+    OrganizationClientAccount,
+    LCRAExport,
+    SOA,
+    ReserveRelease,
+)
+from src.resources.v2.helpers.mails import SendMails
+from src.resources.v2.helpers.generate_soa_lcra_csv import generate_soa_lcra_csv
+from src.resources.v2.helpers.generate_rr_lcra_csv import (
+    generate_reserve_release_lcra_csv,
+)
+
+
+class BackgroundJobNotReady(Exception):
+    """
+    Raised by a job handler when the job has to wait, does not count as an attempt
+    """
+
+
+class BackgroundJobNotRetryable(Exception):
+    """
+    Raised by a job handler when running the job again is not safe, fails the job
+    """
+
+
+def is_background_jobs_enabled():
+    return os.getenv("BACKGROUND_JOBS_ENABLED", "false").lower() == "true"
+
+
+def request_status_mails(request_status, had_client_submitted=False):
+    """[Mails sent on soa/reserve release status update]
+
+    Args:
+        request_status (str): updated request status
+        had_client_submitted (bool, optional): request was submitted by client. Defaults to False.
+
+    Returns:
+        list: {"recipient_role_name", "template_name"}
+    """
+    mails = []
+    if request_status == "pending":
+        # Mail to AE
+        mails.append(
+            {
+                "recipient_role_name": "AE",
+                "template_name": os.environ.get(
+                    "REQUEST_SUBMITTED_TO_ACCOUNT_EXECUTIVE_MAIL"
+                ),
+            }
+        )
+        if had_client_submitted:
+            # Mail to Client
+            mails.append(
+                {
+                    "recipient_role_name": "Client",
+                    "template_name": os.environ.get(
+                        "CLIENT_REQUEST_APPROVED_BY_PRINCIPAL_MAIL"
+                    ),
+                }
+            )
+
+    if request_status == "approved":
+        # Mail to Principal
+        mails.append(
+            {
+                "recipient_role_name": "Principal",
+                "template_name": os.environ.get("REQUEST_APPROVED_TO_PRINCIPAL_MAIL"),
+            }
+        )
+        # Mail to BO
+        mails.append(
+            {
+                "recipient_role_name": "BO",
+                "template_name": os.environ.get("REQUEST_APPROVED_TO_BO_MAIL"),
+            }
+        )
+
+    if request_status == "completed":
+        # Mail to Principal
+        mails.append(
+            {
+                "recipient_role_name": "Principal",
+                "template_name": os.environ.get("REQUEST_PROCESSED_TO_PRINCIPAL_MAIL"),
+            }
+        )
+        # Mail to AE
+        mails.append(
+            {
+                "recipient_role_name": "AE",
+                "template_name": os.environ.get("REQUEST_PROCESSED_TO_AE_MAIL"),
+            }
+        )
+    return mails
+
+
+def tagged_mails(user_emails):
+    """
+    Mail to users tagged on notes
+    """
+    if not user_emails:
+        return []
+    return [
+        {"user_emails": user_emails, "template_name": os.environ.get("USER_TAGGED_MAIL")}
+    ]
+
+
+def send_request_mails(request_type, mails, request_status=None):
+    """[Send mails built by request_status_mails/tagged_mails]
+
+    Args:
+        request_type (SOA/ReserveRelease)
+        mails (list): mails to be sent
+        request_status (str, optional): status the mails are about. Defaults to None(current status).
+    """
+    if not mails:
+        return
+
+    # Get organization ids
+    organization_client_account = OrganizationClientAccount.query.filter_by(
+        lcra_client_account_id=request_type.client.lcra_client_accounts_id
+    ).first()
+
+    organization_id = None
+    if organization_client_account:
+        organization_id = organization_client_account.organization_id
+
+    for mail in mails:
+        if mail.get("user_emails"):
+            send_mails = SendMails(
+                request_type=request_type,
+                client_id=request_type.client_id,
+                user_emails=mail["user_emails"],
+                template_name=mail["template_name"],
+                organization_access=organization_id,
+                request_status=request_status,
+            )
+            send_mails.send_mail_to_tagged()
+        else:
+            send_mails = SendMails(
+                request_type=request_type,
+                client_id=request_type.client_id,
+                recipient_role_name=mail["recipient_role_name"],
+                template_name=mail["template_name"],
+                organization_access=organization_id,
+                request_status=request_status,
+            )
+            send_mails.send_mail_request_notifications()
+
+
+def job_user():
+    """[Logged user the jobs run on behalf of, resolved at enqueue time]
+
+    The worker calls the auth api with BACKGROUND_JOBS_AUTH_TOKEN (service
+    credential), permissions/mails/lcra export read the user from here
+    instead of the user's auth token, which is never stored.
+    """
+    if not has_request_context():
+        return {}
+
+    from src.middleware.permissions import Permissions
+
+    user_details = Permissions.get_user_details()
+    user_role_permissions = Permissions.get_user_role_permissions()
+    return {
+        "user_details": user_details if isinstance(user_details, dict) else {},
+        "user_role_permissions": (
+            user_role_permissions if isinstance(user_role_permissions, dict) else {}
+        ),
+    }
+
+
+def enqueue_request_jobs(
+    request_type,
+    ref_type,
+    request_status=None,
+    mails=None,
+    approvals_history_key=None,
+):
+    """[Enqueue side effects of a soa/reserve release update]
+
+    Jobs are only added to the session, so they are committed in the same
+    transaction as the status update that follows.
+
+    Args:
+        request_type (SOA/ReserveRelease)
+        ref_type (str): soa/reserve_release
+        request_status (str, optional): updated request status. Defaults to None.
+        mails (list, optional): built by request_status_mails/tagged_mails. Defaults to None.
+        approvals_history_key (str, optional): jobs wait for this approvals history of the update. Defaults to None.
+
+    Returns:
+        list: enqueued BackgroundJob
+    """
+    ref_id = request_type.id
+    payload = {
+        "user": job_user(),
+        "request_status": request_status,
+        "approvals_history_key": approvals_history_key,
+    }
+    max_attempts = int(os.getenv("BACKGROUND_JOBS_MAX_ATTEMPTS", 5))
+
+    background_jobs = []
+    if request_status == "completed":
+        # a request is completed once, so these keys are unique per request
+        background_jobs.append(
+            BackgroundJob.enqueue(
+                job_type=BackgroundJobType.lcra_export.value,
+                ref_type=ref_type,
+                ref_id=ref_id,
+                idempotency_key=f"{ref_type}:{ref_id}:lcra_export",
+                payload=payload,
+                max_attempts=max_attempts,
+                client_id=request_type.client_id,
+            )
+        )
+        # payments are not retried unless BACKGROUND_JOBS_PAYMENT_MAX_ATTEMPTS > 1,
+        # a failed job is retried by hand after checking the transaction status
+        background_jobs.append(
+            BackgroundJob.enqueue(
+                job_type=BackgroundJobType.payment_process.value,
+                ref_type=ref_type,
+                ref_id=ref_id,
+                idempotency_key=f"{ref_type}:{ref_id}:payment_process",
+                payload=payload,
+                max_attempts=int(os.getenv("BACKGROUND_JOBS_PAYMENT_MAX_ATTEMPTS", 1)),
+                client_id=request_type.client_id,
+            )
+        )
+
+    if mails:
+        # clients can retry an update with the same Idempotency-Key header
+        # without sending the mails twice
+        idempotency_key = None
+        if has_request_context():
+            idempotency_key = request.headers.get("Idempotency-Key")
+        if not idempotency_key:
+            idempotency_key = uuid.uuid4().hex
+
+        background_jobs.append(
+            BackgroundJob.enqueue(
+                job_type=BackgroundJobType.notifications.value,
+                ref_type=ref_type,
+                ref_id=ref_id,
+                idempotency_key=f"{ref_type}:{ref_id}:notifications:{idempotency_key}",
+                payload=dict(payload, mails=mails),
+                max_attempts=max_attempts,
+                client_id=request_type.client_id,
+            )
+        )
+    return background_jobs
+
+
+def get_job_request_type(background_job):
+    if background_job.ref_type == "soa":
+        return SOA.query.filter_by(id=background_job.ref_id, is_deleted=False).first()
+    if background_job.ref_type == "reserve_release":
+        return ReserveRelease.query.filter_by(
+            id=background_job.ref_id, is_deleted=False
+        ).first()
+    return None
+
+
+def wait_for_approvals_history(background_job):
+    """
+    Approvals history of the update is saved after the status update commit
+    """
+    approvals_history_key = (background_job.payload or {}).get("approvals_history_key")
+    if not approvals_history_key:
+        return
+
+    ref_column = getattr(ApprovalsHistory, f"{background_job.ref_type}_id")
+    has_approvals_history = ApprovalsHistory.query.filter(
+        ref_column == background_job.ref_id,
+        ApprovalsHistory.key == approvals_history_key,
+        ApprovalsHistory.is_deleted == False,
+        ApprovalsHistory.created_at >= background_job.created_at,
+    ).count()
+    if not has_approvals_history:
+        raise BackgroundJobNotReady(
+            f"approvals history '{approvals_history_key}' not saved yet"
+        )
+
+
+def run_lcra_export(background_job, request_type):
+    wait_for_approvals_history(background_job)
+
+    # retry after the file was uploaded, e.g. worker crashed before marking the job
+    ref_column = getattr(LCRAExport, f"{background_job.ref_type}_id")
+    is_uploaded = LCRAExport.query.filter(
+        ref_column == background_job.ref_id,
+        LCRAExport.is_uploaded == True,
+        LCRAExport.created_at >= background_job.created_at,
+    ).count()
+    if is_uploaded:
+        return
+
+    if background_job.ref_type == "soa":
+        response = generate_soa_lcra_csv(soa_id=background_job.ref_id)
+    else:
+        response = generate_reserve_release_lcra_csv(
+            reserve_release_id=background_job.ref_id
+        )
+
+    if response.status_code >= 400:
+        raise Exception(f"lcra export: {response.get_data(as_text=True)}")
+
+
+def run_payment_process(background_job, request_type):
+    # the payment may have been sent before the failure, re-running could pay twice
+    if background_job.payment_started_at:
+        raise BackgroundJobNotRetryable(
+            f"payment was already started at {background_job.payment_started_at}, "
+            "check the transaction"
+        )
+    background_job.mark_payment_started()
+
+    if background_job.ref_type == "soa":
+        request_type.soa_payment_process()
+    else:
+        request_type.rr_payment_process()
+
+
+def run_notifications(background_job, request_type):
+    wait_for_approvals_history(background_job)
+
+    payload = background_job.payload or {}
+    send_request_mails(
+        request_type=request_type,
+        mails=payload.get("mails"),
+        request_status=payload.get("request_status"),
+    )
+
+
+job_handlers = {
+    BackgroundJobType.lcra_export.value: run_lcra_export,
+    BackgroundJobType.payment_process.value: run_payment_process,
+    BackgroundJobType.notifications.value: run_notifications,
+}
+
+
+class BackgroundJobsWorker:
+    def __init__(self, app=None, worker_id=None, batch_size=None, poll_interval=None):
+        self.app = app or current_app._get_current_object()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size or int(os.getenv("BACKGROUND_JOBS_BATCH_SIZE", 10))
+        self.poll_interval = poll_interval or int(
+            os.getenv("BACKGROUND_JOBS_POLL_INTERVAL", 5)
+        )
+        # how long a job may wait for its approvals history
+        self.ready_timeout = int(os.getenv("BACKGROUND_JOBS_READY_TIMEOUT", 600))
+
+    def run_job(self, background_job):
+        request_type = get_job_request_type(background_job)
+        if not request_type:
+            raise Exception(
+                f"{background_job.ref_type} - {background_job.ref_id} not found"
+            )
+
+        handler = job_handlers[background_job.job_type.value]
+        # service credential for the auth api, the job's user is read from g
+        headers = {"auth-token": os.getenv("BACKGROUND_JOBS_AUTH_TOKEN", "")}
+        with self.app.test_request_context(headers=headers):
+            g.background_job_user = (background_job.payload or {}).get("user") or {}
+            handler(background_job, request_type)
+
+    def process_job(self, job_id):
+        background_job = BackgroundJob.get_one_background_job(job_id)
+        try:
+            self.run_job(background_job)
+        except BackgroundJobNotReady as e:
+            db.session.rollback()
+            background_job = BackgroundJob.get_one_background_job(job_id)
+            if background_job.created_at + timedelta(
+                seconds=self.ready_timeout
+            ) > datetime.utcnow():
+                background_job.update(
+                    {
+                        "status": BackgroundJobStatus.pending.value,
+                        "attempts": background_job.attempts - 1,
+                        "run_at": datetime.utcnow()
+                        + timedelta(seconds=self.poll_interval),
+                        "locked_by": None,
+                        "locked_at": None,
+                        "last_error": str(e),
+                    }
+                )
+            else:
+                background_job.mark_failed(e)
+            return
+        except BackgroundJobNotRetryable as e:
+            print(f"background job {job_id} failed: {e}")
+            db.session.rollback()
+            BackgroundJob.get_one_background_job(job_id).mark_failed(
+                e, retryable=False
+            )
+            return
+        except Exception as e:
+            print(f"background job {job_id} failed: {e}")
+            db.session.rollback()
+            BackgroundJob.get_one_background_job(job_id).mark_failed(e)
+            return
+
+        BackgroundJob.get_one_background_job(job_id).mark_completed()
+
+    def run_once(self):
+        """[Run one batch of due jobs]
+
+        Returns:
+            int: number of jobs run
+        """
+        BackgroundJob.requeue_stale()
+        job_ids = [
+            background_job.id
+            for background_job in BackgroundJob.claim(
+                worker_id=self.worker_id, limit=self.batch_size
+            )
+        ]
+
+        for job_id in job_ids:
+            # a new app context per job, so flask.g(permissions, organization
+            # clients, approvals history caches) is not shared between jobs
+            with self.app.app_context():
+                self.process_job(job_id)
+        return len(job_ids)
+
+    def run(self, once=False):
+        print(f"<-- background jobs worker {self.worker_id} start -->")
+        while True:
+            processed = self.run_once()
+            if once:
+                return processed
+            if not processed:
+                time.sleep(self.poll_interval)
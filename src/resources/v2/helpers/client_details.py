@@ -3,6 +3,7 @@ from flask import json
 from src.resources.v2.helpers import custom_response
 import os
 import requests
+from src.http_client import get_http_client
 from src.models import *
 from src.resources.v2.schemas import *
 
@@ -69,9 +70,16 @@ class ClientDetails:
 
     @property
     def debtors(self):
-        from src.resources.v2.controllers.debtors_controller import get_soa_by_debtor
-
         get_debtors = self.client.get_debtors()
+
+        # latest debtor limit approvals and soa statuses of all debtors, batched
+        debtor_limit_approvals_by_debtor = (
+            DebtorLimitApprovals.get_latest_by_client_debtors(client_id=self.client.id)
+        )
+        soa_statuses_by_debtor = Invoice.get_soa_statuses_by_debtor(
+            client_id=self.client.id
+        )
+
         debtor_objects_dict = []
         for debtor in get_debtors:            
             can_edit_debtor = False
@@ -92,10 +100,7 @@ class ClientDetails:
             credit_limit = client_debtors_schema["credit_limit"]
 
             # debtor limit approvals
-            debtor_limit_approvals = DebtorLimitApprovals.query.filter(
-                DebtorLimitApprovals.debtor_id == debtor_obj["id"],
-                DebtorLimitApprovals.deleted_at == None,
-            ).order_by(DebtorLimitApprovals.id.desc()).first()            
+            debtor_limit_approvals = debtor_limit_approvals_by_debtor.get(debtor_obj["id"])
             if debtor_limit_approvals:
                 debtor_limit_approvals_data = debtor_limit_approvals_schema.dump(debtor_limit_approvals).data
                 credit_limit_requested = debtor_limit_approvals_data["credit_limit_requested"]
@@ -103,21 +108,13 @@ class ClientDetails:
 
             # checking, if debtor is not synced
             if debtor_obj and debtor_obj["source"] == "funding":
-                get_debtors_soa = get_soa_by_debtor(
-                    debtor_id=debtor_obj["id"], client_id=self.client.id
-                )
-
-                debtors_soa_status = []
-                can_edit_debtor = True
-                if len(get_debtors_soa["reference_ids"]) > 0:
-                    [
-                        debtors_soa_status.append(each_data["status"])
-                        for each_data in get_debtors_soa["data"]
-                        if each_data["status"] != "draft"
-                    ]
-
-                    if debtors_soa_status:
-                        can_edit_debtor = False
+                # debtor can't be edited once any of its soa is out of draft
+                debtors_soa_status = [
+                    status
+                    for status in soa_statuses_by_debtor.get(debtor_obj["id"], [])
+                    if status != "draft"
+                ]
+                can_edit_debtor = not debtors_soa_status
 
             debtor_obj.update(
                 {
@@ -299,7 +296,7 @@ def third_party_sync_by_client(client=None):
         # }
 
         try:
-            r = requests.get(url=url, headers=headers, timeout=8)
+            r = get_http_client("third_party").get(url=url, headers=headers)
 
             # extracting data in json format
             data = r.json()
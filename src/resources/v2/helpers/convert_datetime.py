@@ -1,6 +1,7 @@
 from flask import abort
 from datetime import datetime, timedelta
 from pytz import timezone
+from sqlalchemy import and_
 import time
 
 
@@ -111,6 +112,26 @@ def date_concat_time(tz="US/Eastern", time_concat="04:00:00", date_concat="curre
     return datetime_concat
 
 
+def date_window(
+    column, tz="US/Eastern", time_concat="04:00:00", start="current", end="next"
+):
+    """[summary]
+
+    Args:
+        column (required): [datetime column(utc) to be filtered].
+        tz (str, optional): [timezone]. Defaults to "US/Eastern".
+        time_concat (str, optional): [time to be concatenated]. Defaults to "04:00:00".
+        start (str, optional): [window start, previous/current/next]. Defaults to "current".
+        end (str, optional): [window end, previous/current/next]. Defaults to "next".
+
+    Returns: range filter on the bare column, so index on column can be used
+    """
+    return and_(
+        column >= date_concat_time(tz=tz, time_concat=time_concat, date_concat=start),
+        column <= date_concat_time(tz=tz, time_concat=time_concat, date_concat=end),
+    )
+
+
 def is_hh_mm_time(time_format="%H:%M:%S", time_string=None):
     """[summary]
 
@@ -0,0 +1,143 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+_dag_executor = None
+_dag_executor_lock = threading.Lock()
+
+
+def get_dag_executor():
+    """
+    Process wide worker pool for dag steps, bounded by DAG_EXECUTOR_WORKERS
+    """
+    global _dag_executor
+
+    with _dag_executor_lock:
+        if _dag_executor is None:
+            _dag_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("DAG_EXECUTOR_WORKERS", 16)),
+                thread_name_prefix="dag-step",
+            )
+    return _dag_executor
+
+
+class SkipStep(Exception):
+    """
+    Raised by a step that has nothing to do, steps depending on it are skipped too
+    """
+
+
+class DagExecutor:
+    """
+    Runs steps as soon as the steps they depend on are done, at most
+    max_concurrency at a time. A step is called with the results of its
+    dependencies, a failed or skipped step skips the steps depending on it.
+    """
+
+    def __init__(self, max_concurrency=None):
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("DAG_EXECUTOR_MAX_CONCURRENCY", 4)
+        )
+        self.steps = {}
+
+    def add(self, name, fn, depends_on=()):
+        """[Add a step]
+
+        Args:
+            name (str): step name
+            fn (callable): called with a dict of dependency name -> result
+            depends_on (tuple, optional): step names. Defaults to ().
+        """
+        for dependency in depends_on:
+            if dependency not in self.steps:
+                raise ValueError(f"step '{name}' depends on unknown step '{dependency}'")
+        self.steps[name] = {"fn": fn, "depends_on": tuple(depends_on)}
+        return self
+
+    @staticmethod
+    def run_step(fn, dependencies):
+        started_at = time.monotonic()
+        try:
+            result = fn(dependencies)
+            status = "completed"
+            error = None
+        except SkipStep as e:
+            result = None
+            status = "skipped"
+            error = str(e) or None
+        except Exception as e:
+            result = None
+            status = "failed"
+            error = str(e)
+        return {
+            "status": status,
+            "result": result,
+            "error": error,
+            "elapsed_ms": round((time.monotonic() - started_at) * 1000, 2),
+        }
+
+    def run(self):
+        """[Run all steps]
+
+        Returns:
+            dict: {"steps": step name -> {status, result, error, elapsed_ms, started_ms}, "elapsed_ms"}
+        """
+        executor = get_dag_executor()
+        started_at = time.monotonic()
+        results = {}
+        running = {}
+        pending = list(self.steps)
+
+        while pending or running:
+            # steps of failed/skipped dependencies are not run
+            for name in list(pending):
+                depends_on = self.steps[name]["depends_on"]
+                blocked_by = [
+                    dependency
+                    for dependency in depends_on
+                    if dependency in results
+                    and results[dependency]["status"] != "completed"
+                ]
+                if blocked_by:
+                    pending.remove(name)
+                    results[name] = {
+                        "status": "skipped",
+                        "result": None,
+                        "error": f"{', '.join(blocked_by)} not completed",
+                        "elapsed_ms": 0,
+                        "started_ms": None,
+                    }
+
+            for name in list(pending):
+                if len(running) >= self.max_concurrency:
+                    break
+                depends_on = self.steps[name]["depends_on"]
+                if not all(dependency in results for dependency in depends_on):
+                    continue
+
+                pending.remove(name)
+                dependencies = {
+                    dependency: results[dependency]["result"]
+                    for dependency in depends_on
+                }
+                future = executor.submit(
+                    self.run_step, self.steps[name]["fn"], dependencies
+                )
+                running[future] = (name, time.monotonic())
+
+            if not running:
+                continue
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, step_started_at = running.pop(future)
+                results[name] = dict(
+                    future.result(),
+                    started_ms=round((step_started_at - started_at) * 1000, 2),
+                )
+
+        return {
+            "steps": {name: results[name] for name in self.steps},
+            "elapsed_ms": round((time.monotonic() - started_at) * 1000, 2),
+        }
@@ -0,0 +1,237 @@
+import threading
+from decimal import Decimal
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from src import db
+
+
+class DisbursementFees:
+    """
+    Fee totals of the disbursements of a SOA or reserve release, computed
+    from one aggregated query (count and sums per payee ref type, payment
+    method and payee).
+
+    Aggregates are memoized on the request object (soa/reserve release)
+    until disbursements change in this process, fee settings are applied
+    on each call.
+    """
+
+    memo_key = "_disbursement_fees"
+
+    _generation = 0
+    _lock = threading.Lock()
+    _registered = False
+
+    def __init__(self, request_type):
+        # request_type = soa|reserve_release
+        self.request_type = request_type
+
+    def disbursements_filter(self, request_id):
+        from src.models import Disbursements, ReserveReleaseDisbursements
+
+        if self.request_type == "soa":
+            return [Disbursements.soa_id == request_id]
+
+        return [
+            Disbursements.id.in_(
+                db.session.query(ReserveReleaseDisbursements.disbursements_id).filter(
+                    ReserveReleaseDisbursements.reserve_release_id == request_id,
+                    ReserveReleaseDisbursements.is_deleted == False,
+                )
+            )
+        ]
+
+    def query_aggregates(self, request_id):
+        """[Disbursements of the request grouped by payee ref type, payment method and payee]
+
+        Returns:
+            list: (ref_type, payment_method, payee_id, count, client_fee, third_party_fee, amount)
+        """
+        from src.models import Disbursements, Client, ClientPayee
+
+        # a disbursement counts once per payee ref type(client/payee) of its client payee
+        disbursement_ref_types = (
+            db.session.query(
+                Disbursements.id.label("id"), ClientPayee.ref_type.label("ref_type")
+            )
+            .filter(
+                *self.disbursements_filter(request_id),
+                Disbursements.is_deleted == False,
+                Client.id == Disbursements.client_id,
+                ClientPayee.client_id == Client.id,
+                ClientPayee.payee_id == Disbursements.payee_id,
+                ClientPayee.ref_type.in_(["client", "payee"]),
+            )
+            .distinct()
+            .subquery()
+        )
+
+        return (
+            db.session.query(
+                disbursement_ref_types.c.ref_type,
+                Disbursements.payment_method,
+                Disbursements.payee_id,
+                func.count(Disbursements.id),
+                func.sum(func.coalesce(Disbursements.client_fee, 0)),
+                func.sum(func.coalesce(Disbursements.third_party_fee, 0)),
+                func.sum(func.coalesce(Disbursements.amount, 0)),
+            )
+            .join(
+                disbursement_ref_types,
+                disbursement_ref_types.c.id == Disbursements.id,
+            )
+            .group_by(
+                disbursement_ref_types.c.ref_type,
+                Disbursements.payment_method,
+                Disbursements.payee_id,
+            )
+            .all()
+        )
+
+    def aggregates(self, request_object):
+        """[Memoized aggregates of request object]"""
+        DisbursementFees.register_invalidation()
+
+        generation = DisbursementFees._generation
+        memo = request_object.__dict__.get(self.memo_key)
+        if memo and memo[0] == generation:
+            return memo[1]
+
+        aggregates = self.query_aggregates(request_object.id)
+        request_object.__dict__[self.memo_key] = (generation, aggregates)
+        return aggregates
+
+    def totals(self, request_object, client_settings):
+        """[Fee totals of request object]
+
+        Args:
+            request_object (SOA|ReserveRelease): request
+            client_settings (dict): fees, soa_client_settings()/rr_client_settings()
+
+        Returns:
+            dict: totals, Decimal
+        """
+        high_priority_fee = Decimal(0)
+        same_day_ach_fee = Decimal(0)
+        wire_fee = Decimal(0)
+        third_party_fee = Decimal(0)
+        high_priority_amount = Decimal(0)
+
+        # client settings in table
+        if client_settings:
+            high_priority_fee = Decimal(client_settings["high_priority_fee"])
+            same_day_ach_fee = Decimal(client_settings["same_day_ach_fee"])
+            wire_fee = Decimal(client_settings["wire_fee"])
+            third_party_fee = Decimal(client_settings["third_party_fee"])
+            high_priority_amount = Decimal(client_settings["high_priority_fee"])
+
+        fee_to_client = Decimal(0)
+        total_fees_asap = Decimal(0)  # for lcra export
+        asap_amount = Decimal(0)  # for outstanding amount cal
+
+        # add high_priority to fee_to_client
+        if request_object.high_priority:
+            fee_to_client += high_priority_fee
+            total_fees_asap += high_priority_fee
+            asap_amount = high_priority_fee
+
+        # per payee ref type: client as payee, third party as payee
+        client_fee_total = {"client": Decimal(0), "payee": Decimal(0)}
+        third_party_fee_total = {"client": Decimal(0), "payee": Decimal(0)}
+        total_amount = Decimal(0)
+        get_payees = {"client": [], "payee": []}
+
+        for (
+            ref_type,
+            payment_method,
+            payee_id,
+            count,
+            client_fee,
+            disbursement_third_party_fee,
+            amount,
+        ) in self.aggregates(request_object):
+            get_payees[ref_type].extend([payee_id] * count)
+
+            # fee_to_client, third party as payee pays the third party fee too
+            payment_method = payment_method.value if payment_method else None
+            if payment_method == "wire":
+                fee_to_client += wire_fee * count
+            if payment_method == "same_day_ach":
+                fee_to_client += same_day_ach_fee * count
+            if ref_type == "payee" and payment_method in [
+                "wire",
+                "same_day_ach",
+                "direct_deposit",
+            ]:
+                fee_to_client += third_party_fee * count
+
+            client_fee_total[ref_type] += Decimal(client_fee)
+            third_party_fee_total[ref_type] += Decimal(disbursement_third_party_fee)
+            total_amount += Decimal(amount)
+
+        # cal total fee to client(LC-1695) for lcra export
+        total_client_fees = third_party_fee_total["client"] + client_fee_total["client"]
+        total_payee_fees = third_party_fee_total["payee"] + client_fee_total["payee"]
+        total_fees_asap += client_fee_total["client"] + total_payee_fees
+
+        return {
+            "fees_to_client": total_client_fees,
+            "third_party_fees": total_payee_fees,
+            "total_fee_to_client": fee_to_client,
+            "total_fees_asap": total_fees_asap,
+            "payee_ids": get_payees["client"] + get_payees["payee"],
+            "total_amount": total_amount,
+            "asap_amount": asap_amount,
+            "high_priority_amount": high_priority_amount,
+        }
+
+    @staticmethod
+    def invalidate():
+        with DisbursementFees._lock:
+            DisbursementFees._generation += 1
+
+    @staticmethod
+    def register_invalidation():
+        if DisbursementFees._registered:
+            return
+
+        with DisbursementFees._lock:
+            if DisbursementFees._registered:
+                return
+
+            from src.models import (
+                Disbursements,
+                ReserveReleaseDisbursements,
+                ClientPayee,
+            )
+
+            # client payee ref type decides client/payee fees
+            models = (Disbursements, ReserveReleaseDisbursements, ClientPayee)
+
+            def on_attach(session, instance):
+                # pending rows are seen by queries (autoflush)
+                if isinstance(instance, models):
+                    DisbursementFees.invalidate()
+
+            def after_flush(session, flush_context):
+                # changed rows, also rows of changed reserve_release collections
+                for instance in list(session.new) + list(session.dirty) + list(
+                    session.deleted
+                ):
+                    if isinstance(instance, models):
+                        DisbursementFees.invalidate()
+                        return
+
+            def after_bulk_change(update_context):
+                if update_context.mapper.class_ in models:
+                    DisbursementFees.invalidate()
+
+            def after_soft_rollback(session, previous_transaction):
+                DisbursementFees.invalidate()
+
+            event.listen(Session, "after_attach", on_attach)
+            event.listen(Session, "after_flush", after_flush)
+            event.listen(Session, "after_bulk_update", after_bulk_change)
+            event.listen(Session, "after_bulk_delete", after_bulk_change)
+            event.listen(Session, "after_soft_rollback", after_soft_rollback)
+            DisbursementFees._registered = True
@@ -0,0 +1,160 @@
+import os
+import threading
+from zipfile import ZipFile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import Response
+from src.http_client import get_http_client
+
+_documents_executor = None
+_documents_executor_lock = threading.Lock()
+
+
+def get_documents_executor():
+    """
+    Process wide worker pool for document downloads, bounded by DOCUMENTS_DOWNLOAD_WORKERS
+    """
+    global _documents_executor
+
+    with _documents_executor_lock:
+        if _documents_executor is None:
+            _documents_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("DOCUMENTS_DOWNLOAD_WORKERS", 8)),
+                thread_name_prefix="documents-download",
+            )
+    return _documents_executor
+
+
+class DocumentTooLarge(Exception):
+    pass
+
+
+class ZipStreamBuffer:
+    """
+    Write only file object for ZipFile, without seek/tell ZipFile writes
+    data descriptors so entries can be sent as soon as they are written
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def fetch_document(url, max_file_size):
+    """[Download url, up to max_file_size bytes]
+
+    Raises:
+        DocumentTooLarge
+    """
+    with get_http_client("documents").get(url, stream=True) as r:
+        content_length = r.headers.get("Content-Length")
+        if content_length and int(content_length) > max_file_size:
+            raise DocumentTooLarge(f"{content_length} bytes")
+
+        content = bytearray()
+        for chunk in r.iter_content(chunk_size=64 * 1024):
+            content.extend(chunk)
+            if len(content) > max_file_size:
+                raise DocumentTooLarge(f"more than {max_file_size} bytes")
+        return bytes(content)
+
+
+def document_file_name(name, url):
+    # file extension from url
+    filename, file_extension = os.path.splitext(url)
+    return name + str(file_extension)
+
+
+def stream_documents_zip(file_name, documents, max_file_size=None):
+    """[Download documents concurrently and stream them as a zip]
+
+    Documents are written to the zip in completion order. At most
+    DOCUMENTS_DOWNLOAD_WORKERS * 2 downloads are submitted at a time, the
+    next one when a file is written, so finished downloads waiting for the
+    client are bounded. Repeated urls are downloaded once, files over
+    max_file_size are left out and listed in skipped_files.txt.
+
+    Args:
+        file_name (str): zip file name, without extension
+        documents (list): (file name in zip, url)
+        max_file_size (int, optional): Defaults to DOCUMENTS_MAX_FILE_SIZE(50 MB).
+
+    Returns:
+        Response: streamed zip
+    """
+    max_file_size = max_file_size or int(
+        os.getenv("DOCUMENTS_MAX_FILE_SIZE", 50 * 1024 * 1024)
+    )
+
+    # url -> file names in zip
+    documents_by_url = {}
+    for name, url in documents:
+        if not url:
+            continue
+        names = documents_by_url.setdefault(url, [])
+        if name not in names:
+            names.append(name)
+
+    executor = get_documents_executor()
+    window = int(os.getenv("DOCUMENTS_DOWNLOAD_WORKERS", 8)) * 2
+    pending_urls = iter(documents_by_url)
+    # future -> url
+    futures = {}
+
+    def submit_next():
+        url = next(pending_urls, None)
+        if url is not None:
+            futures[executor.submit(fetch_document, url, max_file_size)] = url
+
+    # the first downloads start before the response is returned
+    for _ in range(window):
+        submit_next()
+
+    def generate():
+        buffer = ZipStreamBuffer()
+        skipped_files = []
+        try:
+            with ZipFile(buffer, "w") as zip:
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = futures.pop(future)
+                        try:
+                            content = future.result()
+                        except Exception as e:
+                            print(f"--document download failed-- {url}: {e}")
+                            skipped_files.extend(
+                                f"{name}: {e}" for name in documents_by_url[url]
+                            )
+                            submit_next()
+                            continue
+
+                        for name in documents_by_url[url]:
+                            zip.writestr(name, content)
+                        del content
+                        submit_next()
+                        yield buffer.drain()
+
+                if skipped_files:
+                    zip.writestr("skipped_files.txt", "\n".join(skipped_files))
+            yield buffer.drain()
+        finally:
+            # client went away, drop pending downloads
+            for future in futures:
+                future.cancel()
+
+    response = Response(generate(), mimetype="application/zip")
+    response.headers["Content-Disposition"] = f'attachment; filename="{file_name}.zip"'
+    response.headers["Access-Control-Expose-Headers"] = "content-disposition"
+    response.headers["Cache-Control"] = "public, max-age=0"
+    return response
@@ -1,5 +1,6 @@
 import os
 import requests
+from src.http_client import get_http_client
 from src.resources.v2.helpers import custom_response
 from flask import abort
 
@@ -32,7 +33,7 @@ def get_debtor_limits_from_third_party(debtor_ref_key=None, client_ref_key=None)
 
     data = {}
     try:
-        r = requests.get(url=url, params=params, headers=headers)
+        r = get_http_client("third_party").get(url=url, params=params, headers=headers)
         data = r.json()
         data["status_code"] = r.status_code
     except requests.ConnectionError as e:
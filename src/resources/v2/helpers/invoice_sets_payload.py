@@ -0,0 +1,96 @@
+import json
+import zlib
+import base64
+
+# Wire format for the tuple sets sent to PARSING_INVOICES_AWS_LAMBDA_URL
+# (debtors, debtor_swap, funding_invoices, funding_unique_invoices,
+# funding_unique_invoices_update).
+#
+# version 1:
+# {
+#     "version": 1,
+#     "encoding": "zlib+base64",
+#     "data": base64(zlib(json({
+#         "<name>": {"type": "rows" | "dict", "columns": [[col 0], [col 1], ...]},
+#     }))),
+# }
+#
+# Each set is stored column wise: tuples are transposed to one list per
+# position and dicts to [keys, values], which removes the repeated tuple
+# syntax of str(list_of_tuples) and compresses well.
+#
+# NOTE: src/aws-lambda-functions/validate-invoices.py keeps a copy of
+# decode_invoice_sets, keep both in sync when changing the format.
+
+INVOICE_SETS_PAYLOAD_VERSION = 1
+
+
+def encode_columns(rows):
+    """
+    List of tuples to list of columns
+    """
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return []
+    return [list(column) for column in zip(*rows)]
+
+
+def decode_columns(columns):
+    """
+    List of columns to list of tuples
+    """
+    if not columns:
+        return []
+    return list(zip(*columns))
+
+
+def encode_invoice_sets(**invoice_sets):
+    """[Encode tuple sets/dicts to versioned compact payload]
+
+    Args:
+        **invoice_sets: name=list of tuples or name=dict
+
+    Returns:
+        dict: version, encoding and data
+    """
+    sets = {}
+    for name, value in invoice_sets.items():
+        if isinstance(value, dict):
+            sets[name] = {
+                "type": "dict",
+                "columns": [list(value.keys()), list(value.values())],
+            }
+        else:
+            sets[name] = {"type": "rows", "columns": encode_columns(value)}
+
+    data = json.dumps(sets, separators=(",", ":")).encode("utf-8")
+    return {
+        "version": INVOICE_SETS_PAYLOAD_VERSION,
+        "encoding": "zlib+base64",
+        "data": base64.b64encode(zlib.compress(data)).decode("ascii"),
+    }
+
+
+def decode_invoice_sets(payload):
+    """[Decode payload created by encode_invoice_sets]
+
+    Args:
+        payload (dict): version, encoding and data
+
+    Returns:
+        dict: name -> list of tuples or dict
+    """
+    if payload.get("version") != INVOICE_SETS_PAYLOAD_VERSION:
+        raise ValueError(f"Unsupported invoice sets payload version: {payload.get('version')}")
+
+    data = zlib.decompress(base64.b64decode(payload["data"]))
+    sets = json.loads(data.decode("utf-8"))
+
+    invoice_sets = {}
+    for name, value in sets.items():
+        if value["type"] == "dict":
+            keys, values = value["columns"] if value["columns"] else ([], [])
+            invoice_sets[name] = dict(zip(keys, values))
+        else:
+            invoice_sets[name] = decode_columns(value["columns"])
+    return invoice_sets
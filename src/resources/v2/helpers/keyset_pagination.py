@@ -0,0 +1,309 @@
+import os
+import json
+import math
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from flask import abort
+from sqlalchemy import Enum as EnumType, and_, or_, false, func
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+# listing totals kept per query and parameters, for total=cached
+LISTING_TOTALS_CACHE_TTL = int(os.getenv("LISTING_TOTALS_CACHE_TTL", 60))
+LISTING_TOTALS_CACHE_MAX_SIZE = int(os.getenv("LISTING_TOTALS_CACHE_MAX_SIZE", 1024))
+
+
+class ListingTotalsCache(object):
+    """
+    Process wide LRU of listing count queries -> totals, entries expire
+    after LISTING_TOTALS_CACHE_TTL seconds, so totals may lag behind
+    """
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            return None
+
+    def set(self, key, total):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+listing_totals_cache = ListingTotalsCache(
+    LISTING_TOTALS_CACHE_TTL, LISTING_TOTALS_CACHE_MAX_SIZE
+)
+
+
+class KeysetPage(object):
+    """
+    Page of a listing after a cursor, same attributes as the
+    flask_sqlalchemy Pagination the listings read (items, total, pages)
+    """
+
+    def __init__(self, items, per_page, next_cursor, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.counted = total is not None
+        self.total = total or 0
+        self.pages = math.ceil(self.total / per_page) if per_page else 0
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+    return value
+
+
+def order_keys(query, id_column):
+    """[Order by columns of the query, with id_column as last key]
+
+    Returns:
+        list: (column, desc)
+    """
+    keys = []
+    for clause in query._order_by or []:
+        if isinstance(clause, UnaryExpression) and clause.modifier in (
+            operators.asc_op,
+            operators.desc_op,
+        ):
+            keys.append((clause.element, clause.modifier is operators.desc_op))
+        else:
+            keys.append((clause, False))
+
+    # stable tie-break, in the direction of the last key
+    keys.append((id_column, keys[-1][1] if keys else False))
+    return keys
+
+
+def keys_fingerprint(keys):
+    # a cursor is only valid for the ordering it was made for
+    text = "|".join(f"{column}:{desc}" for column, desc in keys)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(keys, values):
+    data = json.dumps([keys_fingerprint(keys), [encode_value(v) for v in values]])
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(keys, cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        fingerprint, values = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        abort(400, "Invalid cursor")
+
+    if fingerprint != keys_fingerprint(keys) or len(values) != len(keys):
+        abort(400, "Cursor does not match the ordering")
+    return [decode_value(value) for value in values]
+
+
+def comparable(column, value):
+    # mysql orders enums by their position, not by name
+    column_type = getattr(column, "type", None)
+    if isinstance(column_type, EnumType) and value is not None:
+        enums = list(column_type.enums)
+        position = enums.index(value) + 1 if value in enums else 0
+        return func.field(column, *enums), position
+    return column, value
+
+
+def is_equal(column, value):
+    if value is None:
+        return column.is_(None)
+    column, value = comparable(column, value)
+    return column == value
+
+
+def is_beyond(column, desc, value):
+    # mysql sorts NULLs first on asc, last on desc
+    if value is None:
+        return false() if desc else column.isnot(None)
+    column_value, value = comparable(column, value)
+    if desc:
+        return or_(column_value < value, column.is_(None))
+    return column_value > value
+
+
+def after_cursor(keys, values):
+    """[Rows ordered after values]
+
+    (k1 > v1) or (k1 = v1 and k2 > v2) or ... for asc keys, < for desc keys
+    """
+    criteria = []
+    for i, (column, desc) in enumerate(keys):
+        equal = [
+            is_equal(keys[j][0], values[j]) for j in range(i)
+        ]
+        criteria.append(and_(*equal, is_beyond(column, desc, values[i])))
+    return or_(*criteria)
+
+
+def listing_total(query, total):
+    """[Count of the listing query, exact or cached]
+
+    Args:
+        query (Query): listing query
+        total (str): exact|cached, other values are not counted
+
+    Returns:
+        int|None
+    """
+    if total not in ("exact", "cached"):
+        return None
+
+    count_query = query.order_by(None)
+    if total == "exact":
+        return count_query.count()
+
+    compiled = count_query.statement.compile()
+    key = (
+        str(compiled),
+        tuple(sorted((name, repr(value)) for name, value in compiled.params.items())),
+    )
+    count = listing_totals_cache.get(key)
+    if count is None:
+        count = count_query.count()
+        listing_totals_cache.set(key, count)
+    return count
+
+
+def keyset_paginate(query, rpp, id_column, cursor="", total=None):
+    """[Page of query after cursor, by its order by columns and id_column]
+
+    Args:
+        query (Query): ordered listing query
+        rpp (int): rows per page
+        id_column (Column): unique column of the listing rows, tie-break
+        cursor (str, optional): next_cursor of the previous page, "" for the first page
+        total (str, optional): exact|cached count of all rows. Defaults to None(not counted).
+
+    Returns:
+        KeysetPage
+    """
+    keys = order_keys(query, id_column)
+    page_query = query.order_by(id_column.desc() if keys[-1][1] else id_column.asc())
+    if cursor:
+        page_query = page_query.filter(after_cursor(keys, decode_cursor(keys, cursor)))
+
+    # order by values come back with the rows for the next cursor
+    column_descriptions = query.column_descriptions
+    single_entity = len(column_descriptions) == 1 and isinstance(
+        column_descriptions[0]["expr"], type
+    )
+    columns = [column.label(f"_keyset_{i}") for i, (column, _) in enumerate(keys)]
+
+    items = []
+    last_row = None
+    has_next = False
+    batch_query = page_query
+    while True:
+        rows = batch_query.add_columns(*columns).limit(rpp + 1).all()
+        for row in rows:
+            item = row[0] if single_entity else row
+            # joined duplicates of an entity come one after the other
+            if single_entity and items and items[-1] is item:
+                continue
+            if len(items) == rpp:
+                has_next = True
+                break
+            items.append(item)
+            last_row = row
+
+        if has_next or len(rows) <= rpp:
+            break
+
+        # duplicates filled the batch, read on after its last row until
+        # rpp + 1 distinct items(or the end of the listing)
+        # same values as a decoded cursor, e.g. enum names instead of enums
+        last_values = [decode_value(encode_value(v)) for v in rows[-1][-len(keys):]]
+        batch_query = page_query.filter(after_cursor(keys, last_values))
+
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(keys, list(last_row[-len(keys):]))
+
+    return KeysetPage(items, rpp, next_cursor, listing_total(query, total))
+
+
+def paginate_listing(query, page, rpp, id_column, cursor=None, total=None):
+    """[query.paginate(page, rpp, False), or a keyset page if a cursor is given]
+
+    Args:
+        query (Query): ordered listing query
+        page (int): page number, offset pagination
+        rpp (int): rows per page
+        id_column (Column): unique column of the listing rows
+        cursor (str, optional): keyset pagination, "" for the first page. Defaults to None.
+        total (str, optional): exact|cached, keyset pagination only. Defaults to None.
+
+    Returns:
+        Pagination|KeysetPage
+    """
+    if cursor is None:
+        return query.paginate(page, rpp, False)
+    return keyset_paginate(query, rpp, id_column, cursor=cursor, total=total)
+
+
+def with_cursor(response, pagination):
+    """[Listing response with the cursor fields of a keyset page]
+
+    Args:
+        response (dict): listing response
+        pagination (Pagination|KeysetPage): page of the response
+
+    Returns:
+        dict: response
+    """
+    if not isinstance(pagination, KeysetPage):
+        return response
+
+    response["current_page"] = None
+    response["next_cursor"] = pagination.next_cursor
+    response["has_next"] = pagination.has_next
+    # not counted unless total=exact|cached
+    response["total_pages"] = pagination.pages if pagination.counted else None
+    response["total_count"] = pagination.total if pagination.counted else None
+    return response
@@ -0,0 +1,78 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import copy_current_request_context
+
+_lanes_executor = None
+_lanes_executor_lock = threading.Lock()
+
+
+def get_lanes_executor():
+    """
+    Process wide worker pool for dashboard lanes, bounded by DASHBOARD_LANE_WORKERS
+    """
+    global _lanes_executor
+
+    with _lanes_executor_lock:
+        if _lanes_executor is None:
+            _lanes_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("DASHBOARD_LANE_WORKERS", 4)),
+                thread_name_prefix="dashboard-lane",
+            )
+    return _lanes_executor
+
+
+def is_concurrent_lanes_enabled():
+    return os.getenv("DASHBOARD_CONCURRENT_LANES", "false").lower() == "true"
+
+
+def run_lanes(lanes, concurrent=False):
+    """[Run dashboard lane listings]
+
+    Args:
+        lanes (list): (lane name, listing function, kwargs)
+        concurrent (bool, optional): run lanes on the worker pool. Defaults to False.
+
+    Returns:
+        list: (lane name, listing result, duration in ms), in lanes order
+    """
+
+    def timed(func, kwargs):
+        start = time.perf_counter()
+        result = func(**kwargs)
+        return result, (time.perf_counter() - start) * 1000
+
+    if not concurrent or len(lanes) < 2:
+        results = []
+        for name, func, kwargs in lanes:
+            result, duration = timed(func, kwargs)
+            results.append((name, result, duration))
+        return results
+
+    executor = get_lanes_executor()
+    futures = []
+    for name, func, kwargs in lanes:
+        # each worker runs in a copy of the request context, so it gets its own
+        # app context and scoped db session, removed on teardown
+        @copy_current_request_context
+        def run_lane(func=func, kwargs=kwargs):
+            return timed(func, kwargs)
+
+        futures.append((name, executor.submit(run_lane)))
+
+    # merged in lanes order, not completion order
+    results = []
+    for name, future in futures:
+        result, duration = future.result()
+        results.append((name, result, duration))
+    return results
+
+
+def server_timing_header(lanes_results):
+    """
+    Server-Timing header value from run_lanes results
+    """
+    return ", ".join(
+        f"{name};dur={duration:.1f}" for name, _, duration in lanes_results
+    )
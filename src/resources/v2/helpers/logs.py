@@ -1,12 +1,272 @@
 from datetime import datetime
 import logging
 import os, time
-from logging.handlers import RotatingFileHandler
+import json
+import queue
+import atexit
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from src.resources.v2.helpers.convert_datetime import (
     datetime_to_string_format,
     utc_to_local,
 )
 
+LOGS_FORMAT = "%(asctime)s - %(levelname)s - %(name)s : %(message)s"
+LOGS_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class DatedRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler of a logical log file, the file is switched when
+    the date in the log file name changes and rotated on LOGS_MAX_BYTES
+    """
+
+    def __init__(self, file_path, max_bytes=0, backup_count=0):
+        super().__init__(
+            file_path, maxBytes=max_bytes, backupCount=backup_count, delay=True
+        )
+
+    def use_file(self, file_path):
+        file_path = os.path.abspath(file_path)
+        if file_path == self.baseFilename:
+            return
+
+        self.acquire()
+        try:
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = file_path
+        finally:
+            self.release()
+
+
+class LogsRouter(logging.Handler):
+    """
+    Writes queued records to the handler of their log file, handlers are
+    created once per logical log file and kept open
+    """
+
+    def __init__(self, max_bytes=None, backup_count=None):
+        super().__init__()
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(os.getenv("LOGS_MAX_BYTES", 10 * 1024 * 1024))
+        )
+        self.backup_count = (
+            backup_count
+            if backup_count is not None
+            else int(os.getenv("LOGS_BACKUP_COUNT", 5))
+        )
+        self.formatter = logging.Formatter(fmt=LOGS_FORMAT, datefmt=LOGS_DATE_FORMAT)
+        self.handlers = {}
+        self.folders = set()
+
+    def get_handler(self, log_name, file_path):
+        folder = os.path.dirname(file_path)
+        if folder not in self.folders:
+            os.makedirs(folder, exist_ok=True)
+            self.folders.add(folder)
+
+        handler = self.handlers.get(log_name)
+        if not handler:
+            handler = DatedRotatingFileHandler(
+                file_path, max_bytes=self.max_bytes, backup_count=self.backup_count
+            )
+            handler.setFormatter(self.formatter)
+            self.handlers[log_name] = handler
+        handler.use_file(file_path)
+        return handler
+
+    def emit(self, record):
+        try:
+            handler = self.get_handler(record.name, record.log_file_path)
+            handler.handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+        self.handlers = {}
+        super().close()
+
+
+class LogsBackend:
+    """
+    Process wide logging backend of Logs: loggers put records on a queue,
+    a QueueListener thread writes them to files through LogsRouter
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._listener = None
+        self._router = None
+        self._loggers = {}
+
+    def start(self):
+        with self._lock:
+            if self._listener:
+                return
+            self._queue = queue.Queue(-1)
+            self._router = LogsRouter()
+            self._listener = QueueListener(self._queue, self._router)
+            self._listener.start()
+
+    def get_logger(self, log_name):
+        logger = self._loggers.get(log_name)
+        if logger:
+            return logger
+
+        self.start()
+        with self._lock:
+            logger = self._loggers.get(log_name)
+            if not logger:
+                logger = logging.getLogger(name=f"logs.{log_name}")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                del logger.handlers[:]
+                logger.addHandler(QueueHandler(self._queue))
+                self._loggers[log_name] = logger
+        return logger
+
+    def flush(self):
+        """
+        Write queued records, the listener is started again for later records
+        """
+        with self._lock:
+            if not self._listener:
+                return
+            # stop() writes records queued so far
+            self._listener.stop()
+            self._listener.start()
+
+    def stop(self):
+        with self._lock:
+            if not self._listener:
+                return
+            self._listener.stop()
+            self._router.close()
+            self._listener = None
+
+
+class LogsShipper:
+    """
+    Ships Logs saved with save_as_file=False in batches, every
+    LOGS_SHIP_BATCH_SIZE entries or LOGS_SHIP_INTERVAL seconds
+    """
+
+    def __init__(self, sink=None, batch_size=None, interval=None):
+        self.sink = sink
+        self.batch_size = batch_size or int(os.getenv("LOGS_SHIP_BATCH_SIZE", 100))
+        self.interval = interval or float(os.getenv("LOGS_SHIP_INTERVAL", 5))
+        self._queue = queue.Queue(-1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.shipped = 0
+        self.batches = 0
+        self.failed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread:
+                return
+            if not self.sink:
+                self.sink = LocalLogsSink()
+            self._thread = threading.Thread(
+                target=self._work, name="logs-shipper", daemon=True
+            )
+            self._thread.start()
+
+    def ship(self, entry):
+        self.start()
+        self._queue.put(entry)
+
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self.sink.write_batch(batch)
+                self.shipped += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"--ship logs failed-- {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout=None):
+        if not self._thread:
+            return True
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self):
+        return {
+            "shipped": self.shipped,
+            "batches": self.batches,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
+
+
+class LocalLogsSink:
+    """
+    Stand-in for the aws logs sink, a batch is appended as json lines to
+    logs/aws/<filename>_<date>.jsonl
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv(
+            "LOGS_AWS_SINK_PATH", os.path.join(os.getcwd(), "logs", "aws")
+        )
+        os.makedirs(self.path, exist_ok=True)
+
+    def write_batch(self, batch):
+        by_file = {}
+        for entry in batch:
+            by_file.setdefault(entry["filename"], []).append(entry)
+
+        for filename, entries in by_file.items():
+            file_path = os.path.join(self.path, f"{filename}.jsonl")
+            with open(file_path, "a") as f:
+                f.write(
+                    "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+                )
+
+
+logs_backend = LogsBackend()
+logs_shipper = LogsShipper()
+
+
+@atexit.register
+def stop_logs():
+    # queued records are written before the process exits
+    logs_shipper.flush(timeout=float(os.getenv("LOGS_EXIT_TIMEOUT", 10)))
+    logs_backend.stop()
+
 
 class Logs:
     def __init__(
@@ -15,6 +275,7 @@ class Logs:
         self.save_as_file = save_as_file
         self.log_level_name = log_level_name
         self.data = data
+        self.log_name = filename
         self.filename = f'{filename}_{datetime_to_string_format(fmt="%Y-%m-%d")}.log'
 
         # ToDo: Need to convert time to est
@@ -24,9 +285,8 @@ class Logs:
         # the parent directory (ie /var/www/funding-backend-flask)
         self.parent_path = os.getcwd()
         self.parent_logs_path = os.path.join(self.parent_path, "logs")
-        self.create_folder()
 
-        # now we can build the file path
+        # now we can build the file path, folder is created by the logs backend
         self.file_path = os.path.join(self.parent_logs_path, self.filename)
 
         if not log_level_name:
@@ -47,52 +307,24 @@ class Logs:
 
     @property
     def set_logger(self):
-        # # rfh = RotatingFileHandler(
-        # #     filename=self.file_path,
-        # #     maxBytes=10*1024*1024,
-        # #     backupCount=5,
-        # # )
-        # logging.basicConfig(
-        #     filename=self.file_path,
-        #     level=logging.DEBUG,
-        #     format=f"%(asctime)s - %(levelname)s - %(name)s : %(message)s",
-        #     datefmt="%Y-%m-%d %H:%M:%S",
-        #     # handlers=[
-        #     #     rfh
-        #     # ],
-        # )
-        logger = logging.getLogger(name=self.filename)
-        logger.setLevel(logging.INFO)
-
-        # create a file handler
-        file_handler = logging.FileHandler(self.file_path)
-        file_handler.setLevel(logging.INFO)
-
-        # create a logging format
-        formatter = logging.Formatter(
-            fmt="%(asctime)s - %(levelname)s - %(name)s : %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-        file_handler.setFormatter(formatter)
-
-        # delete all the elements in the logger.handlers
-        del logger.handlers[:]
+        # cached logger of the logical log file, records are written off thread
+        return logs_backend.get_logger(self.log_name)
 
-        # add the handlers to the logger
-        logger.addHandler(file_handler)
-        return logger
+    @property
+    def extra(self):
+        return {"log_file_path": self.file_path}
 
     @property
     def error_log(self):
-        self.set_logger.error(f"{self.data}")
+        self.set_logger.error(f"{self.data}", extra=self.extra)
 
     @property
     def info_log(self):
-        self.set_logger.info(f"{self.data}")
+        self.set_logger.info(f"{self.data}", extra=self.extra)
 
     @property
     def warning_log(self):
-        self.set_logger.warning(f"{self.data}")
+        self.set_logger.warning(f"{self.data}", extra=self.extra)
 
     @property
     def log_level(self):
@@ -107,5 +339,11 @@ class Logs:
         self.log_level
 
     def save_logs_in_aws(self):
-        print("--save logs in aws--", self.data)
-        pass
+        logs_shipper.ship(
+            {
+                "filename": self.filename.rsplit(".", 1)[0],
+                "level": self.log_level_name,
+                "created_at": datetime.utcnow().isoformat(),
+                "data": self.data,
+            }
+        )
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+import requests
+from src.http_client import get_http_client
+from src.resources.v2.helpers.logs import Logs
+
+
+class MailDispatcher:
+    """
+    Sends mails from a bounded queue with a fixed number of worker threads.
+
+    Mails waiting in the queue are taken in batches, failed sends (connection
+    errors, 429 and 5xx) are retried with exponential backoff. When
+    MAIL_DISPATCH_BATCH_RECIPIENTS is enabled, mails of a batch that only
+    differ in recipients are sent as one multi recipient mail.
+    """
+
+    retry_status_codes = [429, 500, 502, 503, 504]
+
+    def __init__(
+        self,
+        workers=None,
+        queue_size=None,
+        batch_size=None,
+        max_attempts=None,
+        backoff=None,
+        enqueue_timeout=None,
+    ):
+        self.workers = workers or int(os.getenv("MAIL_DISPATCH_WORKERS", 4))
+        self.queue_size = queue_size or int(os.getenv("MAIL_DISPATCH_QUEUE_SIZE", 1000))
+        self.batch_size = batch_size or int(os.getenv("MAIL_DISPATCH_BATCH_SIZE", 20))
+        self.max_attempts = max_attempts or int(
+            os.getenv("MAIL_DISPATCH_MAX_ATTEMPTS", 3)
+        )
+        self.backoff = (
+            backoff if backoff is not None else float(os.getenv("MAIL_DISPATCH_BACKOFF", 2))
+        )
+        self.enqueue_timeout = (
+            enqueue_timeout
+            if enqueue_timeout is not None
+            else float(os.getenv("MAIL_DISPATCH_ENQUEUE_TIMEOUT", 5))
+        )
+        self.batch_recipients = (
+            os.getenv("MAIL_DISPATCH_BATCH_RECIPIENTS", "false").lower() == "true"
+        )
+        self.max_recipients = int(os.getenv("MAIL_DISPATCH_MAX_RECIPIENTS", 50))
+
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._counters = {
+            "submitted": 0,
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "dropped": 0,
+            "requests": 0,
+        }
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"mail-dispatch-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, data):
+        """[Queue a mail]
+
+        Waits up to MAIL_DISPATCH_ENQUEUE_TIMEOUT seconds when the queue is full.
+
+        Args:
+            data (dict): mail api data
+
+        Returns:
+            bool: mail queued
+        """
+        self._start()
+        try:
+            self._queue.put(data, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._count("dropped")
+            print(f"--mail dispatch queue full, mail dropped-- {data.get('subject')}")
+            return False
+
+        self._count("submitted")
+        return True
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _group(self, batch):
+        if not self.batch_recipients:
+            return [(data, 1) for data in batch]
+
+        # mails with the same content, recipients merged
+        groups = []
+        open_groups = {}
+        for data in batch:
+            content = dict(data)
+            recipients = content.pop("recipients", None) or []
+            key = json.dumps(content, sort_keys=True, default=str)
+            group = open_groups.get(key)
+            if (
+                not group
+                or len(group[0]["recipients"]) + len(recipients) > self.max_recipients
+            ):
+                group = [dict(content, recipients=[]), 0]
+                open_groups[key] = group
+                groups.append(group)
+            group[0]["recipients"].extend(recipients)
+            group[1] += 1
+        return [(data, count) for data, count in groups]
+
+    def send(self, data):
+        """[Send a mail, retried on connection errors/429/5xx]
+
+        Returns:
+            int: status code of the last attempt, None if the mail api was not reachable
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "api-token": os.environ.get("SENDGRID_API_TOKEN"),
+        }
+        sendgrid_mail_url = os.environ.get("SEND_MAIL_URL") + os.environ.get(
+            "SENDGRID_MAIL"
+        )
+
+        status_code = None
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._count("requests")
+                response = get_http_client("mail").post(
+                    url=sendgrid_mail_url, data=json.dumps(data), headers=headers
+                )
+                status_code = response.status_code
+                if status_code not in self.retry_status_codes:
+                    return status_code
+                error = f"status code {status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+
+            if attempt < self.max_attempts:
+                self._count("retried")
+                print(f"--mail dispatch attempt {attempt} failed, retrying-- {error}")
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+        return status_code
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            logs_data = []
+            try:
+                for data, count in self._group(batch):
+                    try:
+                        status_code = self.send(data)
+                    except Exception as e:
+                        print(f"--mail dispatch failed-- {e}")
+                        status_code = None
+
+                    if status_code and status_code < 400:
+                        self._count("sent", count)
+                    else:
+                        self._count("failed", count)
+                    logs_data.append(dict(data, status_code=status_code))
+
+                # save mail data in logs, once per batch
+                logs = Logs(filename="mail_logs", data=logs_data)
+                logs.save_logs()
+            except Exception as e:
+                print(f"--mail dispatch batch failed-- {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """[Wait until queued mails are sent]
+
+        Args:
+            timeout (float, optional): seconds. Defaults to None(no limit).
+
+        Returns:
+            bool: queue emptied
+        """
+        if not self._threads:
+            return True
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._counters,
+                queued=self._queue.qsize(),
+                workers=len(self._threads),
+            )
+
+
+mail_dispatcher = MailDispatcher()
+
+
+@atexit.register
+def flush_mail_dispatcher():
+    # cli commands exit right after queuing mails
+    mail_dispatcher.flush(timeout=float(os.getenv("MAIL_DISPATCH_EXIT_TIMEOUT", 30)))
@@ -1,16 +1,14 @@
 import os
 import ast
-import requests
-from flask import json, abort
+from flask import abort
 from src.middleware.permissions import Permissions
 from datetime import datetime
 from pytz import timezone
 from src.models import UserNotifications
 from src import db
 from .resources import custom_response
-import threading
 from src.resources.v2.helpers.convert_datetime import datetime_to_string_format
-from src.resources.v2.helpers.logs import Logs
+from src.resources.v2.helpers.mail_dispatcher import mail_dispatcher
 
 
 class SendMails:
@@ -95,23 +93,11 @@ class SendMails:
         self.mails_notification_message()
 
     def sendgrid_mail(self, data=None):
-        headers = {
-            "Content-Type": "application/json",
-            "api-token": os.environ.get("SENDGRID_API_TOKEN"),
-        }
-
-        sendgrid_mail_url = os.environ.get("SEND_MAIL_URL") + os.environ.get(
-            "SENDGRID_MAIL"
-        )
-
         if not data:
             return abort(404, f"sendgrid mail: Data is empty")
         print("--sendgrid_mail--")
-        requests.post(url=sendgrid_mail_url, data=json.dumps(data), headers=headers)
-        
-        # save mail data in logs
-        logs = Logs(filename="mail_logs", data=data)
-        logs.save_logs()
+        # sent by the mail dispatcher workers, retried and logged there
+        mail_dispatcher.submit(data)
 
 
     def send_mail_request_notifications(self):
@@ -226,9 +212,7 @@ class SendMails:
                 }
                 print("--data--", data)
                 # send to sendgrid
-                threading.Thread(
-                    target=self.sendgrid_mail, kwargs={"data": data}
-                ).start()
+                self.sendgrid_mail(data=data)
 
                 # for user notification type
                 if self.request_type_string in ["reserve-release", "credit-limit", "generic-request", "compliance-repository"]:
@@ -244,9 +228,7 @@ class SendMails:
                     "url_link": self.url_link,
                     "client_id": self.client_id,
                 }
-                add_user_notifications.append(
-                    UserNotifications(user_notifications_data)
-                )
+                add_user_notifications.append(user_notifications_data)
                 counter += 1
 
         # notification to sender about which users notified
@@ -255,7 +237,7 @@ class SendMails:
         )
 
         if len(add_user_notifications):
-            db.session.add_all(add_user_notifications)
+            UserNotifications.bulk_insert(add_user_notifications)
 
         db.session.commit()
 
@@ -318,9 +300,7 @@ class SendMails:
                 }
                 print("--data--", data)
                 # send to sendgrid
-                threading.Thread(
-                    target=self.sendgrid_mail, kwargs={"data": data}
-                ).start()
+                self.sendgrid_mail(data=data)
 
                 # for user notification type
                 if self.request_type_string == "reserve-release":
@@ -337,9 +317,7 @@ class SendMails:
                     "client_id": self.client_id,
                 }
 
-                add_user_notifications.append(
-                    UserNotifications(user_notifications_data)
-                )
+                add_user_notifications.append(user_notifications_data)
                 counter += 1
 
         # notification to sender ae about which users notified
@@ -347,7 +325,7 @@ class SendMails:
             recipient_emails_list=recipient_emails_list,
         )
         if len(add_user_notifications):
-            db.session.add_all(add_user_notifications)
+            UserNotifications.bulk_insert(add_user_notifications)
 
         db.session.commit()
 
@@ -409,9 +387,7 @@ class SendMails:
                 }
                 print("--data--", data)
                 # send to sendgrid
-                threading.Thread(
-                    target=self.sendgrid_mail, kwargs={"data": data}
-                ).start()
+                self.sendgrid_mail(data=data)
 
                 # for user notification type
                 if self.request_type_string in ["reserve-release", "credit-limit", "generic-request", "compliance-repository"]:
@@ -428,13 +404,11 @@ class SendMails:
                     "client_id": self.client_id,
                 }
 
-                add_user_notifications.append(
-                    UserNotifications(user_notifications_data)
-                )
+                add_user_notifications.append(user_notifications_data)
                 counter += 1
 
         if len(add_user_notifications):
-            db.session.add_all(add_user_notifications)
+            UserNotifications.bulk_insert(add_user_notifications)
 
         db.session.commit()
 
@@ -917,7 +891,7 @@ class SendMails:
                 },
             }
 
-            threading.Thread(target=self.sendgrid_mail, kwargs={"data": data}).start()
+            self.sendgrid_mail(data=data)
             print(
                 f"{self.request_status}: sender notified-{self.sender_email} --> {emails_list}"
             )
@@ -949,7 +923,7 @@ class SendMails:
                 },
             }
 
-            threading.Thread(target=self.sendgrid_mail, kwargs={"data": data}).start()
+            self.sendgrid_mail(data=data)
             print(
                 f"{self.request_status}: sender AE notified-{self.sender_email} --> {emails_list}"
             )
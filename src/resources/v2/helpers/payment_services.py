@@ -1,10 +1,26 @@
-import requests
 import os
 from decimal import Decimal
+from src.http_client import get_http_client
+from src.resources.v2.helpers.dag_executor import DagExecutor, SkipStep
+
+
+class PaymentServicesSyncError(Exception):
+    """
+    A step of add_in_payment_services failed, results has every step's result
+    """
+
+    def __init__(self, results):
+        self.results = results
+        errors = [
+            f"{name}: {step['error']}"
+            for name, step in results["steps"].items()
+            if step["status"] == "failed"
+        ]
+        super().__init__("; ".join(errors))
 
 
 class PaymentServices:
-    def __init__(self, request_type=None, req_data=None) -> None:
+    def __init__(self, request_type=None, req_data=None, diff_first=None) -> None:
         # Payment Services
         self.url = os.environ.get("PAYMENT_URL")
         self.api_token = os.environ.get("PAYMENT_API_TOKEN")
@@ -12,6 +28,14 @@ class PaymentServices:
         # Payment Processing
         self.payment_processing_url = os.environ.get("PAYMENT_PROCESSING_URL")
         self.payment_processing_api_token = os.environ.get("PAYMENT_PROCESSING_API_TOKEN")
+        self.http_client = get_http_client("payment_services")
+
+        # skip writes when the record in payment services already matches
+        self.diff_first = (
+            diff_first
+            if diff_first is not None
+            else os.getenv("PAYMENT_SERVICES_DIFF_FIRST", "true").lower() == "true"
+        )
 
         # request_type = payee|client
         self.request_type = request_type
@@ -35,7 +59,44 @@ class PaymentServices:
 
     @property
     def request_id(self):
-        return self.request_type.id if self.request_type else None
+        # read once, sync steps run outside of the request_type's thread
+        if "_request_id" not in self.__dict__:
+            self._request_id = self.request_type.id if self.request_type else None
+        return self._request_id
+
+    @staticmethod
+    def matches_remote(remote, data):
+        """[Remote record already has data]
+
+        Args:
+            remote (dict): payload of payment services
+            data (dict): data to be saved
+
+        Returns:
+            bool
+        """
+        if not isinstance(remote, dict):
+            return False
+
+        def normalize(value):
+            if value is None:
+                return ""
+            if isinstance(value, dict):
+                return {key: normalize(item) for key, item in value.items()}
+            return str(value)
+
+        return all(
+            normalize(remote.get(key)) == normalize(value)
+            for key, value in data.items()
+        )
+
+    @staticmethod
+    def unchanged(payload):
+        return {
+            "status_code": 200,
+            "msg": "unchanged",
+            "payload": payload,
+        }
 
     @property
     def object_string(self):
@@ -51,7 +112,7 @@ class PaymentServices:
             return self.debtor
 
     def get_entity(self, params=""):
-        send_request = requests.get(
+        send_request = self.http_client.get(
             self.url + f"api/v1/entity{params}",
             headers={"api-token": self.api_token},
         )
@@ -68,7 +129,7 @@ class PaymentServices:
         }
 
     def get_entity_details(self, params=""):
-        send_request = requests.get(
+        send_request = self.http_client.get(
             self.url + f"api/v1/entity/details{params}",
             headers={"api-token": self.api_token},
         )
@@ -86,7 +147,7 @@ class PaymentServices:
 
     def save_entity(self, data={}):
         # print("--save_entity--", data)
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/entity",
             json=data,
             headers={"api-token": self.api_token},
@@ -105,7 +166,7 @@ class PaymentServices:
 
     def update_entity(self, id=None, data={}):
         # print("--update_entity--", data)
-        send_request = requests.patch(
+        send_request = self.http_client.patch(
             self.url + f"api/v1/entity/{id}",
             json=data,
             headers={"api-token": self.api_token},
@@ -124,7 +185,7 @@ class PaymentServices:
 
     def save_entity_meta(self, data={}):
         # print("--save_entity_meta--", data)
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/entity_meta",
             json=data,
             headers={"api-token": self.api_token},
@@ -143,7 +204,7 @@ class PaymentServices:
 
     def save_institution(self, data={}):
         # print("--save_institution--", data)
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/institution",
             json=data,
             headers={"api-token": self.api_token},
@@ -162,7 +223,7 @@ class PaymentServices:
 
     def update_institution(self, id=None, data={}):
         # print("--update_institution--", data)
-        send_request = requests.patch(
+        send_request = self.http_client.patch(
             self.url + f"api/v1/institution/{id}",
             json=data,
             headers={"api-token": self.api_token},
@@ -181,7 +242,7 @@ class PaymentServices:
 
     def get_institution(self, params=""):
         # print("--get_institution--", params)
-        send_request = requests.get(
+        send_request = self.http_client.get(
             self.url + f"api/v1/institution{params}",
             headers={"api-token": self.api_token},
         )
@@ -199,7 +260,7 @@ class PaymentServices:
 
     def update_entity_contact_details(self, id=None, data={}):
         # print("--update_entity_contact_details--", data)
-        send_request = requests.patch(
+        send_request = self.http_client.patch(
             self.url + f"api/v1/contact_detail/{id}",
             json=data,
             headers={"api-token": self.api_token},
@@ -218,7 +279,7 @@ class PaymentServices:
 
     def save_entity_contact_details(self, data={}):
         # print("--save_entity_contact_details--", data)
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/contact_detail",
             json=data,
             headers={"api-token": self.api_token},
@@ -237,7 +298,7 @@ class PaymentServices:
 
     def get_entity_contact_details(self, params=""):
         # print("--get_entity_contact_details--", params)
-        send_request = requests.get(
+        send_request = self.http_client.get(
             self.url + f"api/v1/contact_detail{params}",
             headers={"api-token": self.api_token},
         )
@@ -255,7 +316,7 @@ class PaymentServices:
 
     def get_entity_address(self, params=""):
         # print("--get_entity_address--", params)
-        send_request = requests.get(
+        send_request = self.http_client.get(
             self.url + f"api/v1/address{params}",
             headers={"api-token": self.api_token},
         )
@@ -273,7 +334,7 @@ class PaymentServices:
 
     def save_entity_address(self, data={}):
         # print("--save_entity_address--", data)
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/address",
             json=data,
             headers={"api-token": self.api_token},
@@ -292,7 +353,7 @@ class PaymentServices:
 
     def update_entity_address(self, id=None, data={}):
         # print("--update_entity_address--", data)
-        send_request = requests.patch(
+        send_request = self.http_client.patch(
             self.url + f"api/v1/address/{id}",
             json=data,
             headers={"api-token": self.api_token},
@@ -311,7 +372,7 @@ class PaymentServices:
 
     def save_institution_accounts(self, data={}):
         # print("--save_institution_accounts--", data)
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/accounts",
             json=data,
             headers={"api-token": self.api_token},
@@ -330,7 +391,7 @@ class PaymentServices:
 
     def update_institution_accounts(self, id=None, data={}):
         # print("--update_institution_accounts--", data)
-        send_request = requests.patch(
+        send_request = self.http_client.patch(
             self.url + f"api/v1/accounts/{id}",
             json=data,
             headers={"api-token": self.api_token},
@@ -349,7 +410,7 @@ class PaymentServices:
 
     def get_institution_accounts(self, params=""):
         # print("--get_institution_accounts--", params)
-        send_request = requests.get(
+        send_request = self.http_client.get(
             self.url + f"api/v1/accounts{params}",
             headers={"api-token": self.api_token},
         )
@@ -365,39 +426,81 @@ class PaymentServices:
             "payload": payload,
         }
 
-    def add_in_payment_services(self):
-        # save entity
-        saved_entity = self.add_in_entity()
-
-        # checking, if data saved/updated in entity
-        if saved_entity["status_code"] in [200, 201]:
-            entity_id = saved_entity["payload"]["id"]
+    def add_in_payment_services(self, raise_on_error=True):
+        """[Sync request_type to payment services]
 
-            # checking, if entity' label exists in entity contact detail
-            if self.request_type_dict and "email" in self.request_type_dict:
-                self.add_in_entity_contact_details(entity_id=entity_id, label="email")
-                # print("--payee email--", self.request_type.email)
+        Steps run as soon as the steps they depend on are done, contact
+        details, address and institution only need the entity.
 
-            if self.request_type_dict and "phone" in self.request_type_dict:
-                self.add_in_entity_contact_details(entity_id=entity_id, label="phone")
-                # print("--payee phone--", self.request_type.phone)
+        Args:
+            raise_on_error (bool, optional): raise PaymentServicesSyncError if a step failed. Defaults to True.
 
-            saved_entity_address = self.add_in_entity_address(entity_id=entity_id)
-            print("--saved_entity_address--", saved_entity_address)
+        Returns:
+            dict: {"steps": step name -> {status, result, error, elapsed_ms, started_ms}, "elapsed_ms"}
+        """
+        # resolved before the steps run in parallel
+        self.request_id
+        request_type_dict = self.request_type_dict or {}
 
-            saved_institution = self.add_in_institution(entity_id=entity_id)
-            print("--saved_institution--", saved_institution)
+        def entity_id_of(dependencies):
+            saved_entity = dependencies["entity"]
+            if saved_entity["status_code"] not in [200, 201]:
+                raise SkipStep(f"entity not saved: {saved_entity['msg']}")
+            return saved_entity["payload"]["id"]
 
+        def institution_id_of(dependencies):
+            saved_institution = dependencies["institution"]
             if (
-                saved_institution["status_code"] in [200, 201]
-                and saved_institution["payload"]
+                saved_institution["status_code"] not in [200, 201]
+                or not saved_institution["payload"]
             ):
-                institution_id = saved_institution["payload"]["id"]
+                raise SkipStep(f"institution not saved: {saved_institution['msg']}")
+            return saved_institution["payload"]["id"]
 
-                saved_institution_accounts = self.add_in_institution_accounts(
-                    institution_id=institution_id,
+        dag = DagExecutor(
+            max_concurrency=int(os.getenv("PAYMENT_SERVICES_SYNC_CONCURRENCY", 4))
+        )
+        dag.add("entity", lambda dependencies: self.add_in_entity())
+
+        # checking, if entity' label exists in entity contact detail
+        for label in ["email", "phone"]:
+            if label in request_type_dict:
+                dag.add(
+                    f"entity_contact_details_{label}",
+                    lambda dependencies, label=label: self.add_in_entity_contact_details(
+                        entity_id=entity_id_of(dependencies), label=label
+                    ),
+                    depends_on=["entity"],
                 )
-                print("--saved_institution_accounts--", saved_institution_accounts)
+
+        dag.add(
+            "entity_address",
+            lambda dependencies: self.add_in_entity_address(
+                entity_id=entity_id_of(dependencies)
+            ),
+            depends_on=["entity"],
+        )
+        dag.add(
+            "institution",
+            lambda dependencies: self.add_in_institution(
+                entity_id=entity_id_of(dependencies)
+            ),
+            depends_on=["entity"],
+        )
+        dag.add(
+            "institution_accounts",
+            lambda dependencies: self.add_in_institution_accounts(
+                institution_id=institution_id_of(dependencies)
+            ),
+            depends_on=["institution"],
+        )
+        results = dag.run()
+
+        if raise_on_error and any(
+            step["status"] == "failed" for step in results["steps"].values()
+        ):
+            raise PaymentServicesSyncError(results)
+        return results
 
     def add_in_entity(self):
         # get entity
@@ -438,13 +541,14 @@ class PaymentServices:
             # print("--get_entity--", get_entity["payload"])
             entity_id = get_entity["payload"]["id"]
 
+            if self.diff_first and self.matches_remote(get_entity["payload"], entity_data):
+                return self.unchanged(get_entity["payload"])
+
             # update existing data in entity
             saved_entity = self.update_entity(id=entity_id, data=entity_data)
-            print("--updated_entity--", saved_entity)
         else:
             # save new data in entity
             saved_entity = self.save_entity(data=entity_data)
-            print("--saved_entity--", saved_entity)
 
         return saved_entity
 
@@ -469,13 +573,18 @@ class PaymentServices:
                 and get_entity_contact_details["payload"]
             ):
                 contact_details_id = get_entity_contact_details["payload"]["id"]
+
+                if self.diff_first and self.matches_remote(
+                    get_entity_contact_details["payload"],
+                    {"contact_value": self.request_type_dict[label]},
+                ):
+                    return self.unchanged(get_entity_contact_details["payload"])
                 
                 # update data in address of entity
                 saved_contact_details = self.update_entity_contact_details(
                     id=contact_details_id,
                     data={"contact_value": self.request_type_dict[label]},
                 )
-                print("--updated contact_details email--", saved_contact_details)
             else:
                 # save new data in address of entity
                 saved_contact_details = self.save_entity_contact_details(
@@ -485,7 +594,6 @@ class PaymentServices:
                         "contact_value": self.request_type_dict[label],
                     }
                 )
-            print("--saved contact_details email--", saved_contact_details)
         return saved_contact_details
 
     def add_in_entity_address(self, entity_id=None):
@@ -539,11 +647,15 @@ class PaymentServices:
                 "postal_code": postal_code,
             }
 
+            if self.diff_first and self.matches_remote(
+                get_entity_address["payload"], entity_address_data
+            ):
+                return self.unchanged(get_entity_address["payload"])
+
             # update data in address of entity
             saved_entity_address = self.update_entity_address(
                 id=address_id, data=entity_address_data
             )
-            print(address_id, "--updated_entity_address--", saved_entity_address)
         else:
             address_line_1 = (
                 self.request_type_dict["address_line_1"]
@@ -685,11 +797,15 @@ class PaymentServices:
                 "country": country,
             }
 
+            if self.diff_first and self.matches_remote(
+                get_institution["payload"], institution_data
+            ):
+                return self.unchanged(get_institution["payload"])
+
             # update data in institution
             saved_institution = self.update_institution(
                 id=institution_id, data=institution_data
             )
-            print(institution_id, "--updated_institution--", saved_institution)
         else:
 
             institution_data = {
@@ -753,15 +869,25 @@ class PaymentServices:
                     # if banking_info and not isinstance(banking_info, dict):
                     #     banking_info = dict(banking_info)
                     
+                    remote_banking_info = get_institution_accounts["payload"].get(
+                        "attribute", get_institution_accounts["payload"].get(label_key)
+                    )
+                    if (
+                        self.diff_first
+                        and isinstance(banking_info, dict)
+                        and self.matches_remote(remote_banking_info, banking_info)
+                    ):
+                        saved_institution_accounts = self.unchanged(
+                            get_institution_accounts["payload"]
+                        )
+                        continue
+
                     # update data of institution accounts
                     if banking_info and isinstance(banking_info, dict):
                         saved_institution_accounts = self.update_institution_accounts(
                             id=institution_accounts_id,
                             data={"label": label_key, "attribute": banking_info},
                         )
-                        print(
-                            "--updated_institution_accounts--", saved_institution_accounts
-                        )
                 else:
                     # banking_info = (
                     #     self.req_data[label_key]
@@ -780,7 +906,6 @@ class PaymentServices:
                             "attribute": banking_info,
                         }
                     )
-                    print("--saved_institution_accounts--", saved_institution_accounts)
                 
 
             return saved_institution_accounts
@@ -802,7 +927,7 @@ class PaymentServices:
                 + f"api/v1/institution/accounts?ref_id={ref_id}&ref_id_type={ref_id_type}"
             )
 
-        send_request = requests.get(
+        send_request = self.http_client.get(
             url_params,
             headers={"api-token": self.api_token},
         )
@@ -820,7 +945,7 @@ class PaymentServices:
 
 
     def payment_processing(self, data={}):
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/transaction/process",
             json=data,
             headers={"api-token": self.api_token},
@@ -839,7 +964,7 @@ class PaymentServices:
 
 
     def transaction_status(self, data={}):
-        send_request = requests.post(
+        send_request = self.http_client.post(
             self.url + f"api/v1/transaction/status",
             json=data,
             headers={"api-token": self.api_token},
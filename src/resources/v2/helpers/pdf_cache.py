@@ -0,0 +1,106 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app
+
+
+class PdfCache(object):
+    """
+    Process wide LRU of generated pdf urls, keyed by the hash of the rendered
+    html and the template version. Entries expire after PDF_CACHE_TTL seconds,
+    the generated pdf url is not kept forever by the resources service.
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = ttl if ttl is not None else int(os.getenv("PDF_CACHE_TTL", 3600))
+        self.max_size = (
+            max_size
+            if max_size is not None
+            else int(os.getenv("PDF_CACHE_MAX_SIZE", 512))
+        )
+        self._entries = OrderedDict()
+        self._template_versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def template_version(self, template_name):
+        """
+        Hash of the template source, templates only change on deploy
+        """
+        with self._lock:
+            if template_name in self._template_versions:
+                return self._template_versions[template_name]
+
+        source, _, _ = current_app.jinja_env.loader.get_source(
+            current_app.jinja_env, template_name
+        )
+        version = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            self._template_versions[template_name] = version
+        return version
+
+    def key(self, template_name, html):
+        """[Content address of a rendered pdf]
+
+        Args:
+            template_name (str): html template name
+            html (str): rendered html
+
+        Returns:
+            str: cache key
+        """
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        return "{}:{}:{}:{}".format(
+            os.getenv("PDF_CACHE_VERSION", "1"),
+            template_name,
+            self.template_version(template_name),
+            digest,
+        )
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry:
+                # expired
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, pdf_url):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, pdf_url)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._template_versions.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+            }
+
+
+pdf_cache = PdfCache()
@@ -2,18 +2,16 @@ from flask import (
     json,
     Response,
     render_template,
-    make_response,
-    send_file,
 )
-import os
 from decimal import Decimal
 from src.models import *
 from src.resources.v2.schemas import *
 from datetime import datetime as dt
-from io import BytesIO
-from zipfile import ZipFile
-import requests
-from src.resources.v2.helpers import generate_pdf
+from src.resources.v2.helpers.document_zip import (
+    document_file_name,
+    stream_documents_zip,
+)
+from src.resources.v2.helpers import generate_pdf, generate_cached_pdf
 from src.resources.v2.helpers.helper import principal_settings
 from src.middleware.permissions import Permissions
 from pathlib import Path
@@ -656,32 +654,23 @@ class ReserveReleasePDF:
             self.html_template, data=self.reserve_release_details
         )
         
-        pdf_url = generate_pdf(file_name=file_name, html=html)
+        # completed/approved requests are downloaded repeatedly with the same html
+        if self.reserve_release.status.value in ["approved", "completed"]:
+            pdf_url = generate_cached_pdf(
+                file_name=file_name, html=html, html_template=self.html_template
+            )
+        else:
+            pdf_url = generate_pdf(file_name=file_name, html=html)
 
         if isinstance(pdf_url, Response):
             return pdf_url
 
         # Generating zip
-        memory_file = BytesIO()
-        with ZipFile(memory_file, "w") as zip:
-            pdf_download = requests.get(pdf_url)
-            zip.writestr(f"{file_name}.pdf", pdf_download.content)
-            # Downloading Documents
-            if self.reserve_release_supporting_documents:
-                for docs in self.reserve_release_supporting_documents:
-                    r = requests.get(docs["url"])
-                    # get url
-                    get_url = docs["url"]
-                    filename, file_extension = os.path.splitext(get_url)
-                    zip.writestr(docs["name"] + str(file_extension), r.content)
-        memory_file.seek(0)
-        response = make_response(
-            send_file(
-                memory_file,
-                attachment_filename=str(file_name) + ".zip",
-                as_attachment=True,
-            )
-        )
-        response.headers["Access-Control-Expose-Headers"] = "content-disposition"
-        response.headers["Cache-Control"] = "public, max-age=0"
-        return response
+        documents = [(f"{file_name}.pdf", pdf_url)]
+        # Downloading Documents
+        if self.reserve_release_supporting_documents:
+            for docs in self.reserve_release_supporting_documents:
+                documents.append(
+                    (document_file_name(docs["name"], docs["url"]), docs["url"])
+                )
+        return stream_documents_zip(file_name=file_name, documents=documents)
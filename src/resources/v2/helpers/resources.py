@@ -1,6 +1,8 @@
-import requests
 import os
+from src.http_client import get_http_client
+from flask import Response
 from .response import custom_response
+from .pdf_cache import pdf_cache
 from src.middleware.permissions import Permissions
 
 
@@ -14,7 +16,7 @@ def get_presigned_url(content_type=None, name=None, description=None):
     name = name
     description = description
 
-    make_request = requests.post(
+    make_request = get_http_client("resources").post(
         url + "api/v2/integrators/upload",
         json={
             "business_uuid": business_id,
@@ -56,7 +58,7 @@ def generate_pdf(file_name=None, html=None):
     html_upload_url = html_upload.json()["payload"]["upload_url"]
     html_full_url = html_upload.json()["payload"]["full_url"]
 
-    is_uploaded = requests.put(
+    is_uploaded = get_http_client("resources").put(
         html_upload_url,
         data=html,
         headers={"Content-Type": content_type},
@@ -69,7 +71,7 @@ def generate_pdf(file_name=None, html=None):
     url = os.environ.get("RESOURCES_URL")
     api_token = os.environ.get("RESOURCES_API_TOKEN")
 
-    pdf = requests.post(
+    pdf = get_http_client("resources").post(
         url + "api/v2/integrators/generate",
         json={
             "folder_id": "",
@@ -94,3 +96,28 @@ def generate_pdf(file_name=None, html=None):
     pdf_url = pdf.json()["payload"]["full_url"]
 
     return pdf_url
+
+
+def generate_cached_pdf(file_name=None, html=None, html_template=None):
+    """[generate_pdf, reusing the pdf generated earlier for the same html]
+
+    Args:
+        file_name (str, optional): pdf file name. Defaults to None.
+        html (str, optional): rendered html. Defaults to None.
+        html_template (str, optional): template html was rendered from. Defaults to None.
+
+    Returns:
+        pdf url or error response
+    """
+    if not html or not html_template:
+        return generate_pdf(file_name=file_name, html=html)
+
+    cache_key = pdf_cache.key(html_template, html)
+    pdf_url = pdf_cache.get(cache_key)
+    if pdf_url:
+        return pdf_url
+
+    pdf_url = generate_pdf(file_name=file_name, html=html)
+    if not isinstance(pdf_url, Response):
+        pdf_cache.set(cache_key, pdf_url)
+    return pdf_url
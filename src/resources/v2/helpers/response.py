@@ -1,15 +1,19 @@
 from flask import json, Response
 import os
 from src.resources.v2.helpers.convert_datetime import utc_to_local
+from src.middleware.profiling import profile_serialization
 
 
 def custom_response(data, status_code=200):
     """
     Custom Response Function
     """
+    with profile_serialization():
+        response = json.dumps(data)
+
     return Response(
         mimetype="application/json",
-        response=json.dumps(data),
+        response=response,
         status=status_code,
         headers={"Current-Date": utc_to_local()},
     )
@@ -33,9 +37,12 @@ def api_response(
     if payload is not None or payload == [] or payload == {}:
         response["payload"] = payload
 
+    with profile_serialization():
+        response = json.dumps(dict(response, source=source))
+
     return Response(
         mimetype="application/json",
-        response=json.dumps(dict(response, source=source)),
+        response=response,
         status=status_code,
         headers={"Current-Date": utc_to_local()},
     )
@@ -0,0 +1,92 @@
+import threading
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from src.resources.v2.models.search_index_model import (
+    SearchIndex,
+    SEARCH_INDEX_FIELDS,
+    is_search_index_enabled,
+)
+
+
+def search_filter(column, ref_type, fields, search):
+    """[Limit column(id) to rows having search in one of the fields]
+
+    Args:
+        column (Column): id column of the listing, e.g. SOA.id, SOA.client_id
+        ref_type (str): key of SEARCH_INDEX_FIELDS
+        fields (list): indexed columns to search
+        search (str): search term
+
+    Returns:
+        BinaryExpression: filter criterion
+    """
+    return column.in_(SearchIndex.matching_ids(ref_type, fields, search))
+
+
+def mark_search_index_pending(ref_type, target):
+    session = object_session(target)
+    if session is not None:
+        pending = session.info.setdefault("_search_index_pending", {})
+        pending.setdefault(ref_type, set()).add(target.id)
+
+
+def on_inserted_or_deleted(ref_type):
+    def listener(mapper, connection, target):
+        mark_search_index_pending(ref_type, target)
+
+    return listener
+
+
+def on_updated(ref_type, fields):
+    def listener(mapper, connection, target):
+        # only rows with a changed indexed column
+        attrs = inspect(target).attrs
+        if any(attrs[field].history.has_changes() for field in fields):
+            mark_search_index_pending(ref_type, target)
+
+    return listener
+
+
+def refresh_search_index(session, flush_context):
+    pending = session.info.pop("_search_index_pending", None)
+    if not pending:
+        return
+
+    connection = session.connection()
+    for ref_type, ref_ids in pending.items():
+        SearchIndex.refresh(connection, ref_type, ref_ids)
+
+
+def discard_search_index_pending(session, previous_transaction):
+    session.info.pop("_search_index_pending", None)
+
+
+_maintenance_registered = False
+_maintenance_lock = threading.Lock()
+
+
+def init_search_index():
+    """[Keep search_index rows in step with their source rows, if SEARCH_INDEX_ENABLED]
+
+    Rows inserted/updated/deleted through the ORM are re-indexed in the
+    same transaction, after the flush. Query(...).update()/delete() and raw
+    sql are not seen, run `python manage.py search_index_rebuild` after
+    changing indexed columns that way.
+    """
+    global _maintenance_registered
+
+    if not is_search_index_enabled():
+        return
+
+    with _maintenance_lock:
+        if _maintenance_registered:
+            return
+
+        for ref_type in SEARCH_INDEX_FIELDS:
+            model, fields = SearchIndex.source(ref_type)
+            event.listen(model, "after_insert", on_inserted_or_deleted(ref_type))
+            event.listen(model, "after_delete", on_inserted_or_deleted(ref_type))
+            event.listen(model, "after_update", on_updated(ref_type, fields))
+        event.listen(Session, "after_flush_postexec", refresh_search_index)
+        event.listen(Session, "after_soft_rollback", discard_search_index_pending)
+        _maintenance_registered = True
@@ -7,7 +7,8 @@ from src.middleware.permissions import Permissions
 from src.resources.v2.helpers import custom_response
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, func
+from src import db
 from src.resources.v2.helpers.convert_datetime import utc_to_local
 
 soa_schema = SOASchema()
@@ -45,7 +46,7 @@ class SOADetails:
         self.saved_client_debtors = None
         self.saved_participants = None
         self.saved_client_settings = None
-        self.soa_invoice_ids = []
+        self.soa_invoice_ids = set()
         self.has_invoice_debtors = False
         self.has_invoice_approved = False
 
@@ -263,121 +264,250 @@ class SOADetails:
             pay.update({"accounts": []})
         return payee_objects_dict
 
+    def prefetch_client_debtors(self, debtor_ids):
+        """
+        Most recent not deleted client debtor of soa's client, by debtor id
+        """
+        client_debtors = {}
+        if not debtor_ids:
+            return client_debtors
+
+        get_client_debtors = (
+            ClientDebtor.query.filter(
+                ClientDebtor.is_deleted == False,
+                ClientDebtor.client_id == self.soa.client_id,
+                ClientDebtor.debtor_id.in_(debtor_ids),
+            )
+            .order_by(ClientDebtor.id.asc())
+            .all()
+        )
+        for client_debtor in get_client_debtors:
+            client_debtors.setdefault(client_debtor.debtor_id, client_debtor)
+        return client_debtors
+
+    def prefetch_duplicate_debtor_names(self, debtor_names, debtor_ids):
+        """
+        Count of not deleted debtors by name and (debtor id, name) of the
+        invoice debtors, for checking potential duplicated debtor
+        """
+        names_count = {}
+        debtor_id_names = set()
+        if not debtor_names:
+            return names_count, debtor_id_names
+
+        get_names_count = (
+            db.session.query(Debtor.name, func.count(Debtor.id))
+            .filter(
+                Debtor.is_deleted == False,
+                Debtor.name.in_(debtor_names),
+            )
+            .group_by(Debtor.name)
+            .all()
+        )
+        # names are compared case insensitive in db
+        for name, count in get_names_count:
+            names_count[name.lower()] = names_count.get(name.lower(), 0) + count
+
+        if debtor_ids:
+            get_debtor_names = (
+                db.session.query(Debtor.id, Debtor.name)
+                .filter(
+                    Debtor.is_deleted == False,
+                    Debtor.id.in_(debtor_ids),
+                    Debtor.name.in_(debtor_names),
+                )
+                .all()
+            )
+            debtor_id_names = {
+                (debtor_id, name.lower()) for debtor_id, name in get_debtor_names
+            }
+        return names_count, debtor_id_names
+
+    def prefetch_null_name_debtors(self, debtor_ids):
+        """
+        Count of not deleted debtors without name and the invoice debtors
+        without name, for checking potential duplicated debtor
+        """
+        null_names_count = (
+            db.session.query(func.count(Debtor.id))
+            .filter(Debtor.is_deleted == False, Debtor.name == None)
+            .scalar()
+        ) or 0
+
+        null_name_debtor_ids = set()
+        if null_names_count and debtor_ids:
+            null_name_debtor_ids = {
+                debtor_id
+                for debtor_id, in db.session.query(Debtor.id).filter(
+                    Debtor.is_deleted == False,
+                    Debtor.name == None,
+                    Debtor.id.in_(debtor_ids),
+                )
+            }
+        return null_names_count, null_name_debtor_ids
+
     @property
     def get_invoices(self):
-        get_invoice = self.soa.get_all_invoices_details()
+        get_invoice = self.soa.get_all_invoices_details().fetchall()
 
         if get_invoice:
+            # checking to stop multiple loops, if debtor is deleted from debtor/client debtor table
+            get_invoice = [
+                each_invoice
+                for each_invoice in get_invoice
+                if each_invoice["id"] not in self.soa_invoice_ids
+            ]
+
+            # client debtors of invoices, fetched once for all invoices
+            client_debtors = self.prefetch_client_debtors(
+                {
+                    each_invoice["debtor"]
+                    for each_invoice in get_invoice
+                    if each_invoice["debtor_is_deleted"] == False
+                }
+            )
+
+            # saved debtors and client debtors from approval history, by key
+            saved_debtors = {}
+            if self.saved_debtors:
+                for debtor in self.saved_debtors:
+                    saved_debtors.setdefault(debtor["id"], debtor)
+
+            saved_client_debtors = {}
+            if self.saved_client_debtors:
+                for client_debtor in self.saved_client_debtors:
+                    saved_client_debtors.setdefault(
+                        (client_debtor["debtor_id"], client_debtor["client_id"]),
+                        client_debtor,
+                    )
+
+            invoices = []
             for each_invoice in get_invoice:
                 debtor_name = None
                 debtor_id = None
-                potential_duplicated_debtor = False
                 current_ar = float(0)
                 credit_limit = float(0)
 
-                # checking to stop multiple loops, if debtor is deleted from debtor/client debtor table
-                if each_invoice["id"] not in self.soa_invoice_ids:
-                    if each_invoice["debtor"]:
-                        self.has_invoice_debtors = True
-
-                    has_client_debtor = False
-                    # checking for most recent client debtor based off client id and debtor id, is deleted or not
-                    if each_invoice["debtor_is_deleted"] == False:
-                        has_client_debtor = ClientDebtor.query.filter(
-                            ClientDebtor.is_deleted == False,
-                            ClientDebtor.client_id == self.soa.client_id,
-                            ClientDebtor.debtor_id == each_invoice["debtor"],
-                        ).first()
-
-                    # get debtors and client debtors from db, if invoice's are approved and soa not approved
-                    if (
-                        (each_invoice["status"] == "approved")
-                        and (not self.saved_debtors)
-                        and (not self.saved_client_debtors)
-                    ):
-                        if "debtor" in each_invoice:
-                            debtor_id = each_invoice["debtor"]
-                        if "debtor_name" in each_invoice:
-                            debtor_name = each_invoice["debtor_name"]
-                        if "current_ar" in each_invoice:
-                            current_ar = each_invoice["current_ar"]
-                        if "credit_limit" in each_invoice:
-                            credit_limit = each_invoice["credit_limit"]
-                        self.has_invoice_approved = True
-                    # get debtors and client debtors from db which are not deleted
-                    elif each_invoice["debtor_is_deleted"] == False and bool(
-                        has_client_debtor
-                    ):
+                # group by i.id, still skip repeated rows
+                if each_invoice["id"] in self.soa_invoice_ids:
+                    continue
+
+                if each_invoice["debtor"]:
+                    self.has_invoice_debtors = True
+
+                has_client_debtor = False
+                # checking for most recent client debtor based off client id and debtor id, is deleted or not
+                if each_invoice["debtor_is_deleted"] == False:
+                    has_client_debtor = client_debtors.get(each_invoice["debtor"])
+
+                # get debtors and client debtors from db, if invoice's are approved and soa not approved
+                if (
+                    (each_invoice["status"] == "approved")
+                    and (not self.saved_debtors)
+                    and (not self.saved_client_debtors)
+                ):
+                    if "debtor" in each_invoice:
                         debtor_id = each_invoice["debtor"]
+                    if "debtor_name" in each_invoice:
                         debtor_name = each_invoice["debtor_name"]
-                        current_ar = has_client_debtor.current_ar
-                        credit_limit = has_client_debtor.credit_limit
-
-                    # get saved debtors from approval history
-                    if self.saved_debtors:
-                        get_saved_debtor = [
-                            debtor
-                            for debtor in self.saved_debtors
-                            if debtor["id"] == each_invoice["debtor"]
-                        ]
-                        if get_saved_debtor:
-                            debtor_name = get_saved_debtor[0]["name"]
-
-                    # get saved client debtors from approval history
-                    if self.saved_client_debtors:
-                        get_saved_client_debtor = [
-                            client_debtor
-                            for client_debtor in self.saved_client_debtors
-                            if client_debtor["debtor_id"] == each_invoice["debtor"]
-                            and client_debtor["client_id"] == each_invoice["client_id"]
-                        ]
-
-                        if get_saved_client_debtor:
-                            current_ar = get_saved_client_debtor[0]["current_ar"]
-                            credit_limit = get_saved_client_debtor[0]["credit_limit"]
-
-                    get_debtor = Debtor.query.filter(
-                        Debtor.is_deleted == False,
-                        Debtor.name == debtor_name,
-                        Debtor.id != debtor_id,
-                    ).count()
-                    if get_debtor:
-                        potential_duplicated_debtor = True
-
-                    # get invoices of soa from invoice table
-                    inv = {
-                        "id": each_invoice["id"],
-                        "client_id": each_invoice["client_id"],
-                        "soa_id": each_invoice["soa_id"],
-                        "debtor": debtor_id,
-                        "invoice_number": each_invoice["invoice_number"],
-                        "invoice_date": each_invoice["invoice_date"],
-                        "amount": each_invoice["amount"],
-                        "po_number": each_invoice["po_number"],
-                        "notes": each_invoice["notes"],
-                        "added_by": each_invoice["added_by"],
-                        "verified_by": each_invoice["verified_by"],
-                        "status": each_invoice["status"],
-                        "terms": each_invoice["terms"],
-                        "is_credit_insured": each_invoice["is_credit_insured"],
-                        "actions": each_invoice["actions"],
-                        "is_release_from_reserve": each_invoice[
-                            "is_release_from_reserve"
-                        ],
-                        "created_at": utc_to_local(dt=each_invoice["created_at"]),
-                        "updated_at": utc_to_local(dt=each_invoice["updated_at"]),
-                        "is_deleted": each_invoice["is_deleted"],
-                        "current_ar": current_ar,
-                        "credit_limit": credit_limit,
-                        "debtor_name": debtor_name,
-                        "potential_duplicated_debtor": potential_duplicated_debtor,
-                        "invoice_days": each_invoice["invoice_days"],
+                    if "current_ar" in each_invoice:
+                        current_ar = each_invoice["current_ar"]
+                    if "credit_limit" in each_invoice:
+                        credit_limit = each_invoice["credit_limit"]
+                    self.has_invoice_approved = True
+                # get debtors and client debtors from db which are not deleted
+                elif each_invoice["debtor_is_deleted"] == False and bool(
+                    has_client_debtor
+                ):
+                    debtor_id = each_invoice["debtor"]
+                    debtor_name = each_invoice["debtor_name"]
+                    current_ar = has_client_debtor.current_ar
+                    credit_limit = has_client_debtor.credit_limit
+
+                # get saved debtors from approval history
+                get_saved_debtor = saved_debtors.get(each_invoice["debtor"])
+                if get_saved_debtor:
+                    debtor_name = get_saved_debtor["name"]
+
+                # get saved client debtors from approval history
+                get_saved_client_debtor = saved_client_debtors.get(
+                    (each_invoice["debtor"], each_invoice["client_id"])
+                )
+                if get_saved_client_debtor:
+                    current_ar = get_saved_client_debtor["current_ar"]
+                    credit_limit = get_saved_client_debtor["credit_limit"]
+
+                invoices.append((each_invoice, debtor_id, debtor_name, current_ar, credit_limit))
+                self.soa_invoice_ids.add(each_invoice["id"])
+
+            # debtors having same name, fetched once for all invoices
+            names_count, debtor_id_names = self.prefetch_duplicate_debtor_names(
+                {
+                    debtor_name
+                    for _, _, debtor_name, _, _ in invoices
+                    if debtor_name is not None
+                },
+                {debtor_id for _, debtor_id, _, _, _ in invoices if debtor_id},
+            )
+
+            # debtors without name, fetched once for the invoices without debtor name
+            null_names_count, null_name_debtor_ids = 0, set()
+            if any(debtor_name is None for _, _, debtor_name, _, _ in invoices):
+                null_names_count, null_name_debtor_ids = self.prefetch_null_name_debtors(
+                    {
+                        debtor_id
+                        for _, debtor_id, debtor_name, _, _ in invoices
+                        if debtor_id and debtor_name is None
                     }
-                    self.invoices.append(inv)
-                    self.soa_invoice_ids.append(each_invoice["id"])
-                    # Get debtor id that is not deleted from debtor/client debtor table
-                    if debtor_id:
-                        self.invoices_debtor_ids.append(debtor_id)
+                )
+
+            for each_invoice, debtor_id, debtor_name, current_ar, credit_limit in invoices:
+                potential_duplicated_debtor = False
+                if debtor_name is not None:
+                    get_debtor = names_count.get(debtor_name.lower(), 0)
+                    if (debtor_id, debtor_name.lower()) in debtor_id_names:
+                        get_debtor -= 1
+                else:
+                    # debtor name is null
+                    get_debtor = null_names_count
+                    if debtor_id in null_name_debtor_ids:
+                        get_debtor -= 1
+                if get_debtor:
+                    potential_duplicated_debtor = True
+
+                # get invoices of soa from invoice table
+                inv = {
+                    "id": each_invoice["id"],
+                    "client_id": each_invoice["client_id"],
+                    "soa_id": each_invoice["soa_id"],
+                    "debtor": debtor_id,
+                    "invoice_number": each_invoice["invoice_number"],
+                    "invoice_date": each_invoice["invoice_date"],
+                    "amount": each_invoice["amount"],
+                    "po_number": each_invoice["po_number"],
+                    "notes": each_invoice["notes"],
+                    "added_by": each_invoice["added_by"],
+                    "verified_by": each_invoice["verified_by"],
+                    "status": each_invoice["status"],
+                    "terms": each_invoice["terms"],
+                    "is_credit_insured": each_invoice["is_credit_insured"],
+                    "actions": each_invoice["actions"],
+                    "is_release_from_reserve": each_invoice[
+                        "is_release_from_reserve"
+                    ],
+                    "created_at": utc_to_local(dt=each_invoice["created_at"]),
+                    "updated_at": utc_to_local(dt=each_invoice["updated_at"]),
+                    "is_deleted": each_invoice["is_deleted"],
+                    "current_ar": current_ar,
+                    "credit_limit": credit_limit,
+                    "debtor_name": debtor_name,
+                    "potential_duplicated_debtor": potential_duplicated_debtor,
+                    "invoice_days": each_invoice["invoice_days"],
+                }
+                self.invoices.append(inv)
+                # Get debtor id that is not deleted from debtor/client debtor table
+                if debtor_id:
+                    self.invoices_debtor_ids.append(debtor_id)
 
             return self.invoices
 
@@ -664,18 +794,28 @@ class SOADetails:
                 self.get_invoices
 
             if self.invoices_debtor_ids:
-                for invoice_debtor_id in self.invoices_debtor_ids:
-                    if self.has_invoice_approved and (not self.saved_debtors):
-                        get_debtor = Debtor.query.filter(
-                            Debtor.id == invoice_debtor_id
-                        ).first()
-                    else:
-                        get_debtor = Debtor.query.filter(
-                            Debtor.is_deleted == False, Debtor.id == invoice_debtor_id
-                        ).first()
+                # unique debtor ids, in invoices order
+                invoice_debtor_ids = list(dict.fromkeys(self.invoices_debtor_ids))
+
+                if self.has_invoice_approved and (not self.saved_debtors):
+                    get_debtors = Debtor.query.filter(
+                        Debtor.id.in_(invoice_debtor_ids)
+                    ).all()
+                else:
+                    get_debtors = Debtor.query.filter(
+                        Debtor.is_deleted == False, Debtor.id.in_(invoice_debtor_ids)
+                    ).all()
+                debtors = {get_debtor.id: get_debtor for get_debtor in get_debtors}
+
+                has_missing_debtor = False
+                for invoice_debtor_id in invoice_debtor_ids:
+                    get_debtor = debtors.get(invoice_debtor_id)
+                    if not get_debtor:
+                        if has_missing_debtor:
+                            continue
+                        has_missing_debtor = True
                     debtor = debtor_schema.dump(get_debtor).data
-                    if debtor not in debtor_dict:
-                        debtor_dict.append(debtor)
+                    debtor_dict.append(debtor)
         return debtor_dict
 
     @property
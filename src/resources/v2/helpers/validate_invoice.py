@@ -1,10 +1,11 @@
 from flask import request
 from src.models import *
 from src.resources.v2.schemas import *
-import requests
 from datetime import datetime
 import os
+from src.http_client import get_http_client
 from src.resources.v2.helpers import custom_response
+from src.resources.v2.helpers.invoice_sets_payload import encode_invoice_sets
 
 
 def validate_invoice(client_ref_key):
@@ -19,7 +20,7 @@ def validate_invoice(client_ref_key):
         # defining a params dict for the parameters to be sent to the API
 
         params = {"clientKey": client_ref_key}
-        r = requests.get(url=url, params=params, headers=headers, timeout=8)
+        r = get_http_client("third_party").get(url=url, params=params, headers=headers)
 
         # extracting data in json format
         data = r.json()
@@ -45,7 +46,7 @@ def validate_invoice_debtor(client_ref_key):
         # defining a params dict for the parameters to be sent to the API
 
         params = {"clientKey": client_ref_key}
-        r = requests.get(url=url, params=params, headers=headers, timeout=8)
+        r = get_http_client("third_party").get(url=url, params=params, headers=headers)
 
         # extracting data in json format
         data = r.json()
@@ -60,6 +61,8 @@ def validate_invoice_debtor(client_ref_key):
 
 
 class CadenceValidateInvoices:
+    invoice_numbers_batch_size = 1000
+
     def __init__(
         self,
         soa,
@@ -123,15 +126,17 @@ class CadenceValidateInvoices:
         params = {
             "client_ref_key": self.client_ref_key,
             "validate_invoices": self.validate_invoices,
-            "debtor_swap": str(self.debtor_swap),
-            "debtors": str(self.debtors),
-            "funding_invoices": str(self.funding_invoices),
             "debtor_ref_key_exists": self.debtor_ref_key_exists,
-            "funding_unique_invoices": str(self.funding_unique_invoices),
-            "funding_unique_invoices_update": str(self.funding_unique_invoices_update),
+            "invoice_sets": encode_invoice_sets(
+                debtors=self.debtors,
+                debtor_swap=self.debtor_swap,
+                funding_invoices=self.funding_invoices,
+                funding_unique_invoices=self.funding_unique_invoices,
+                funding_unique_invoices_update=self.funding_unique_invoices_update,
+            ),
         }
 
-        r = requests.post(url=api_url, json=params, timeout=30)
+        r = get_http_client("aws_lambda").post(url=api_url, json=params)
         if r.status_code == 200:
             data = r.json()
             self.already_exist_funding = data["already_exist_funding"]
@@ -155,7 +160,7 @@ class CadenceValidateInvoices:
             "debtors": invoice_debtors,
             "invoices": self.all_invoice_numbers,
         }
-        r = requests.post(url=api_url, json=params, headers=api_headers, timeout=8)
+        r = get_http_client("third_party").post(url=api_url, json=params, headers=api_headers)
         if r.status_code == 200:
             data = r.json()
             self.cadence_invoices = data["invoices"]
@@ -187,18 +192,25 @@ class CadenceValidateInvoices:
             .filter(Invoice.is_deleted == False)
         )
         # pulling invoices only of approved/completed SOA(LC-2291)
-        self.funding_invoices = (
-            all_invoices.filter(Invoice.invoice_number.in_(self.all_invoice_numbers),
-            SOA.status.in_(
-                    [
-                        "approved",
-                        "completed",
-                    ]
-                ),
+        # in batches of invoice numbers, to keep IN lists bounded for large uploads
+        invoice_numbers = list(dict.fromkeys(self.all_invoice_numbers))
+        self.funding_invoices = []
+        for i in range(0, len(invoice_numbers), self.invoice_numbers_batch_size):
+            self.funding_invoices.extend(
+                all_invoices.filter(
+                    Invoice.invoice_number.in_(
+                        invoice_numbers[i : i + self.invoice_numbers_batch_size]
+                    ),
+                    SOA.status.in_(
+                        [
+                            "approved",
+                            "completed",
+                        ]
+                    ),
+                )
+                .with_entities(Debtor.ref_key, Invoice.invoice_number_lower)
+                .all()
             )
-            .with_entities(Debtor.ref_key, Invoice.invoice_number_lower)
-            .all()
-        )
         self.funding_unique_invoices = (
             all_invoices.filter(Invoice.soa_id == self.soa.id)
             .with_entities(
@@ -246,6 +258,14 @@ class CadenceValidateInvoices:
         already_exist_cadence = []
         wrong_invoice_data = []
 
+        # hash indexes, built once per call, for membership checks
+        funding_invoices = set(map(tuple, self.funding_invoices))
+        funding_unique_invoices = set(map(tuple, self.funding_unique_invoices))
+        funding_unique_invoices_update = set(
+            map(tuple, self.funding_unique_invoices_update)
+        )
+        cadence_invoices = set(self.cadence_invoices)
+
         for invoice in self.validate_invoices:
             # Don't need created_at and updated_at from frontend
             if "created_at" in invoice:
@@ -273,7 +293,7 @@ class CadenceValidateInvoices:
                     ref_key = int(invoice["ref_key"])
 
                 # Checking against funding DB debtors - like ((36427,) in self.funding_invoices):
-                if ref_key not in self.debtors.keys():
+                if ref_key not in self.debtors:
                     invoice["msg"] = "Invoice having wrong debtor"
                     wrong_debtors.append(invoice)
                     continue
@@ -283,7 +303,7 @@ class CadenceValidateInvoices:
                 if invoice["debtor"]:
                     debtor_id = int(invoice["debtor"])
 
-                if debtor_id not in self.debtor_swap.keys():
+                if debtor_id not in self.debtor_swap:
                     invoice["msg"] = "Invoice having wrong debtor"
                     wrong_debtors.append(invoice)
                     continue
@@ -302,8 +322,8 @@ class CadenceValidateInvoices:
                         invoice["debtor"],
                         invoice_number,
                     )
-                    in self.funding_unique_invoices
-                    and ((ref_key, invoice_number) not in self.funding_invoices)
+                    in funding_unique_invoices
+                    and ((ref_key, invoice_number) not in funding_invoices)
                 # Checking against ref_key == 0 and funding DB invoices - like ((191590, 1572, 'we13') in self.funding_invoices):
                 ) or (
                     not ref_key
@@ -312,21 +332,21 @@ class CadenceValidateInvoices:
                         invoice["client_id"],
                         invoice_number,
                     )
-                    in self.funding_unique_invoices_update
-                    and ((ref_key, invoice_number) not in self.funding_invoices)
+                    in funding_unique_invoices_update
+                    and ((ref_key, invoice_number) not in funding_invoices)
                 # Checking against funding DB invoices - like ((0, 'we13') not in self.funding_invoices):
-                ) or ((ref_key, invoice_number) not in self.funding_invoices):
+                ) or ((ref_key, invoice_number) not in funding_invoices):
                     update_invoices.append(invoice)
                     continue
 
             # Checking against funding DB invoices- like ((36427, '43d2d17c6d0b51f69d049541e3977a3133xx') in self.funding_invoices):
-            if (ref_key, invoice_number) in self.funding_invoices:
+            if (ref_key, invoice_number) in funding_invoices:
                 already_exist_funding.append(invoice)
                 continue
 
             # Checking against funding DB invoices- like ('4606|OA-7353 in self.cadence_invoices):
             # And invoice isn't updating
-            if f"{ref_key}|{invoice_number}" in self.cadence_invoices:
+            if f"{ref_key}|{invoice_number}" in cadence_invoices:
                 already_exist_cadence.append(invoice)
                 continue
 
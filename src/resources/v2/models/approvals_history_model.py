@@ -1,5 +1,129 @@
 from src import db
+import os
+import json
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from sqlalchemy.ext.hybrid import hybrid_property
+
+# attribute values(dict/list) at least this size(json bytes) are stored once
+# in approvals_history_snapshots and referenced as {"$snapshot": sha256}
+SNAPSHOT_REF_KEY = "$snapshot"
+SNAPSHOT_MIN_SIZE = int(os.getenv("APPROVALS_HISTORY_SNAPSHOT_MIN_SIZE", 256))
+
+
+class ApprovalsHistorySnapshot(db.Model):
+    """ ApprovalsHistorySnapshot model, content addressed zlib compressed json """
+
+    __tablename__ = "approvals_history_snapshots"
+
+    hash = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.LargeBinary(length=(2 ** 32) - 1), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # snapshots never change, decoded json text is kept by hash
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    cache_max_size = int(os.getenv("APPROVALS_HISTORY_SNAPSHOT_CACHE_SIZE", 2048))
+
+    @staticmethod
+    def encode(value):
+        """[Canonical json, its hash and compressed data]
+
+        Returns:
+            tuple: (hash, json text, compressed data)
+        """
+        text = json.dumps(value, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return digest, text, zlib.compress(text.encode("utf-8"))
+
+    @classmethod
+    def _cache_get(cls, digest):
+        with cls._cache_lock:
+            text = cls._cache.get(digest)
+            if text is not None:
+                cls._cache.move_to_end(digest)
+            return text
+
+    @classmethod
+    def _cache_set(cls, digest, text):
+        with cls._cache_lock:
+            cls._cache[digest] = text
+            cls._cache.move_to_end(digest)
+            while len(cls._cache) > cls.cache_max_size:
+                cls._cache.popitem(last=False)
+
+    @classmethod
+    def store(cls, values):
+        """[Store values not stored yet, in the current transaction]
+
+        Args:
+            values (dict): hash -> (json text, compressed data)
+        """
+        if not values:
+            return
+
+        existing = {
+            digest
+            for digest, in db.session.query(cls.hash).filter(
+                cls.hash.in_(list(values.keys()))
+            )
+        }
+        rows = [
+            {
+                "hash": digest,
+                "data": data,
+                "size": len(text),
+                "created_at": datetime.utcnow(),
+            }
+            for digest, (text, data) in values.items()
+            if digest not in existing
+        ]
+        if rows:
+            # IGNORE: the same snapshot saved by a concurrent request
+            db.session.execute(cls.__table__.insert().prefix_with("IGNORE"), rows)
+
+        for digest, (text, data) in values.items():
+            cls._cache_set(digest, text)
+
+    @classmethod
+    def load(cls, hashes):
+        """[Get snapshots by hash]
+
+        Args:
+            hashes (iterable): snapshot hashes
+
+        Returns:
+            dict: hash -> json text
+        """
+        texts = {}
+        missing = []
+        for digest in set(hashes):
+            text = cls._cache_get(digest)
+            if text is None:
+                missing.append(digest)
+            else:
+                texts[digest] = text
+
+        if missing:
+            for snapshot in cls.query.filter(cls.hash.in_(missing)).all():
+                text = zlib.decompress(snapshot.data).decode("utf-8")
+                cls._cache_set(snapshot.hash, text)
+                texts[snapshot.hash] = text
+        return texts
+
+
+def is_snapshot_ref(value):
+    return isinstance(value, dict) and len(value) == 1 and SNAPSHOT_REF_KEY in value
+
+
+def snapshot_refs(attribute):
+    if not isinstance(attribute, dict):
+        return []
+    return [value[SNAPSHOT_REF_KEY] for value in attribute.values() if is_snapshot_ref(value)]
 
 
 class ApprovalsHistory(db.Model):
@@ -24,7 +148,8 @@ class ApprovalsHistory(db.Model):
     key = db.Column(db.String(255), nullable=False)
     value = db.Column(db.String(255), nullable=False)
     user = db.Column(db.String(255), nullable=False)
-    attribute = db.Column(db.JSON, nullable=True)
+    # stored with snapshot refs, read/written through attribute
+    stored_attribute = db.Column("attribute", db.JSON, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -43,6 +168,110 @@ class ApprovalsHistory(db.Model):
         self.created_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
 
+    @hybrid_property
+    def attribute(self):
+        """
+        Attribute with snapshot refs replaced by the stored snapshots
+        """
+        stored_attribute = self.stored_attribute
+        resolved = self.__dict__.get("_resolved_attribute")
+        # resolved again when stored_attribute is reloaded(expired/refreshed)
+        if not resolved or resolved[0] is not stored_attribute:
+            resolved = (
+                stored_attribute,
+                ApprovalsHistory.resolve_attribute(stored_attribute),
+            )
+            self.__dict__["_resolved_attribute"] = resolved
+        return resolved[1]
+
+    @attribute.setter
+    def attribute(self, attribute):
+        stored_attribute = ApprovalsHistory.snapshot_attribute(attribute)
+        self.stored_attribute = stored_attribute
+        self.__dict__["_resolved_attribute"] = (stored_attribute, attribute)
+
+    @attribute.expression
+    def attribute(cls):
+        return cls.stored_attribute
+
+    @staticmethod
+    def snapshot_attribute(attribute):
+        """[Replace large attribute values with snapshot refs]
+
+        Args:
+            attribute (dict): approvals history attribute
+
+        Returns:
+            dict: attribute to be stored
+        """
+        if not isinstance(attribute, dict):
+            return attribute
+
+        stored_attribute = {}
+        snapshots = {}
+        for key, value in attribute.items():
+            if isinstance(value, (dict, list)) and not is_snapshot_ref(value):
+                digest, text, data = ApprovalsHistorySnapshot.encode(value)
+                if len(text) >= SNAPSHOT_MIN_SIZE:
+                    snapshots[digest] = (text, data)
+                    value = {SNAPSHOT_REF_KEY: digest}
+            stored_attribute[key] = value
+
+        ApprovalsHistorySnapshot.store(snapshots)
+        return stored_attribute
+
+    @staticmethod
+    def resolve_attribute(stored_attribute, snapshots=None):
+        """[Replace snapshot refs with the stored snapshots]
+
+        Args:
+            stored_attribute (dict): stored attribute
+            snapshots (dict, optional): hash -> json text, prefetched. Defaults to None.
+
+        Returns:
+            dict: attribute as it was saved
+        """
+        hashes = snapshot_refs(stored_attribute)
+        if not hashes:
+            return stored_attribute
+
+        if snapshots is None:
+            snapshots = {}
+        missing = [digest for digest in hashes if digest not in snapshots]
+        if missing:
+            snapshots = dict(snapshots, **ApprovalsHistorySnapshot.load(missing))
+
+        attribute = {}
+        for key, value in stored_attribute.items():
+            if is_snapshot_ref(value):
+                value = json.loads(snapshots[value[SNAPSHOT_REF_KEY]])
+            attribute[key] = value
+        return attribute
+
+    @staticmethod
+    def prefetch_attributes(approvals_history_list):
+        """[Resolve attributes of approvals history list with one snapshots query]
+
+        Args:
+            approvals_history_list (list): ApprovalsHistory
+        """
+        pending = [
+            approvals_history
+            for approvals_history in approvals_history_list
+            if approvals_history
+        ]
+        hashes = []
+        for approvals_history in pending:
+            hashes.extend(snapshot_refs(approvals_history.stored_attribute))
+        snapshots = ApprovalsHistorySnapshot.load(hashes) if hashes else {}
+
+        for approvals_history in pending:
+            stored_attribute = approvals_history.stored_attribute
+            approvals_history.__dict__["_resolved_attribute"] = (
+                stored_attribute,
+                ApprovalsHistory.resolve_attribute(stored_attribute, snapshots=snapshots),
+            )
+
     def save(self):
         db.session.add(self)
         db.session.commit()
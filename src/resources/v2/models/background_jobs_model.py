@@ -0,0 +1,307 @@
+from src import db
+import os
+import enum
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+
+
+class BackgroundJobType(enum.Enum):
+    lcra_export = "lcra_export"
+    payment_process = "payment_process"
+    notifications = "notifications"
+
+
+class BackgroundJobStatus(enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class BackgroundJob(db.Model):
+    """ BackgroundJob model, outbox for side effects of request status updates """
+
+    __tablename__ = "background_jobs"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_type = db.Column(db.Enum(BackgroundJobType), nullable=False)
+    ref_type = db.Column(db.String(50), nullable=False)
+    ref_id = db.Column(db.Integer, nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), nullable=True)
+    idempotency_key = db.Column(db.String(255), nullable=False, unique=True)
+    payload = db.Column(db.JSON)
+    status = db.Column(
+        db.Enum(BackgroundJobStatus), default=BackgroundJobStatus.pending.value
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_by = db.Column(db.String(255), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # Indexes
+    __table_args__ = (
+        db.Index("idx_background_jobs_status_run_at", "status", "run_at"),
+        db.Index("idx_background_jobs_ref", "ref_type", "ref_id"),
+    )
+
+    def __init__(self, data):
+        self.job_type = data.get("job_type")
+        self.ref_type = data.get("ref_type")
+        self.ref_id = data.get("ref_id")
+        self.client_id = data.get("client_id")
+        self.idempotency_key = data.get("idempotency_key")
+        self.payload = data.get("payload")
+        self.status = data.get("status", BackgroundJobStatus.pending.value)
+        self.attempts = 0
+        self.max_attempts = data.get("max_attempts", 5)
+        self.run_at = datetime.utcnow()
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
+
+    def update(self, data):
+        for key, item in data.items():
+            setattr(self, key, item)
+        self.updated_at = datetime.utcnow()
+        db.session.commit()
+
+    @staticmethod
+    def get_one_background_job(id):
+        return BackgroundJob.query.filter_by(id=id).first()
+
+    @staticmethod
+    def get_one_for_organization(id):
+        """
+        BackgroundJob of a client of the logged user's organizations
+        """
+        from src.middleware.organization import Organization
+
+        return BackgroundJob.query.filter(
+            BackgroundJob.id == id,
+            Organization.client_filter(BackgroundJob.client_id),
+        ).first()
+
+    @staticmethod
+    def get_by_ref(ref_type, ref_id):
+        from src.middleware.organization import Organization
+
+        # only jobs of clients of the logged user's organizations
+        return (
+            BackgroundJob.query.filter(
+                BackgroundJob.ref_type == ref_type,
+                BackgroundJob.ref_id == ref_id,
+                Organization.client_filter(BackgroundJob.client_id),
+            )
+            .order_by(BackgroundJob.id.asc())
+            .all()
+        )
+
+    @staticmethod
+    def enqueue(
+        job_type,
+        ref_type,
+        ref_id,
+        idempotency_key,
+        payload=None,
+        max_attempts=5,
+        client_id=None,
+    ):
+        """[Add a job to the session, committed with the caller's next commit]
+
+        Args:
+            job_type (BackgroundJobType)
+            ref_type (str): soa/reserve_release
+            ref_id (int): soa id/reserve release id
+            idempotency_key (str): a job with the same key is only enqueued once
+            payload (dict, optional): job arguments. Defaults to None.
+            max_attempts (int, optional): Defaults to 5.
+            client_id (int, optional): client of the request, for organization scoping. Defaults to None.
+
+        Returns:
+            BackgroundJob
+        """
+        background_job = BackgroundJob.query.filter_by(
+            idempotency_key=idempotency_key
+        ).first()
+        if background_job:
+            return background_job
+
+        background_job = BackgroundJob(
+            {
+                "job_type": job_type,
+                "ref_type": ref_type,
+                "ref_id": ref_id,
+                "client_id": client_id,
+                "idempotency_key": idempotency_key,
+                "payload": payload or {},
+                "max_attempts": max_attempts,
+            }
+        )
+        db.session.add(background_job)
+        return background_job
+
+    @staticmethod
+    def requeue_stale(lock_timeout=None):
+        """
+        Release jobs left running by a crashed worker
+        """
+        lock_timeout = (
+            lock_timeout
+            if lock_timeout is not None
+            else int(os.getenv("BACKGROUND_JOBS_LOCK_TIMEOUT", 900))
+        )
+        stale_at = datetime.utcnow() - timedelta(seconds=lock_timeout)
+        requeued = BackgroundJob.query.filter(
+            BackgroundJob.status == BackgroundJobStatus.running.value,
+            BackgroundJob.locked_at < stale_at,
+        ).update(
+            {
+                BackgroundJob.status: BackgroundJobStatus.pending.value,
+                BackgroundJob.locked_by: None,
+                BackgroundJob.locked_at: None,
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+        return requeued
+
+    @staticmethod
+    def claim(worker_id, limit=10):
+        """[Claim due pending jobs for worker_id]
+
+        Each job is claimed with a conditional update, so concurrent workers
+        never run the same job.
+
+        Returns:
+            list: claimed BackgroundJob
+        """
+        now = datetime.utcnow()
+        job_ids = [
+            job_id
+            for job_id, in db.session.query(BackgroundJob.id)
+            .filter(
+                BackgroundJob.status == BackgroundJobStatus.pending.value,
+                or_(BackgroundJob.run_at == None, BackgroundJob.run_at <= now),
+            )
+            .order_by(BackgroundJob.run_at.asc(), BackgroundJob.id.asc())
+            .limit(limit)
+            .all()
+        ]
+
+        claimed_ids = []
+        for job_id in job_ids:
+            claimed = BackgroundJob.query.filter(
+                and_(
+                    BackgroundJob.id == job_id,
+                    BackgroundJob.status == BackgroundJobStatus.pending.value,
+                )
+            ).update(
+                {
+                    BackgroundJob.status: BackgroundJobStatus.running.value,
+                    BackgroundJob.locked_by: worker_id,
+                    BackgroundJob.locked_at: now,
+                    BackgroundJob.attempts: BackgroundJob.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+            if claimed:
+                claimed_ids.append(job_id)
+        db.session.commit()
+
+        if not claimed_ids:
+            return []
+
+        return (
+            BackgroundJob.query.filter(BackgroundJob.id.in_(claimed_ids))
+            .order_by(BackgroundJob.id.asc())
+            .all()
+        )
+
+    def mark_completed(self):
+        self.update(
+            {
+                "status": BackgroundJobStatus.completed.value,
+                "completed_at": datetime.utcnow(),
+                "locked_by": None,
+                "locked_at": None,
+                "last_error": None,
+            }
+        )
+
+    def mark_failed(self, error, backoff=None, retryable=True):
+        """[Retry later with exponential backoff, or fail after max_attempts]
+
+        Args:
+            error (str): last error
+            backoff (int, optional): base backoff in seconds. Defaults to BACKGROUND_JOBS_BACKOFF(30).
+            retryable (bool, optional): False fails the job now. Defaults to True.
+        """
+        backoff = (
+            backoff
+            if backoff is not None
+            else int(os.getenv("BACKGROUND_JOBS_BACKOFF", 30))
+        )
+        data = {
+            "last_error": str(error),
+            "locked_by": None,
+            "locked_at": None,
+        }
+        if not retryable or self.attempts >= self.max_attempts:
+            data["status"] = BackgroundJobStatus.failed.value
+        else:
+            data["status"] = BackgroundJobStatus.pending.value
+            data["run_at"] = datetime.utcnow() + timedelta(
+                seconds=backoff * (2 ** (self.attempts - 1))
+            )
+        self.update(data)
+
+    @property
+    def payment_started_at(self):
+        return (self.payload or {}).get("payment_started_at")
+
+    def mark_payment_started(self):
+        # committed before the payment call, a started payment is never re-run
+        self.update(
+            {
+                "payload": dict(
+                    self.payload or {},
+                    payment_started_at=datetime.utcnow().isoformat(),
+                )
+            }
+        )
+
+    def can_retry(self):
+        """
+        Failed jobs can be retried, except payments that reached the payment call
+        """
+        if self.status.value != BackgroundJobStatus.failed.value:
+            return False
+        if (
+            self.job_type.value == BackgroundJobType.payment_process.value
+            and self.payment_started_at
+        ):
+            return False
+        return True
+
+    def retry(self):
+        """
+        Re-run a failed job, attempts start over
+        """
+        self.update(
+            {
+                "status": BackgroundJobStatus.pending.value,
+                "attempts": 0,
+                "run_at": datetime.utcnow(),
+                "last_error": None,
+            }
+        )
@@ -66,22 +66,17 @@ class ClientDebtor(db.Model):
 
     @staticmethod
     def get_all_client_debtors():
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
         return ClientDebtor.query.filter(
-            ClientDebtor.is_deleted == False, ClientDebtor.client_id.in_(client_ids)
+            ClientDebtor.is_deleted == False,
+            Organization.client_filter(ClientDebtor.client_id),
         )
 
     @staticmethod
     def get_one_client_debtor(id):
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
         return ClientDebtor.query.filter(
             ClientDebtor.id == id,
             ClientDebtor.is_deleted == False,
-            ClientDebtor.client_id.in_(client_ids),
+            Organization.client_filter(ClientDebtor.client_id),
         ).first()
 
 
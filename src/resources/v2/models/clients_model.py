@@ -4,6 +4,7 @@ from datetime import datetime
 from src.middleware.organization import Organization
 from sqlalchemy import and_, or_, not_
 from src.middleware.permissions import Permissions
+from src.resources.v2.models.search_index_model import is_search_index_listings_enabled
 
 class ClientSource(enum.Enum):
     cadence = "cadence"
@@ -151,6 +152,9 @@ class Client(db.Model):
         from src.models import Debtor, ClientDebtor
         # from src.resources.v1.client_debtors.model.client_debtors import ClientDebtor
 
+        # commit before loading, so the loaded debtors are not expired by it
+        # (expired rows are reloaded one query each on access)
+        db.session.commit()
         get_client_debtors = (
             db.session.query(Debtor, ClientDebtor)
             .outerjoin(ClientDebtor, ClientDebtor.debtor_id == Debtor.id)
@@ -163,7 +167,6 @@ class Client(db.Model):
             .order_by(Debtor.name.asc())
             .all()
         )
-        db.session.commit()
         return get_client_debtors
 
     def get_payees(self):
@@ -316,10 +319,6 @@ class ClientListing:
         )
         client_scema = ClientInfoSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        get_client_ids = get_locations["client_list"]
-
         clients = Client.query.filter(
             Client.is_deleted == False,                            
             and_(                      
@@ -327,7 +326,7 @@ class ClientListing:
                 Client.ref_client_no != "Cadence:sync-pending",
                 Client.ref_client_no != "TODO-factorcloud",
             ),
-            Client.id.in_(get_client_ids)
+            Organization.client_filter(Client.id)
         ).order_by(Client.name.asc())
 
         client_results = client_scema.dump(clients).data
@@ -341,6 +340,8 @@ class ClientListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         control_account = kwargs.get("control_account", None)
@@ -356,10 +357,6 @@ class ClientListing:
         )
         client_schema = ClientInfoSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        get_client_ids = get_locations["client_list"]
-        
         # control accounts
         business_control_accounts = Permissions.get_business_settings()["control_accounts"]
 
@@ -378,14 +375,20 @@ class ClientListing:
                         ]
                     )
                 ),
-                Client.id.in_(get_client_ids),
+                Organization.client_filter(Client.id),
                 ControlAccount.name.in_(business_control_accounts),
             )
             .group_by(Client.id)
         )
 
         # client search
-        if search is not None:
+        if search is not None and is_search_index_listings_enabled():
+            from src.resources.v2.helpers.search_index import search_filter
+
+            clients = clients.filter(
+                search_filter(Client.id, "client", ["name", "ref_client_no"], search)
+            )
+        elif search is not None:
             clients = clients.filter(
                 (Client.name.like("%" + search + "%"))
                 | (Client.ref_client_no.like("%" + search + "%"))
@@ -425,8 +428,15 @@ class ClientListing:
         else:
             clients = clients.order_by(Client.name.asc())
 
-        # pagination
-        clients = clients.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        clients = paginate_listing(
+            clients, page, rpp, Client.id, cursor=cursor, total=total
+        )
         total_pages = clients.pages
         client_results = client_schema.dump(clients.items).data
         total_count = clients.total
@@ -439,20 +449,26 @@ class ClientListing:
 
         # invalid page number
         if len(client_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                clients,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": client_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": client_results,
+            },
+            clients,
+        )
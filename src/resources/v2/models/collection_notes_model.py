@@ -107,12 +107,9 @@ class CollectionNotes(db.Model):
 
     @staticmethod
     def get_all():
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
         return CollectionNotes.query.filter(
             CollectionNotes.deleted_at == None,
-            CollectionNotes.client_id.in_(client_ids),
+            Organization.client_filter(CollectionNotes.client_id),
         )
 
     @staticmethod
@@ -354,10 +351,6 @@ class CollectionNotesListing:
 
         collection_notes_schema = CollectionNotesRefSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # control accounts
         business_control_accounts = Permissions.get_business_settings()[
             "control_accounts"
@@ -373,7 +366,7 @@ class CollectionNotesListing:
                 Client.is_deleted == False,
                 ControlAccount.is_deleted == False,
                 ClientControlAccounts.is_deleted == False,
-                CollectionNotes.client_id.in_(client_ids),
+                Organization.client_filter(CollectionNotes.client_id),
                 ControlAccount.name.in_(business_control_accounts),
             )
             .order_by(CollectionNotes.updated_at.desc())
@@ -388,6 +381,8 @@ class CollectionNotesListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -395,7 +390,6 @@ class CollectionNotesListing:
         control_account = kwargs.get("control_account", None)
         stage = kwargs.get("stage", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
 
@@ -414,12 +408,8 @@ class CollectionNotesListing:
         collection_notes_schema = CollectionNotesDashboardSchema(many=True)
 
         if not dashboard:
-            # client ids
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
 
             # control accounts
             business_control_accounts = Permissions.get_business_settings()[
@@ -443,7 +433,7 @@ class CollectionNotesListing:
                     ]
                 )
             ),
-            CollectionNotes.client_id.in_(client_ids),
+            Organization.client_filter(CollectionNotes.client_id),
             ControlAccount.name.in_(business_control_accounts),
         )
 
@@ -596,8 +586,15 @@ class CollectionNotesListing:
                 CollectionNotes.updated_at.desc()
             )
 
-        # pagination
-        collection_notes = collection_notes.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        collection_notes = paginate_listing(
+            collection_notes, page, rpp, CollectionNotes.id, cursor=cursor, total=total
+        )
         total_pages = collection_notes.pages
         cn_results = collection_notes_schema.dump(collection_notes.items).data
         total_count = collection_notes.total
@@ -610,20 +607,26 @@ class CollectionNotesListing:
 
         # invalid page number
         if len(cn_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                collection_notes,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": cn_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": cn_results,
+            },
+            collection_notes,
+        )
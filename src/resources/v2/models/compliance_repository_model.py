@@ -146,67 +146,39 @@ class ComplianceRepository(db.Model):
         return "Compliance Repository"
 
     def request_created_by_principal(self):
-        from src.models import ComplianceRepositoryApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ComplianceRepositoryApprovalsHistory.query.filter_by(
-            compliance_repository_id=self.id, key="created_at", deleted_at=None
-        ).first()
+        return approvals_history_index("compliance_repository").first(self.id, "created_at")
 
     def request_submitted_by_principal(self):
-        from src.models import ComplianceRepositoryApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ComplianceRepositoryApprovalsHistory.query.filter_by(
-            compliance_repository_id=self.id, key="submitted_at", deleted_at=None
-        ).first()
+        return approvals_history_index("compliance_repository").first(self.id, "submitted_at")
 
     def request_created_by_client(self):
-        from src.models import ComplianceRepositoryApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ComplianceRepositoryApprovalsHistory.query.filter_by(
-            compliance_repository_id=self.id, key="client_created_at", deleted_at=None
-        ).first()
+        return approvals_history_index("compliance_repository").first(self.id, "client_created_at")
 
     def request_submitted_by_client(self):
-        from src.models import ComplianceRepositoryApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ComplianceRepositoryApprovalsHistory.query.filter_by(
-                compliance_repository_id=self.id,
-                key="client_submission_at",
-                deleted_at=None,
-            )
-            .order_by(ComplianceRepositoryApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("compliance_repository").last(self.id, "client_submission_at")
 
     def request_approved_by_principal(self):
-        from src.models import ComplianceRepositoryApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ComplianceRepositoryApprovalsHistory.query.filter_by(
-                compliance_repository_id=self.id, key="approved_at", deleted_at=None
-            )
-            .order_by(ComplianceRepositoryApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("compliance_repository").last(self.id, "approved_at")
 
     def request_rejected_by_principal(self):
-        from src.models import ComplianceRepositoryApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ComplianceRepositoryApprovalsHistory.query.filter_by(
-                compliance_repository_id=self.id, key="principal_rejection_at", deleted_at=None
-            )
-            .order_by(ComplianceRepositoryApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("compliance_repository").last(self.id, "principal_rejection_at")
     
     def had_client_submitted(self):
-        from src.models import ComplianceRepositoryApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ComplianceRepositoryApprovalsHistory.query.filter_by(
-            compliance_repository_id=self.id, key="client_submission_at", deleted_at=None
-        ).count()
+        return approvals_history_index("compliance_repository").count(self.id, "client_submission_at")
 
     def get_cr_reference(self):
         ref_client_no = self.client.ref_client_no if self.client else None
@@ -397,10 +369,6 @@ class ComplianceRepositoryListing:
 
         compliance_repository_schema = ComplianceRepositoryRefSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # control accounts
         business_control_accounts = Permissions.get_business_settings()[
             "control_accounts"
@@ -413,7 +381,7 @@ class ComplianceRepositoryListing:
                 Client.is_deleted == False,
                 ControlAccount.is_deleted == False,
                 ClientControlAccounts.is_deleted == False,
-                ComplianceRepository.client_id.in_(client_ids),
+                Organization.client_filter(ComplianceRepository.client_id),
                 ControlAccount.name.in_(business_control_accounts),
             )
             .order_by(ComplianceRepository.updated_at.desc())
@@ -428,6 +396,8 @@ class ComplianceRepositoryListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -436,7 +406,6 @@ class ComplianceRepositoryListing:
         document_type = kwargs.get("document_type", None)
         stage = kwargs.get("stage", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
 
@@ -454,12 +423,8 @@ class ComplianceRepositoryListing:
         compliance_repository_schema = ComplianceRepositoryDashboardSchema(many=True)
 
         if not dashboard:
-            # client ids
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
 
             # control accounts
             business_control_accounts = Permissions.get_business_settings()[
@@ -482,7 +447,7 @@ class ComplianceRepositoryListing:
                     ]
                 )
             ),
-            ComplianceRepository.client_id.in_(client_ids),
+            Organization.client_filter(ComplianceRepository.client_id),
             ControlAccount.name.in_(business_control_accounts),
         )
 
@@ -645,8 +610,23 @@ class ComplianceRepositoryListing:
         else:
             compliance_repository = compliance_repository.order_by(ComplianceRepository.updated_at.desc())
 
-        # pagination
-        compliance_repository = compliance_repository.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        compliance_repository = paginate_listing(
+            compliance_repository, page, rpp, ComplianceRepository.id, cursor=cursor, total=total
+        )
+
+        # approvals history of the page in one query, for the request_*_by_* helpers
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
+
+        approvals_history_index("compliance_repository").prefetch(
+            [each.id for each in compliance_repository.items]
+        )
+
         total_pages = compliance_repository.pages
         compliance_repository_results = compliance_repository_schema.dump(compliance_repository.items).data
         total_count = compliance_repository.total
@@ -659,20 +639,26 @@ class ComplianceRepositoryListing:
 
         # invalid page number
         if len(compliance_repository_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                compliance_repository,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": compliance_repository_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": compliance_repository_results,
+            },
+            compliance_repository,
+        )
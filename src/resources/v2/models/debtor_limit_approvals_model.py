@@ -75,14 +75,48 @@ class DebtorLimitApprovals(db.Model):
 
     @staticmethod
     def get_all():
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
         return DebtorLimitApprovals.query.filter(
             DebtorLimitApprovals.deleted_at == None,
-            DebtorLimitApprovals.client_id.in_(client_ids),
+            Organization.client_filter(DebtorLimitApprovals.client_id),
         )
 
+    @staticmethod
+    def get_latest_by_client_debtors(client_id):
+        """[Latest debtor limit approval of each debtor of the client, in one query]
+
+        Args:
+            client_id (int): client id
+
+        Returns:
+            dict: debtor id -> DebtorLimitApprovals
+        """
+        from src.models import ClientDebtor
+
+        # group-wise max: latest approval id per debtor
+        latest_approvals = (
+            db.session.query(func.max(DebtorLimitApprovals.id).label("id"))
+            .join(
+                ClientDebtor,
+                ClientDebtor.debtor_id == DebtorLimitApprovals.debtor_id,
+            )
+            .filter(
+                ClientDebtor.client_id == client_id,
+                ClientDebtor.is_deleted == False,
+                DebtorLimitApprovals.deleted_at == None,
+            )
+            .group_by(DebtorLimitApprovals.debtor_id)
+            .subquery()
+        )
+
+        debtor_limit_approvals = DebtorLimitApprovals.query.join(
+            latest_approvals, DebtorLimitApprovals.id == latest_approvals.c.id
+        ).all()
+
+        return {
+            debtor_limit_approval.debtor_id: debtor_limit_approval
+            for debtor_limit_approval in debtor_limit_approvals
+        }
+
     @staticmethod
     def get_one(id):
         return DebtorLimitApprovals.query.filter(
@@ -123,69 +157,39 @@ class DebtorLimitApprovals(db.Model):
         return debtor_limit_approvals
 
     def request_created_by_principal(self):
-        from src.models import DebtorLimitApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return DebtorLimitApprovalsHistory.query.filter_by(
-            debtor_limit_approvals_id=self.id, key="created_at", deleted_at=None
-        ).first()
+        return approvals_history_index("debtor_limit_approvals").first(self.id, "created_at")
 
     def request_created_by_client(self):
-        from src.models import DebtorLimitApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return DebtorLimitApprovalsHistory.query.filter_by(
-            debtor_limit_approvals_id=self.id, key="client_created_at", deleted_at=None
-        ).first()
+        return approvals_history_index("debtor_limit_approvals").first(self.id, "client_created_at")
 
     def request_submitted_by_client(self):
-        from src.models import DebtorLimitApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            DebtorLimitApprovalsHistory.query.filter_by(
-                debtor_limit_approvals_id=self.id,
-                key="client_submission_at",
-                deleted_at=None,
-            )
-            .order_by(DebtorLimitApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("debtor_limit_approvals").last(self.id, "client_submission_at")
 
     def request_submitted_by_principal(self):
-        from src.models import DebtorLimitApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return DebtorLimitApprovalsHistory.query.filter_by(
-            debtor_limit_approvals_id=self.id, key="submitted_at", deleted_at=None
-        ).first()
+        return approvals_history_index("debtor_limit_approvals").first(self.id, "submitted_at")
 
     def request_rejected_by_ae(self):
-        from src.models import DebtorLimitApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            DebtorLimitApprovalsHistory.query.filter_by(
-                debtor_limit_approvals_id=self.id, key="rejected_at", deleted_at=None
-            )
-            .order_by(DebtorLimitApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("debtor_limit_approvals").last(self.id, "rejected_at")
 
     def request_approved_by_ae(self):
-        from src.models import DebtorLimitApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            DebtorLimitApprovalsHistory.query.filter_by(
-                debtor_limit_approvals_id=self.id, key="approved_at", deleted_at=None
-            )
-            .order_by(DebtorLimitApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("debtor_limit_approvals").last(self.id, "approved_at")
 
     def has_client_submitted(self):
-        from src.models import DebtorLimitApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return DebtorLimitApprovalsHistory.query.filter_by(
-            debtor_limit_approvals_id=self.id,
-            key="client_submission_at",
-            deleted_at=None,
-        ).count()
+        return approvals_history_index("debtor_limit_approvals").count(self.id, "client_submission_at")
 
     def get_cl_reference(self):
         ref_client_no = self.client.ref_client_no if self.client else None
@@ -450,10 +454,6 @@ class DebtorLimitApprovalsListing:
 
         debtor_limit_approvals_schema = DebtorLimitApprovalsRefSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # control accounts
         business_control_accounts = Permissions.get_business_settings()[
             "control_accounts"
@@ -469,7 +469,7 @@ class DebtorLimitApprovalsListing:
                 Client.is_deleted == False,
                 ControlAccount.is_deleted == False,
                 ClientControlAccounts.is_deleted == False,
-                DebtorLimitApprovals.client_id.in_(client_ids),
+                Organization.client_filter(DebtorLimitApprovals.client_id),
                 ControlAccount.name.in_(business_control_accounts),
             )
             .order_by(DebtorLimitApprovals.updated_at.desc())
@@ -486,6 +486,8 @@ class DebtorLimitApprovalsListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -493,7 +495,6 @@ class DebtorLimitApprovalsListing:
         control_account = kwargs.get("control_account", None)
         stage = kwargs.get("stage", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
 
@@ -512,12 +513,8 @@ class DebtorLimitApprovalsListing:
         debtor_limit_approvals_schema = DebtorLimitApprovalsDashboardSchema(many=True)
 
         if not dashboard:
-            # client ids
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
 
             # control accounts
             business_control_accounts = Permissions.get_business_settings()[
@@ -541,7 +538,7 @@ class DebtorLimitApprovalsListing:
                     ]
                 )
             ),
-            DebtorLimitApprovals.client_id.in_(client_ids),
+            Organization.client_filter(DebtorLimitApprovals.client_id),
             ControlAccount.name.in_(business_control_accounts),
         )
 
@@ -724,8 +721,23 @@ class DebtorLimitApprovalsListing:
                 DebtorLimitApprovals.updated_at.desc()
             )
 
-        # pagination
-        debtor_limit_approvals = debtor_limit_approvals.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        debtor_limit_approvals = paginate_listing(
+            debtor_limit_approvals, page, rpp, DebtorLimitApprovals.id, cursor=cursor, total=total
+        )
+
+        # approvals history of the page in one query, for the request_*_by_* helpers
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
+
+        approvals_history_index("debtor_limit_approvals").prefetch(
+            [each.id for each in debtor_limit_approvals.items]
+        )
+
         total_pages = debtor_limit_approvals.pages
         dla_results = debtor_limit_approvals_schema.dump(
             debtor_limit_approvals.items
@@ -740,20 +752,26 @@ class DebtorLimitApprovalsListing:
 
         # invalid page number
         if len(dla_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                debtor_limit_approvals,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": dla_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": dla_results,
+            },
+            debtor_limit_approvals,
+        )
@@ -6,6 +6,7 @@ import math
 from sqlalchemy import and_, or_, not_
 from src.middleware.organization import Organization
 from src.middleware.permissions import Permissions
+from src.resources.v2.models.search_index_model import is_search_index_listings_enabled
 
 class DebtorSource(enum.Enum):
     cadence = "cadence"
@@ -262,7 +263,7 @@ class Debtor(db.Model):
 
         if create_forcefully is None:
             has_debtor_names = get_debtor.filter(
-                Debtor.name == name, ClientDebtor.client_id.in_(client_ids)
+                Debtor.name == name, Organization.client_filter(ClientDebtor.client_id)
                 ).all()
             if has_debtor_names:
                 clients_list = []
@@ -282,7 +283,7 @@ class Debtor(db.Model):
             has_debtor_existed = get_debtor.filter(
                 Debtor.name == name,
                 not_(
-                    ClientDebtor.client_id.in_(client_ids)
+                    Organization.client_filter(ClientDebtor.client_id)
                 )
                 ).all()
             if has_debtor_existed:
@@ -517,12 +518,9 @@ class DebtorListing:
 
         debtor_schema = DebtorSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        client_id = get_locations["client_list"]
-
         client_debtor = ClientDebtor.query.filter(
-            ClientDebtor.is_deleted == False, ClientDebtor.client_id.in_(client_id)
+            ClientDebtor.is_deleted == False,
+            Organization.client_filter(ClientDebtor.client_id),
         )
         debtors = Debtor.query.filter_by(is_deleted=False)
 
@@ -551,6 +549,8 @@ class DebtorListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         control_account = kwargs.get("control_account", None)
@@ -561,10 +561,6 @@ class DebtorListing:
 
         debtor_client_schema = DebtorLimitsSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        client_id = get_locations["client_list"]
-        
         # control accounts
         business_control_accounts = Permissions.get_business_settings()["control_accounts"]
         
@@ -608,7 +604,7 @@ class DebtorListing:
                 Client.is_active == True,
                 ControlAccount.is_deleted == False,
                 ClientControlAccounts.is_deleted == False,
-                Client.id.in_(client_id),
+                Organization.client_filter(Client.id),
                 ControlAccount.name.in_(business_control_accounts),
             )
         )
@@ -666,7 +662,27 @@ class DebtorListing:
             joined_table_query = joined_table_query.order_by(Debtor.updated_at.desc())
 
         # search
-        if search is not None:
+        if search is not None and is_search_index_listings_enabled():
+            from src.resources.v2.helpers.search_index import search_filter
+
+            # ids from search_index instead of LIKE over the joined tables
+            joined_table_query = joined_table_query.filter(
+                or_(
+                    search_filter(
+                        Client.id, "client", ["name", "ref_client_no"], search
+                    ),
+                    search_filter(
+                        Debtor.id,
+                        "debtor",
+                        ["id", "name", "ref_key", "ref_debtor_no"],
+                        search,
+                    ),
+                    search_filter(
+                        ClientDebtor.id, "client_debtor", ["credit_limit"], search
+                    ),
+                )
+            )
+        elif search is not None:
             joined_table_query = joined_table_query.filter(
                 (Client.name.like("%" + search + "%"))
                 | (Client.ref_client_no.like("%" + search + "%"))
@@ -691,8 +707,15 @@ class DebtorListing:
                 ControlAccount.name == control_account
             )
 
-        # pagination
-        debtors = joined_table_query.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        debtors = paginate_listing(
+            joined_table_query, page, rpp, ClientDebtor.id, cursor=cursor, total=total
+        )
         total_pages = debtors.pages
         debtors_data = debtor_client_schema.dump(debtors.items).data
         total_count = debtors.total
@@ -707,20 +730,26 @@ class DebtorListing:
 
         # invalid page number
         if len(debtors_data) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                debtors,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": debtors_data,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": debtors_data,
+            },
+            debtors,
+        )
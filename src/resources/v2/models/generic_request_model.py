@@ -116,40 +116,24 @@ class GenericRequest(db.Model):
         return "Generic Request"
 
     def request_created_by_principal(self):
-        from src.models import GenericRequestApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return GenericRequestApprovalsHistory.query.filter_by(
-            generic_request_id=self.id, key="created_at", deleted_at=None
-        ).first()
+        return approvals_history_index("generic_request").first(self.id, "created_at")
 
     def request_submitted_by_principal(self):
-        from src.models import GenericRequestApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return GenericRequestApprovalsHistory.query.filter_by(
-            generic_request_id=self.id, key="submitted_at", deleted_at=None
-        ).first()
+        return approvals_history_index("generic_request").first(self.id, "submitted_at")
 
     def request_rejected_by_ae(self):
-        from src.models import GenericRequestApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            GenericRequestApprovalsHistory.query.filter_by(
-                generic_request_id=self.id, key="rejected_at", deleted_at=None
-            )
-            .order_by(GenericRequestApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("generic_request").last(self.id, "rejected_at")
 
     def request_approved_by_ae(self):
-        from src.models import GenericRequestApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            GenericRequestApprovalsHistory.query.filter_by(
-                generic_request_id=self.id, key="approved_at", deleted_at=None
-            )
-            .order_by(GenericRequestApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("generic_request").last(self.id, "approved_at")
 
     def get_gn_reference(self):
         ref_client_no = self.client.ref_client_no if self.client else None
@@ -336,10 +320,6 @@ class GenericRequestListing:
 
         generic_request_schema = GenericRequestRefSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # control accounts
         business_control_accounts = Permissions.get_business_settings()[
             "control_accounts"
@@ -353,7 +333,7 @@ class GenericRequestListing:
                 Client.is_deleted == False,
                 ControlAccount.is_deleted == False,
                 ClientControlAccounts.is_deleted == False,
-                GenericRequest.client_id.in_(client_ids),
+                Organization.client_filter(GenericRequest.client_id),
                 ControlAccount.name.in_(business_control_accounts),
             )
             .order_by(GenericRequest.updated_at.desc())
@@ -368,6 +348,8 @@ class GenericRequestListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -375,7 +357,6 @@ class GenericRequestListing:
         control_account = kwargs.get("control_account", None)
         stage = kwargs.get("stage", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
 
@@ -393,12 +374,8 @@ class GenericRequestListing:
         generic_request_schema = GenericRequestDashboardSchema(many=True)
 
         if not dashboard:
-            # client ids
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
 
             # control accounts
             business_control_accounts = Permissions.get_business_settings()[
@@ -413,7 +390,7 @@ class GenericRequestListing:
             Client.is_active == True,
             ControlAccount.is_deleted == False,
             ClientControlAccounts.is_deleted == False,
-            GenericRequest.client_id.in_(client_ids),
+            Organization.client_filter(GenericRequest.client_id),
             ControlAccount.name.in_(business_control_accounts),
         )
 
@@ -538,8 +515,23 @@ class GenericRequestListing:
         else:
             generic_request = generic_request.order_by(GenericRequest.updated_at.desc())
 
-        # pagination
-        generic_request = generic_request.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        generic_request = paginate_listing(
+            generic_request, page, rpp, GenericRequest.id, cursor=cursor, total=total
+        )
+
+        # approvals history of the page in one query, for the request_*_by_* helpers
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
+
+        approvals_history_index("generic_request").prefetch(
+            [each.id for each in generic_request.items]
+        )
+
         total_pages = generic_request.pages
         generic_request_results = generic_request_schema.dump(generic_request.items).data
         total_count = generic_request.total
@@ -552,20 +544,26 @@ class GenericRequestListing:
 
         # invalid page number
         if len(generic_request_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                generic_request,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": generic_request_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": generic_request_results,
+            },
+            generic_request,
+        )
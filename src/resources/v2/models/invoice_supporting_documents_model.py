@@ -68,12 +68,9 @@ class InvoiceSupportingDocuments(db.Model):
 
     @staticmethod
     def get_all():
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
         return InvoiceSupportingDocuments.query.filter(
             InvoiceSupportingDocuments.deleted_at == None,
-            InvoiceSupportingDocuments.client_id.in_(client_ids),
+            Organization.client_filter(InvoiceSupportingDocuments.client_id),
         )
 
     @staticmethod
@@ -108,6 +108,37 @@ class Invoice(db.Model):
     def get_one_invoice(id):
         return Invoice.query.filter_by(id=id, is_deleted=False).first()
 
+    @staticmethod
+    def get_soa_statuses_by_debtor(client_id):
+        """[Statuses of the client's soa, per debtor of their invoices, in one query]
+
+        Args:
+            client_id (int): client id
+
+        Returns:
+            dict: debtor id -> set of soa statuses
+        """
+        from src.models import SOA
+
+        soa_statuses = (
+            db.session.query(Invoice.debtor, SOA.status)
+            .join(SOA, SOA.id == Invoice.soa_id)
+            .filter(
+                Invoice.client_id == client_id,
+                Invoice.is_deleted == False,
+                SOA.is_deleted == False,
+            )
+            .group_by(Invoice.debtor, SOA.status)
+            .all()
+        )
+
+        soa_statuses_by_debtor = {}
+        for debtor_id, status in soa_statuses:
+            soa_statuses_by_debtor.setdefault(debtor_id, set()).add(
+                status.value if status else None
+            )
+        return soa_statuses_by_debtor
+
     @staticmethod
     def get_one_based_off_control_accounts(id):
         from src.models import (
@@ -409,10 +440,6 @@ class InvoicesListing:
         from src.resources.v2.schemas import InvoiceDebtorSchema
         invoice_schema = InvoiceDebtorSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        get_client_ids = get_locations["client_list"]        
-        
         # Permisions
         from src.middleware.permissions import Permissions
         user_role = Permissions.get_user_role_permissions()["user_role"]
@@ -421,7 +448,7 @@ class InvoicesListing:
         business_control_accounts = Permissions.get_business_settings()["control_accounts"]
 
         invoices = Invoice.query.join(Client, ClientControlAccounts, ControlAccount).filter(
-            Invoice.is_deleted == False, Invoice.client_id.in_(get_client_ids)
+            Invoice.is_deleted == False, Organization.client_filter(Invoice.client_id)
         )
         
         # get invoices having status == client_submission only for principal
@@ -455,10 +482,6 @@ class InvoicesListing:
         from src.resources.v2.schemas import InvoiceDebtorSchema
         invoice_schema = InvoiceDebtorSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        get_client_ids = get_locations["client_list"]
-
         # Permisions
         from src.middleware.permissions import Permissions
         user_role = Permissions.get_user_role_permissions()["user_role"]
@@ -472,7 +495,7 @@ class InvoicesListing:
             Client.is_deleted == False,
             ControlAccount.is_deleted == False,
             ClientControlAccounts.is_deleted == False,
-            Invoice.client_id.in_(get_client_ids),
+            Organization.client_filter(Invoice.client_id),
             ControlAccount.name.in_(business_control_accounts)
         )
 
@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 import math
 from src.models import *
 from src.middleware.organization import Organization
-from sqlalchemy import cast, Date, and_, or_, not_, DateTime
+from sqlalchemy import Date, and_, or_, not_
 from src.middleware.permissions import Permissions
 from src.resources.v2.models.client_payees_model import PayeePaymentStatus
 
@@ -216,27 +216,19 @@ class Payee(db.Model):
         ).order_by(Comments.id.desc()).first()
 
     def request_submitted_by_principal(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            payee_id=self.id, key="submitted_at", is_deleted=False
-        ).first()
+        return approvals_history_index("payee").first(self.id, "submitted_at")
 
     def request_created_by_principal(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            payee_id=self.id, key="created_at", is_deleted=False
-        ).first()
+        return approvals_history_index("payee").first(self.id, "created_at")
 
     def request_created_by_client(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            payee_id=self.id, 
-            key="client_created_at", 
-            is_deleted=False
-        ).first()
+        return approvals_history_index("payee").first(self.id, "client_created_at")
 
     def payee_approvals_history(self):
         from src.resources.v2.models.approvals_history_model import ApprovalsHistory
@@ -501,12 +493,9 @@ class PayeeListing:
         from src.resources.v2.schemas import PayeeSchema
         payee_schema = PayeeSchema(many=True)
 
-        # Organization 
-        get_locations = Organization.get_locations()
-        client_id = get_locations["client_list"]
-
         get_client_payee = ClientPayee.query.filter(
-            ClientPayee.is_deleted == False, ClientPayee.client_id.in_(client_id)
+            ClientPayee.is_deleted == False,
+            Organization.client_filter(ClientPayee.client_id),
         )
         client_payee_id = []
         for client_payee in get_client_payee:
@@ -540,6 +529,8 @@ class PayeeListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -548,7 +539,6 @@ class PayeeListing:
         stage = kwargs.get("stage", None)
         active = kwargs.get("active", None)
         dashboard = kwargs.get("dashboard", False)
-        client_id_list = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
         
@@ -566,12 +556,8 @@ class PayeeListing:
         payee_client_schema = PayeeClientSchema(many=True)
 
         if not dashboard:
-            # Organization
-            get_locations = Organization.get_locations()
-            client_id_list = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
             
             # control accounts
             business_control_accounts = Permissions.get_business_settings()["control_accounts"]
@@ -585,7 +571,7 @@ class PayeeListing:
                     Client.id == ClientPayee.client_id,
                     Payee.is_deleted == False,
                     ClientPayee.is_deleted == False,
-                    Client.id.in_(client_id_list),
+                    Organization.client_filter(Client.id),
                     Client.is_deleted == False,
                     Client.is_active == True,
                     ControlAccount.is_deleted == False,
@@ -638,7 +624,7 @@ class PayeeListing:
                     Client.id == ClientPayee.client_id,
                     Payee.is_deleted == False,
                     ClientPayee.is_deleted == False,
-                    Client.id.in_(client_id_list),
+                    Organization.client_filter(Client.id),
                     Client.is_deleted == False,
                     Client.is_active == True,
                     ControlAccount.is_deleted == False,
@@ -699,15 +685,11 @@ class PayeeListing:
                         Payee.status == "rejected"
                     )
                 elif stage == "approved":
-                    from src.resources.v2.helpers.convert_datetime import date_concat_time
-                    # current est date: for comparing with last_processed_at(utc)
-                    today = date_concat_time(date_concat="current")
-                    next_day = date_concat_time(date_concat="next")
-
+                    from src.resources.v2.helpers.convert_datetime import date_window
+                    # current est day: for comparing with last_processed_at(utc)
                     payee_client_query = payee_client_query.filter(
                         Payee.status == "approved",
-                        cast(Payee.last_processed_at, DateTime) >= today,
-                        cast(Payee.last_processed_at, DateTime) <= next_day,
+                        date_window(Payee.last_processed_at),
                     )
                 else:
                     payee_client_query = payee_client_query.filter(
@@ -800,8 +782,23 @@ class PayeeListing:
                 | (Client.name.like("%" + search + "%"))
             )
 
-        # pagination
-        payee_objects_queryset = payee_client_query.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        payee_objects_queryset = paginate_listing(
+            payee_client_query, page, rpp, Payee.id, cursor=cursor, total=total
+        )
+
+        # approvals history of the page in one query, for the request_*_by_* helpers
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
+
+        approvals_history_index("payee").prefetch(
+            [each.id for each in payee_objects_queryset.items]
+        )
+
         total_pages = math.ceil(payee_objects_queryset.total / rpp)
         payee_data_list = payee_client_schema.dump(payee_objects_queryset.items).data
         total_count = payee_objects_queryset.total
@@ -815,20 +812,26 @@ class PayeeListing:
 
         # invalid page number
         if len(payee_data_list) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                payee_objects_queryset,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": payee_data_list,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": payee_data_list,
+            },
+            payee_objects_queryset,
+        )
@@ -4,10 +4,11 @@ from flask import abort, json
 import enum
 import math
 from datetime import date, datetime, timedelta
-from sqlalchemy import cast, Date, and_, or_, func, not_, DateTime
+from sqlalchemy import Date, and_, or_, func, not_
 from src.middleware.organization import Organization
 from decimal import Decimal
 from src.middleware.permissions import Permissions
+from src.resources.v2.models.search_index_model import is_search_index_listings_enabled
 
 
 class ReserveReleaseStatus(enum.Enum):
@@ -61,6 +62,13 @@ class ReserveRelease(db.Model):
     # Indexes
     __table_args__ = (
         db.Index("idx_ref_id", "ref_id"),
+        db.Index(
+            "idx_rr_status_last_processed_at",
+            "status",
+            "last_processed_at",
+            "client_id",
+            "is_deleted",
+        ),
     )
 
     def __init__(self, data):
@@ -134,82 +142,52 @@ class ReserveRelease(db.Model):
         return ref_client_rr_id
 
     def had_action_required(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            reserve_release_id=self.id, key="action_required", is_deleted=False
-        ).count()
+        return approvals_history_index("reserve_release").count(self.id, "action_required")
 
     def had_client_submitted(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            reserve_release_id=self.id, key="client_submission_at", is_deleted=False
-        ).count()
+        return approvals_history_index("reserve_release").count(self.id, "client_submission_at")
 
     def object_as_string(self):
         return "Reserve Release"
 
     def request_created_by_client(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            reserve_release_id=self.id, key="client_created_at", is_deleted=False
-        ).first()
+        return approvals_history_index("reserve_release").first(self.id, "client_created_at")
 
     def request_submitted_by_client(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ApprovalsHistory.query.filter_by(
-                reserve_release_id=self.id, key="client_submission_at", is_deleted=False
-            )
-            .order_by(ApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("reserve_release").last(self.id, "client_submission_at")
 
     def request_created_by_principal(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            reserve_release_id=self.id, key="created_at", is_deleted=False
-        ).first()
+        return approvals_history_index("reserve_release").first(self.id, "created_at")
 
     def request_submitted_by_principal(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            reserve_release_id=self.id, key="submitted_at", is_deleted=False
-        ).first()
+        return approvals_history_index("reserve_release").first(self.id, "submitted_at")
 
     def request_approved_by_ae(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ApprovalsHistory.query.filter_by(
-                reserve_release_id=self.id, key="approved_at", is_deleted=False
-            )
-            .order_by(ApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("reserve_release").last(self.id, "approved_at")
 
     def request_approved_by_bo(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ApprovalsHistory.query.filter_by(
-                reserve_release_id=self.id, key="funded_at", is_deleted=False
-            )
-            .order_by(ApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("reserve_release").last(self.id, "funded_at")
 
     def is_request_updated(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            reserve_release_id=self.id, key="updated_at", is_deleted=False
-        ).count()
+        return approvals_history_index("reserve_release").count(self.id, "updated_at")
 
     def get_disbursements_payment_type(self):
         """
@@ -230,198 +208,79 @@ class ReserveRelease(db.Model):
             .all()
         )
 
-    def cal_disbursement_total_fees(self):
+    @staticmethod
+    def get_listing_context(reserve_release_list, user_role=None):
         """
-        Using in reserve release update
+        Prefetch payment types, had_action_required and had_client_submitted
+        for a page of reserve releases, used as ReserveRelease schemas context in listings
         """
         from src.models import (
             Disbursements,
             ReserveReleaseDisbursements,
-            Client,
-            ClientSettings,
             ClientPayee,
         )
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        fee_to_client = Decimal(0)
-        high_priority_fee = Decimal(0)
-        same_day_ach_fee = Decimal(0)
-        wire_fee = Decimal(0)
-        third_party_fee = Decimal(0)
-
-        has_client_settings = False
-        total_client_fees = Decimal(0)
-        third_party_fee_total = Decimal(0)
-        client_fee_total = Decimal(0)
-        total_fees_asap = Decimal(0)  # for lcra export
-        total_amount = Decimal(0)
-        high_priority_amount = Decimal(0)
-        asap_amount = Decimal(0)  # for outstanding amount cal
-
-        get_payees = []
-
-        # # checking, reserve release is approved/completed
-        # if self.status.value == "approved":
-        #     rr_approved = self.request_approved_by_ae()
-        # elif self.status.value == "completed":
-        #     rr_approved = self.request_approved_by_bo()
-        # else:
-        #     rr_approved = {}
-
-        # client_settings = {}
-        # has_client_settings = False
-        # # get reserve release approval history
-        # if rr_approved:
-        #     if isinstance(rr_approved.attribute, str):
-        #         rr_approved_attribute = json.loads(rr_approved.attribute)
-        #     else:
-        #         rr_approved_attribute = rr_approved.attribute
-
-        #     # get saved client settings
-        #     if (
-        #         rr_approved_attribute
-        #         and "client_settings" in rr_approved_attribute
-        #         and rr_approved_attribute["client_settings"]
-        #     ):
-        #         client_settings = rr_approved_attribute["client_settings"]
-        #         high_priority_fee = Decimal(client_settings["high_priority_fee"])
-        #         same_day_ach_fee = Decimal(client_settings["same_day_ach_fee"])
-        #         wire_fee = Decimal(client_settings["wire_fee"])
-        #         third_party_fee = Decimal(client_settings["third_party_fee"])
-        #         has_client_settings = True
-        #         high_priority_amount = Decimal(client_settings["high_priority_fee"])
-
-        # if not client_settings and not rr_approved:
-        #     # get client settings
-        #     client_settings = ClientSettings.query.filter_by(
-        #         client_id=self.client.id, is_deleted=False
-        #     ).first()
-
-        client_settings = self.rr_client_settings()
-
-        # client settings in table
-        if client_settings:
-            high_priority_fee = Decimal(client_settings["high_priority_fee"])
-            same_day_ach_fee = Decimal(client_settings["same_day_ach_fee"])
-            wire_fee = Decimal(client_settings["wire_fee"])
-            third_party_fee = Decimal(client_settings["third_party_fee"])
-            has_client_settings = True
-            high_priority_amount = Decimal(client_settings["high_priority_fee"])
-
-        # add high_priority to fee_to_client
-        if self.high_priority:
-            fee_to_client += high_priority_fee
-            total_fees_asap += high_priority_fee
-            asap_amount = high_priority_fee
-
-            # # if no client settings then add principal's high priority fee
-            # if not has_client_settings:
-            #     from src.resources.v2.helpers.helper import principal_settings
-
-            #     fee_to_client += principal_settings()["high_priority_fee"]
-            #     total_fees_asap += principal_settings()["high_priority_fee"]
-            #     high_priority_amount = principal_settings()["high_priority_fee"]
-
-        # get total client fees
-        total_client_fees = Decimal(0)
-        third_party_fee_total = Decimal(0)
-        client_fee_total = Decimal(0)
-
-        # Reserve Release disbursements
-        get_rr_disbursements = Disbursements.query.join(
-            ReserveReleaseDisbursements
-        ).filter(
-            ReserveReleaseDisbursements.reserve_release_id == self.id,
-            ReserveReleaseDisbursements.is_deleted == False,
-            Disbursements.is_deleted == False,
-            Client.id == Disbursements.client_id,
-            ClientPayee.client_id == Client.id,
-            ClientPayee.payee_id == Disbursements.payee_id,
-        )
+        reserve_release_ids = [
+            reserve_release.id for reserve_release in reserve_release_list
+        ]
 
-        ## Disbursement: client as payee ##
-        get_client_fees = get_rr_disbursements.filter(
-            ClientPayee.ref_type == "client",
-        ).all()
-        if get_client_fees:
-            for client_fees in get_client_fees:
-                # get payees
-                get_payees.append(client_fees.payee.id)
-
-                # fee_to_client
-                if client_fees.payment_method.value == "wire":
-                    fee_to_client += wire_fee
-
-                if client_fees.payment_method.value == "same_day_ach":
-                    fee_to_client += same_day_ach_fee
-
-                third_party_fee_total += (
-                    Decimal(client_fees.third_party_fee)
-                    if client_fees.third_party_fee is not None
-                    else Decimal(0)
-                )
-                client_fee_total += (
-                    Decimal(client_fees.client_fee)
-                    if client_fees.client_fee is not None
-                    else Decimal(0)
-                )
+        if not user_role:
+            user_role = Permissions.get_user_role_permissions()["user_role"]
 
-                # cal total amount of client as payee
-                total_amount += Decimal(client_fees.amount)
+        context = {
+            "user_role": user_role,
+            "disbursements_payment_type": {},
+            "had_action_required": set(),
+            "had_client_submitted": set(),
+        }
+        if not reserve_release_ids:
+            return context
 
-        total_client_fees = (
-            third_party_fee_total + client_fee_total
+        disbursements_payment_type = (
+            db.session.query(
+                ReserveReleaseDisbursements.reserve_release_id,
+                Disbursements.payment_method,
+                ClientPayee.payment_status,
+            )
+            .join(ClientPayee, ClientPayee.payee_id == Disbursements.payee_id)
+            .join(ReserveReleaseDisbursements)
+            .filter(
+                ReserveReleaseDisbursements.reserve_release_id.in_(reserve_release_ids),
+                Disbursements.is_deleted == False,
+                Disbursements.payee_id != None,
+            )
+            .distinct()
+            .all()
         )
+        for reserve_release_id, payment_method, payment_status in disbursements_payment_type:
+            context["disbursements_payment_type"].setdefault(
+                reserve_release_id, []
+            ).append((payment_method, payment_status))
+
+        # history rows of the page in one query, also used by the
+        # request_*_by_* helpers while dumping
+        approvals_history = approvals_history_index("reserve_release")
+        approvals_history.prefetch(reserve_release_ids)
+        for reserve_release_id in reserve_release_ids:
+            if approvals_history.has(reserve_release_id, "action_required"):
+                context["had_action_required"].add(reserve_release_id)
+            if approvals_history.has(reserve_release_id, "client_submission_at"):
+                context["had_client_submitted"].add(reserve_release_id)
+
+        return context
 
-        # cal total fee to client(LC-1695) for lcra export
-        total_fees_asap += client_fee_total
-
-        # get total payee fees
-        total_payee_fees = Decimal(0)
-        third_party_fee_total = Decimal(0)
-        client_fee_total = Decimal(0)
-
-        ## Disbursement: Third party as payee  ##
-        get_payee_fees = get_rr_disbursements.filter(
-            ClientPayee.ref_type == "payee",
-        ).all()
-        if get_payee_fees:
-            for payee_fees in get_payee_fees:
-                # get payees
-                get_payees.append(payee_fees.payee.id)
-
-                # fee_to_client
-                if payee_fees.payment_method.value == "wire":
-                    fee_to_client += wire_fee
-                    fee_to_client += third_party_fee
-
-                if payee_fees.payment_method.value == "same_day_ach":
-                    fee_to_client += same_day_ach_fee
-                    fee_to_client += third_party_fee
-
-                if payee_fees.payment_method.value == "direct_deposit":
-                    fee_to_client += third_party_fee
-
-                third_party_fee_total += (
-                    Decimal(payee_fees.third_party_fee)
-                    if payee_fees.third_party_fee is not None
-                    else Decimal(0)
-                )
-                client_fee_total += (
-                    Decimal(payee_fees.client_fee)
-                    if payee_fees.client_fee is not None
-                    else Decimal(0)
-                )
-
-                # cal total amount of third party as payee
-                total_amount += Decimal(payee_fees.amount)
+    def cal_disbursement_total_fees(self):
+        """
+        Using in reserve release update
+        """
+        from src.resources.v2.helpers.disbursement_fees import DisbursementFees
 
-        total_payee_fees = (
-            third_party_fee_total + client_fee_total
+        # disbursement aggregates are memoized until disbursements change
+        fees = DisbursementFees("reserve_release").totals(
+            self, self.rr_client_settings()
         )
 
-        # cal total fee to client(LC-1695) for lcra export
-        total_fees_asap += third_party_fee_total + client_fee_total
-
         advance_subtotal = (
             Decimal(self.advance_amount)
             - Decimal(self.discount_fee_adjustment)
@@ -429,21 +288,21 @@ class ReserveRelease(db.Model):
         )
 
         # cal disbursement amount
-        disbursement_amount = advance_subtotal - total_fees_asap
+        disbursement_amount = advance_subtotal - fees["total_fees_asap"]
 
         # cal outstanding amount
         outstanding_amount = advance_subtotal - Decimal(
-            total_amount + asap_amount
+            fees["total_amount"] + fees["asap_amount"]
         )
 
         return {
-            "total_fee_to_client": Decimal(fee_to_client),
-            "total_fees_asap": Decimal(total_fees_asap),  # for lcra export
-            "payee_ids": get_payees,
+            "total_fee_to_client": fees["total_fee_to_client"],
+            "total_fees_asap": fees["total_fees_asap"],  # for lcra export
+            "payee_ids": fees["payee_ids"],
             "advance_subtotal": Decimal(advance_subtotal), # for reserve release cal
             "disbursement_amount": Decimal(disbursement_amount),
             "outstanding_amount": Decimal(outstanding_amount),
-            "high_priority_amount": Decimal(high_priority_amount),
+            "high_priority_amount": fees["high_priority_amount"],
         }
 
     def get_selected_disclaimer(self):
@@ -1053,12 +912,8 @@ class ReserveReleaseListing:
 
         reserve_release_schema = ReserveReleaseResourseSchema(many=True)
 
-        # ORGANIZATION
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # user role
-        user_role = get_locations["user_role"]
+        user_role = Organization.get_user_role()
 
         reserve_release = ReserveRelease.query.filter(
             ReserveRelease.is_deleted == False,
@@ -1067,7 +922,7 @@ class ReserveReleaseListing:
                 ReserveRelease.status != "client_draft",
                 ReserveRelease.status != "principal_rejection",
             ),
-            ReserveRelease.client_id.in_(client_ids),
+            Organization.client_filter(ReserveRelease.client_id),
         )
 
         # get reserve release having status == client_submission only for principal
@@ -1087,6 +942,8 @@ class ReserveReleaseListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -1096,7 +953,6 @@ class ReserveReleaseListing:
         use_ref = kwargs.get("use_ref", False)
         high_priority = kwargs.get("high_priority", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
         
@@ -1133,12 +989,8 @@ class ReserveReleaseListing:
             reserve_release_schema = ReserveReleaseDashboardSchema(many=True)
 
         if not dashboard:
-            # ORGANIZATION
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
             
             # control accounts
             business_control_accounts = Permissions.get_business_settings()["control_accounts"]
@@ -1159,7 +1011,7 @@ class ReserveReleaseListing:
                         ]
                     )
                 ),
-                ReserveRelease.client_id.in_(client_ids),
+                Organization.client_filter(ReserveRelease.client_id),
                 ControlAccount.name.in_(business_control_accounts)
             )
             .group_by(ReserveRelease.id)
@@ -1210,15 +1062,11 @@ class ReserveReleaseListing:
                         ReserveRelease.status == "rejected"
                     )
                 elif stage == "completed":
-                    from src.resources.v2.helpers.convert_datetime import date_concat_time
-                    # current est date: for comparing with last_processed_at(utc)
-                    today = date_concat_time(date_concat="current")
-                    next_day = date_concat_time(date_concat="next")
-
+                    from src.resources.v2.helpers.convert_datetime import date_window
+                    # current est day: for comparing with last_processed_at(utc)
                     reserve_release = reserve_release.filter(
                         ReserveRelease.status == "completed",
-                        cast(ReserveRelease.last_processed_at, DateTime) >= today,
-                        cast(ReserveRelease.last_processed_at, DateTime) <= next_day
+                        date_window(ReserveRelease.last_processed_at)
                     )
                 elif stage == "pending":
                     reserve_release = reserve_release.filter(
@@ -1275,6 +1123,27 @@ class ReserveReleaseListing:
                     reserve_release = reserve_release.filter(
                         ReserveRelease.ref_id.like(rr_id + "%")
                     )
+            elif is_search_index_listings_enabled():
+                from src.resources.v2.helpers.search_index import search_filter
+
+                rr_fields = ["ref_id", "disbursement_amount"]
+                if not use_ref:
+                    rr_fields.append("reference_number")
+
+                # ids from search_index instead of LIKE over the joined tables
+                reserve_release = reserve_release.filter(
+                    or_(
+                        search_filter(
+                            ReserveRelease.id, "reserve_release", rr_fields, search
+                        ),
+                        search_filter(
+                            ReserveRelease.client_id,
+                            "client",
+                            ["name", "ref_client_no"],
+                            search,
+                        ),
+                    )
+                )
             elif use_ref:
                 reserve_release = reserve_release.filter(
                     or_(
@@ -1373,9 +1242,19 @@ class ReserveReleaseListing:
         else:
             reserve_release = reserve_release.order_by(ReserveRelease.updated_at.desc())
 
-        # pagination
-        reserve_release = reserve_release.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        reserve_release = paginate_listing(
+            reserve_release, page, rpp, ReserveRelease.id, cursor=cursor, total=total
+        )
         total_pages = math.ceil(reserve_release.total / rpp)
+        reserve_release_schema.context = ReserveRelease.get_listing_context(
+            reserve_release.items, user_role=user_role
+        )
         reserve_release_results = reserve_release_schema.dump(
             reserve_release.items
         ).data
@@ -1389,23 +1268,29 @@ class ReserveReleaseListing:
 
         # invalid page number
         if len(reserve_release_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                reserve_release,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": reserve_release_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": reserve_release_results,
+            },
+            reserve_release,
+        )
 
 
     def get_reserve_release_by_disbursement(**kwargs):
@@ -1419,7 +1304,6 @@ class ReserveReleaseListing:
         high_priority = kwargs.get("high_priority", None)
         # ordering = kwargs.get("ordering", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
         
@@ -1436,12 +1320,8 @@ class ReserveReleaseListing:
         reserve_release_schema = ReserveReleaseDashboardSchema(many=True)
 
         if not dashboard:
-            # client ids
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
             
             # control accounts
             business_control_accounts = Permissions.get_business_settings()["control_accounts"]
@@ -1476,7 +1356,7 @@ class ReserveReleaseListing:
                         ]
                     )
                 ),
-                ReserveRelease.client_id.in_(client_ids),
+                Organization.client_filter(ReserveRelease.client_id),
                 ControlAccount.name.in_(business_control_accounts),
             )
             .group_by(ReserveRelease.id)
@@ -1550,6 +1430,9 @@ class ReserveReleaseListing:
         # pagination
         pagination_obj = reserve_release.paginate(page, rpp, False)
         total_pages = pagination_obj.pages
+        reserve_release_schema.context = ReserveRelease.get_listing_context(
+            pagination_obj.items, user_role=user_role
+        )
         reserve_release_data = reserve_release_schema.dump(pagination_obj.items).data
         total_count = pagination_obj.total
 
@@ -0,0 +1,143 @@
+from src import db
+import os
+from datetime import datetime
+from sqlalchemy import String, and_, cast, literal, union_all, select
+
+
+# ref type -> (model name, indexed columns), a listing searches a subset of the columns
+SEARCH_INDEX_FIELDS = {
+    "soa": (
+        "SOA",
+        ["soa_ref_id", "disbursement_amount", "invoice_total", "reference_number"],
+    ),
+    "reserve_release": (
+        "ReserveRelease",
+        ["ref_id", "disbursement_amount", "reference_number"],
+    ),
+    "client": ("Client", ["name", "ref_client_no"]),
+    "debtor": ("Debtor", ["id", "name", "ref_key", "ref_debtor_no"]),
+    "client_debtor": ("ClientDebtor", ["credit_limit"]),
+}
+
+
+def is_search_index_enabled():
+    # search_index rows are maintained on flush
+    return os.getenv("SEARCH_INDEX_ENABLED", "false").lower() == "true"
+
+
+def is_search_index_listings_enabled():
+    # listings search search_index, enable once search_index_rebuild has run
+    return (
+        is_search_index_enabled()
+        and os.getenv("SEARCH_INDEX_LISTINGS_ENABLED", "false").lower() == "true"
+    )
+
+
+class SearchIndex(db.Model):
+    """
+    SearchIndex model, one row per searchable column value of soa, reserve
+    release, client, debtor and client debtor rows.
+
+    value has a FULLTEXT index with the ngram parser, so "%term%" searches
+    are answered from the index instead of scanning the listing joins.
+    SEARCH_INDEX_NGRAM_SIZE must match the server's ngram_token_size (2),
+    and innodb_ft_enable_stopword should be OFF.
+    """
+
+    __tablename__ = "search_index"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    ref_type = db.Column(db.String(50), nullable=False)
+    ref_id = db.Column(db.Integer, nullable=False)
+    field = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        db.Index("idx_search_index_ref", "ref_type", "ref_id"),
+        db.Index(
+            "ftx_search_index_value",
+            "value",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ),
+    )
+
+    ngram_size = int(os.getenv("SEARCH_INDEX_NGRAM_SIZE", 2))
+
+    @staticmethod
+    def source(ref_type):
+        import src.models
+
+        model_name, fields = SEARCH_INDEX_FIELDS[ref_type]
+        return getattr(src.models, model_name), fields
+
+    @staticmethod
+    def refresh(connection, ref_type, ref_ids):
+        """[Replace search_index rows of ref ids with their current column values]
+
+        Args:
+            connection (Connection): connection of the flushing session
+            ref_type (str): key of SEARCH_INDEX_FIELDS
+            ref_ids (list): ids
+        """
+        ref_ids = list(ref_ids)
+        if not ref_ids:
+            return
+
+        model, fields = SearchIndex.source(ref_type)
+        table = SearchIndex.__table__
+
+        connection.execute(
+            table.delete().where(
+                and_(table.c.ref_type == ref_type, table.c.ref_id.in_(ref_ids))
+            )
+        )
+
+        # values as mysql renders them for LIKE, e.g. 1250.00
+        selects = [
+            select(
+                [
+                    literal(ref_type),
+                    model.id,
+                    literal(field),
+                    cast(getattr(model, field), String(255)),
+                    literal(datetime.utcnow()),
+                ]
+            ).where(and_(model.id.in_(ref_ids), getattr(model, field) != None))
+            for field in fields
+        ]
+        connection.execute(
+            table.insert().from_select(
+                ["ref_type", "ref_id", "field", "value", "created_at"],
+                union_all(*selects),
+            )
+        )
+
+    @staticmethod
+    def matching_ids(ref_type, fields, search):
+        """[Ids of ref type having search in one of the fields]
+
+        Same rows as OR-ing `column LIKE "%search%"` over the fields, the
+        FULLTEXT match narrows the rows LIKE checks when search is long enough.
+
+        Args:
+            ref_type (str): key of SEARCH_INDEX_FIELDS
+            fields (list): indexed columns to search
+            search (str): search term
+
+        Returns:
+            Query: SearchIndex.ref_id
+        """
+        query = db.session.query(SearchIndex.ref_id).filter(
+            SearchIndex.ref_type == ref_type,
+            SearchIndex.field.in_(fields),
+            SearchIndex.value.like("%" + search + "%"),
+        )
+
+        # ngram phrase match, only for terms the ngram parser tokenizes as is
+        if search.isalnum() and len(search) >= SearchIndex.ngram_size:
+            query = query.filter(SearchIndex.value.match(f'"{search}"'))
+
+        return query
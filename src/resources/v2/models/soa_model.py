@@ -3,13 +3,14 @@ from src.resources.v2.models.client_control_accounts_model import ClientControlA
 from src import db
 from flask import abort, json
 import enum
-from sqlalchemy import func, or_, and_, cast, Date, not_, DateTime
+from sqlalchemy import func, or_, and_, Date, not_
 
 import math
 from datetime import date, datetime, timedelta
 from src.middleware.organization import Organization
 from decimal import Decimal
 from src.middleware.permissions import Permissions
+from src.resources.v2.models.search_index_model import is_search_index_listings_enabled
 
 
 
@@ -90,6 +91,13 @@ class SOA(db.Model):
     # Indexes
     __table_args__ = (
         db.Index("idx_soa_ref_id", "soa_ref_id"),
+        db.Index(
+            "idx_soa_status_last_processed_at",
+            "status",
+            "last_processed_at",
+            "client_id",
+            "is_deleted",
+        ),
     )
 
     def __init__(self, data):
@@ -253,77 +261,47 @@ class SOA(db.Model):
         return control_account
 
     def had_action_required(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            soa_id=self.id, key="action_required", is_deleted=False
-        ).count()
+        return approvals_history_index("soa").count(self.id, "action_required")
 
     def had_client_submitted(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            soa_id=self.id, key="client_submission_at", is_deleted=False
-        ).count()
+        return approvals_history_index("soa").count(self.id, "client_submission_at")
 
     def object_as_string(self):
         return "SOA"
         
     def request_created_by_client(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            soa_id=self.id, 
-            key="client_created_at", 
-            is_deleted=False
-        ).first()
+        return approvals_history_index("soa").first(self.id, "client_created_at")
 
     def request_submitted_by_client(self):
-        from src.models import ApprovalsHistory
-
-        return ApprovalsHistory.query.filter_by(
-            soa_id=self.id, 
-            key="client_submission_at", 
-            is_deleted=False
-        ).order_by(
-            ApprovalsHistory.id.desc()
-        ).first()
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
+
+        return approvals_history_index("soa").last(self.id, "client_submission_at")
 
     def request_created_by_principal(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            soa_id=self.id, key="created_at", is_deleted=False
-        ).first()
+        return approvals_history_index("soa").first(self.id, "created_at")
 
     def request_submitted_by_principal(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return ApprovalsHistory.query.filter_by(
-            soa_id=self.id, key="submitted_at", is_deleted=False
-        ).first()
+        return approvals_history_index("soa").first(self.id, "submitted_at")
 
     def request_approved_by_ae(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ApprovalsHistory.query.filter_by(
-                soa_id=self.id, key="approved_at", is_deleted=False
-            )
-            .order_by(ApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("soa").last(self.id, "approved_at")
 
     def request_approved_by_bo(self):
-        from src.models import ApprovalsHistory
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
-        return (
-            ApprovalsHistory.query.filter_by(
-                soa_id=self.id, key="funded_at", is_deleted=False
-            )
-            .order_by(ApprovalsHistory.id.desc())
-            .first()
-        )
+        return approvals_history_index("soa").last(self.id, "funded_at")
 
     def get_selected_disclaimer(self):
         """
@@ -472,6 +450,61 @@ class SOA(db.Model):
             .all()
         )
 
+    @staticmethod
+    def get_listing_context(soa_list, user_role=None):
+        """
+        Prefetch payment types, had_action_required and had_client_submitted
+        for a page of soa, used as SOA schemas context in listings
+        """
+        from src.models import Disbursements, ClientPayee
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
+
+        soa_ids = [soa.id for soa in soa_list]
+
+        if not user_role:
+            user_role = Permissions.get_user_role_permissions()["user_role"]
+
+        context = {
+            "user_role": user_role,
+            "disbursements_payment_type": {},
+            "had_action_required": set(),
+            "had_client_submitted": set(),
+        }
+        if not soa_ids:
+            return context
+
+        disbursements_payment_type = (
+            db.session.query(
+                Disbursements.soa_id,
+                Disbursements.payment_method,
+                ClientPayee.payment_status
+            ).join(
+                ClientPayee, ClientPayee.payee_id == Disbursements.payee_id
+            ).filter(
+                Disbursements.soa_id.in_(soa_ids),
+                Disbursements.is_deleted == False,
+                Disbursements.payee_id != None,
+            )
+            .distinct()
+            .all()
+        )
+        for soa_id, payment_method, payment_status in disbursements_payment_type:
+            context["disbursements_payment_type"].setdefault(soa_id, []).append(
+                (payment_method, payment_status)
+            )
+
+        # history rows of the page in one query, also used by the
+        # request_*_by_* helpers while dumping
+        approvals_history = approvals_history_index("soa")
+        approvals_history.prefetch(soa_ids)
+        for soa_id in soa_ids:
+            if approvals_history.has(soa_id, "action_required"):
+                context["had_action_required"].add(soa_id)
+            if approvals_history.has(soa_id, "client_submission_at"):
+                context["had_client_submitted"].add(soa_id)
+
+        return context
+
     def get_all_invoices_details(self):
         sql = f"SELECT \
         i.* , \
@@ -703,185 +736,36 @@ class SOA(db.Model):
 
 
     def is_request_updated(self):
-        from src.models import ApprovalsHistory
-
-        return ApprovalsHistory.query.filter_by(
-            soa_id=self.id, key="updated_at", is_deleted=False
-        ).count() 
+        from src.resources.v2.helpers.approvals_history_index import approvals_history_index
 
+        return approvals_history_index("soa").count(self.id, "updated_at")
 
     def cal_disbursement_total_fees(self):
         """
         Using in SOA update
         """
-        from src.models import (
-            Disbursements,
-            Client,
-            ClientSettings,
-            ClientPayee,
-        )
+        from src.resources.v2.helpers.disbursement_fees import DisbursementFees
 
-        fee_to_client = Decimal(0)
-        high_priority_fee = Decimal(0)
-        same_day_ach_fee = Decimal(0)
-        wire_fee = Decimal(0)
-        third_party_fee = Decimal(0)
-
-        has_client_settings = False
-        total_client_fees = Decimal(0)
-        third_party_fee_total = Decimal(0)
-        client_fee_total = Decimal(0)
-        total_fees_asap = Decimal(0) # for lcra export
-        total_amount = Decimal(0)
-        high_priority_amount = Decimal(0)
-        asap_amount = Decimal(0) # for outstanding amount cal
-        
-        get_payees = []
-
-        client_settings = self.soa_client_settings()
-
-        # client settings in table
-        if client_settings:
-            high_priority_fee = Decimal(client_settings["high_priority_fee"])
-            same_day_ach_fee = Decimal(client_settings["same_day_ach_fee"])
-            wire_fee = Decimal(client_settings["wire_fee"])
-            third_party_fee = Decimal(client_settings["third_party_fee"])
-            has_client_settings = True
-            high_priority_amount = Decimal(client_settings["high_priority_fee"])
-
-        # add high_priority to fee_to_client
-        if self.high_priority:
-            fee_to_client += high_priority_fee
-            total_fees_asap += high_priority_fee
-            asap_amount = high_priority_fee
-            
-            # # if no client settings then add principal's high priority fee
-            # if not has_client_settings:
-            #     from src.resources.v2.helpers.helper import principal_settings
-            # 
-            #     fee_to_client += principal_settings()["high_priority_fee"]
-            #     total_fees_asap += principal_settings()["high_priority_fee"]
-            #     asap_amount = principal_settings()["high_priority_fee"]
-            #     high_priority_amount = principal_settings()["high_priority_fee"]
-            
-
-        # get total client fees
-        total_client_fees = Decimal(0)
-        third_party_fee_total = Decimal(0)
-        client_fee_total = Decimal(0)
-
-        # Soa disbursements
-        get_soa_disbursements = Disbursements.query.filter(
-            Disbursements.soa_id == self.id,
-            Disbursements.is_deleted == False,
-            Client.id == Disbursements.client_id,
-            ClientPayee.client_id == Client.id,
-            ClientPayee.payee_id == Disbursements.payee_id,
-        )
-        
-        ## Disbursement: client as payee ##
-        get_client_fees = get_soa_disbursements.filter(
-            ClientPayee.ref_type == "client",
-        ).all()
-        if get_client_fees:
-            for client_fees in get_client_fees:
-                # get payees
-                get_payees.append(client_fees.payee.id)
-                
-                # fee_to_client
-                if client_fees.payment_method.value == "wire":
-                    fee_to_client += wire_fee
-                    
-                if client_fees.payment_method.value == "same_day_ach":
-                    fee_to_client += same_day_ach_fee
-                
-                third_party_fee_total += (
-                    Decimal(client_fees.third_party_fee)
-                    if client_fees.third_party_fee is not None
-                    else Decimal(0)
-                )
-                # cal total fee to client(LC-1695) for lcra export
-                client_fee_total += (
-                    Decimal(client_fees.client_fee)
-                    if client_fees.client_fee is not None
-                    else Decimal(0)
-                )
-
-                # cal total amount of client as payee
-                total_amount += Decimal(client_fees.amount)
-
-        total_client_fees = (
-            third_party_fee_total + client_fee_total
-        )
-        
-        # cal total fee to client(LC-1695) for lcra export
-        total_fees_asap += client_fee_total
-
-        # get total payee fees
-        total_payee_fees = Decimal(0)
-        third_party_fee_total = Decimal(0)
-        client_fee_total = Decimal(0)
-        
-        ## Disbursement: Third party as payee  ##
-        get_payee_fees = get_soa_disbursements.filter(
-            ClientPayee.ref_type == "payee",
-        ).all()
-        if get_payee_fees:
-            for payee_fees in get_payee_fees:
-                # get payees
-                get_payees.append(payee_fees.payee.id)
-                
-                # fee_to_client
-                if payee_fees.payment_method.value == "wire":
-                    fee_to_client += wire_fee
-                    fee_to_client += third_party_fee
-                
-                if payee_fees.payment_method.value == "same_day_ach":
-                    fee_to_client += same_day_ach_fee
-                    fee_to_client += third_party_fee
-                
-                if payee_fees.payment_method.value == "direct_deposit":
-                    fee_to_client += third_party_fee
-                
-                # cal total fee to client(LC-1695) for lcra export
-                third_party_fee_total += (
-                    Decimal(payee_fees.third_party_fee)
-                    if payee_fees.third_party_fee is not None
-                    else Decimal(0)
-                )
-                # cal total fee to client(LC-1695) for lcra export
-                client_fee_total += (
-                    Decimal(payee_fees.client_fee)
-                    if payee_fees.client_fee is not None
-                    else Decimal(0)
-                )
-
-                # cal total amount of third party as payee
-                total_amount += Decimal(payee_fees.amount)
-
-        # cal fees for payee as third party
-        total_payee_fees = (
-            third_party_fee_total + client_fee_total
-        )
-        
-        # cal total fee to client(LC-1695) for lcra export
-        total_fees_asap += third_party_fee_total + client_fee_total
+        # disbursement aggregates are memoized until disbursements change
+        fees = DisbursementFees("soa").totals(self, self.soa_client_settings())
 
         # cal disbursement amount
-        disbursement_amount = Decimal(self.advance_amount) - total_fees_asap
+        disbursement_amount = Decimal(self.advance_amount) - fees["total_fees_asap"]
 
         # cal outstanding amount
-        outstanding_amount = Decimal(self.advance_amount) - Decimal(total_amount + asap_amount)
-        
+        outstanding_amount = Decimal(self.advance_amount) - Decimal(
+            fees["total_amount"] + fees["asap_amount"]
+        )
+
         return {
-            "fees_to_client": Decimal(total_client_fees), # total_fees_to_client in soa table 
-            "third_party_fees": Decimal(total_payee_fees), # total_third_party_fees in soa table
-            "total_fee_to_client": Decimal(fee_to_client), # fees_to_client + third_party_fees + high priority fee
-            "total_fees_asap": Decimal(total_fees_asap), # for lcra export
-            "get_payees": get_payees,
+            "fees_to_client": fees["fees_to_client"], # total_fees_to_client in soa table 
+            "third_party_fees": fees["third_party_fees"], # total_third_party_fees in soa table
+            "total_fee_to_client": fees["total_fee_to_client"], # fees_to_client + third_party_fees + high priority fee
+            "total_fees_asap": fees["total_fees_asap"], # for lcra export
+            "get_payees": fees["payee_ids"],
             "disbursement_amount": Decimal(disbursement_amount),
             "outstanding_amount": Decimal(outstanding_amount),
-            "high_priority_amount": Decimal(high_priority_amount),
+            "high_priority_amount": fees["high_priority_amount"],
         }
 
     def soa_payment_process(self):
@@ -1289,12 +1173,8 @@ class SOAListing:
         
         soa_schema = SOAResourseSchema(many=True)
 
-        # ORGANIZATION
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # user role
-        user_role = get_locations["user_role"]
+        user_role = Organization.get_user_role()
 
         soa = SOA.query.filter(
             SOA.is_deleted == False, 
@@ -1303,7 +1183,7 @@ class SOAListing:
                 SOA.status != "client_draft",
                 SOA.status != "principal_rejection", 
             ), 
-            SOA.client_id.in_(client_ids)
+            Organization.client_filter(SOA.client_id)
         )
 
         # get soa having status == client_submission only for principal
@@ -1321,6 +1201,8 @@ class SOAListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -1330,7 +1212,6 @@ class SOAListing:
         use_ref = kwargs.get("use_ref", False)
         high_priority = kwargs.get("high_priority", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
         
@@ -1365,14 +1246,10 @@ class SOAListing:
         ):
             soa_schema = SOADashboardSchema(many=True)
 
-        # if dashboard=False, get client ids, user_role, business_control_accounts
+        # if dashboard=False, get user_role, business_control_accounts
         if not dashboard:
-            # ORGANIZATION
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
 
             # control accounts
             business_control_accounts = Permissions.get_business_settings()["control_accounts"]
@@ -1394,7 +1271,7 @@ class SOAListing:
                         ]
                     )
                 ),
-                SOA.client_id.in_(client_ids),
+                Organization.client_filter(SOA.client_id),
                 ControlAccount.name.in_(business_control_accounts)
             )
             .group_by(SOA.id)
@@ -1437,15 +1314,11 @@ class SOAListing:
                         SOA.status == "rejected"
                     )
                 elif stage == "completed":
-                    from src.resources.v2.helpers.convert_datetime import date_concat_time
-                    # current est date: for comparing with last_processed_at(utc)
-                    today = date_concat_time(date_concat="current")
-                    next_day = date_concat_time(date_concat="next")
-
+                    from src.resources.v2.helpers.convert_datetime import date_window
+                    # current est day: for comparing with last_processed_at(utc)
                     soa = soa.filter(
                         SOA.status == "completed",
-                        cast(SOA.last_processed_at, DateTime) >= today,
-                        cast(SOA.last_processed_at, DateTime) <= next_day
+                        date_window(SOA.last_processed_at)
                     )
                 elif stage == "pending":
                     soa = soa.filter(
@@ -1500,6 +1373,22 @@ class SOAListing:
                     soa = soa.filter(
                         SOA.soa_ref_id.like(soa_ref_id + "%")
                     )
+            elif is_search_index_listings_enabled():
+                from src.resources.v2.helpers.search_index import search_filter
+
+                soa_fields = ["soa_ref_id", "disbursement_amount", "invoice_total"]
+                if not use_ref:
+                    soa_fields.append("reference_number")
+
+                # ids from search_index instead of LIKE over the joined tables
+                soa = soa.filter(
+                    or_(
+                        search_filter(SOA.id, "soa", soa_fields, search),
+                        search_filter(
+                            SOA.client_id, "client", ["name", "ref_client_no"], search
+                        ),
+                    )
+                )
             elif use_ref:
                 soa = soa.filter(
                     or_(
@@ -1590,9 +1479,17 @@ class SOAListing:
         else:
             soa = soa.order_by(SOA.updated_at.desc())
 
-        # pagination
-        soa = soa.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        soa = paginate_listing(
+            soa, page, rpp, SOA.id, cursor=cursor, total=total
+        )
         total_pages = math.ceil(soa.total / rpp)
+        soa_schema.context = SOA.get_listing_context(soa.items, user_role=user_role)
         soa_results = soa_schema.dump(soa.items).data
         total_count = soa.total
 
@@ -1604,23 +1501,29 @@ class SOAListing:
 
         # invalid page number
         if len(soa_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                soa,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": soa_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": soa_results,
+            },
+            soa,
+        )
 
 
     def get_soa_by_disbursement(**kwargs):
@@ -1634,7 +1537,6 @@ class SOAListing:
         high_priority = kwargs.get("high_priority", None)
         # ordering = kwargs.get("ordering", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
         
@@ -1651,12 +1553,8 @@ class SOAListing:
         soa_schema = SOADashboardSchema(many=True)
 
         if not dashboard:
-            # ORGANIZATION
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-            
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
             
             # control accounts
             business_control_accounts = Permissions.get_business_settings()["control_accounts"]
@@ -1691,7 +1589,7 @@ class SOAListing:
                         ]
                     )
                 ),
-                SOA.client_id.in_(client_ids),
+                Organization.client_filter(SOA.client_id),
                 ControlAccount.name.in_(business_control_accounts)
             )
             .group_by(SOA.id)
@@ -1755,6 +1653,9 @@ class SOAListing:
         # pagination
         pagination_obj = soa.paginate(page, rpp, False)
         total_pages = pagination_obj.pages
+        soa_schema.context = SOA.get_listing_context(
+            pagination_obj.items, user_role=user_role
+        )
         soa_data = soa_schema.dump(pagination_obj.items).data
         total_count = pagination_obj.total
 
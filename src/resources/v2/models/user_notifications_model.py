@@ -66,6 +66,33 @@ class UserNotifications(db.Model):
         db.session.delete(self)
         db.session.commit()
 
+    @staticmethod
+    def bulk_insert(user_notifications_data):
+        """[Add user notifications with one insert, committed with the caller's next commit]
+
+        Args:
+            user_notifications_data (list): data of UserNotifications
+        """
+        if not user_notifications_data:
+            return
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "client_id": data.get("client_id"),
+                "user_uuid": data.get("user_uuid"),
+                "notification_type": data.get("notification_type"),
+                "message": data.get("message"),
+                "url_link": data.get("url_link"),
+                "is_read": data.get("is_read") or False,
+                "is_deleted": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for data in user_notifications_data
+        ]
+        db.session.execute(UserNotifications.__table__.insert(), rows)
+
     @staticmethod
     def get_all_user_notifications():
         return UserNotifications.query.filter_by(is_deleted=False)
@@ -97,6 +124,8 @@ class UserNotificationsListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         user_uuid = kwargs.get("user_uuid", None)
         is_read = kwargs.get("is_read", False)
 
@@ -112,8 +141,6 @@ class UserNotificationsListing:
 
         # # get logged user role organization ids
         # organization_ids = Permissions.get_user_role_permissions()["organization_access"]
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
 
         # user_notifications
         user_notifications = (
@@ -135,7 +162,7 @@ class UserNotificationsListing:
             # )
             .filter(
                 UserNotifications.is_deleted == False,
-                UserNotifications.client_id.in_(client_ids),
+                Organization.client_filter(UserNotifications.client_id),
             )
         )
 
@@ -154,8 +181,15 @@ class UserNotificationsListing:
         # order by
         user_notifications = user_notifications.order_by(UserNotifications.id.desc())
 
-        # pagination
-        user_notifications_paginated = user_notifications.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        user_notifications_paginated = paginate_listing(
+            user_notifications, page, rpp, UserNotifications.id, cursor=cursor, total=total
+        )
         total_pages = user_notifications_paginated.pages
         user_notifications_results = user_notifications_schema.dump(
             user_notifications_paginated.items
@@ -170,20 +204,26 @@ class UserNotificationsListing:
 
         # invalid page number
         if len(user_notifications_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "data": [],
+                    "total_count": 0,
+                },
+                user_notifications_paginated,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "data": [],
-                "total_count": 0,
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "data": user_notifications_results,
-            "total_count": total_count,
-        }
+                "total_pages": total_pages,
+                "data": user_notifications_results,
+                "total_count": total_count,
+            },
+            user_notifications_paginated,
+        )
@@ -91,12 +91,9 @@ class VerificationNotes(db.Model):
 
     @staticmethod
     def get_all():
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
         return VerificationNotes.query.filter(
             VerificationNotes.deleted_at == None,
-            VerificationNotes.client_id.in_(client_ids),
+            Organization.client_filter(VerificationNotes.client_id),
         )
 
     @staticmethod
@@ -339,10 +336,6 @@ class VerificationNotesListing:
 
         verification_notes_schema = VerificationNotesRefSchema(many=True)
 
-        # Organization
-        get_locations = Organization.get_locations()
-        client_ids = get_locations["client_list"]
-
         # control accounts
         business_control_accounts = Permissions.get_business_settings()[
             "control_accounts"
@@ -358,7 +351,7 @@ class VerificationNotesListing:
                 Client.is_deleted == False,
                 ControlAccount.is_deleted == False,
                 ClientControlAccounts.is_deleted == False,
-                VerificationNotes.client_id.in_(client_ids),
+                Organization.client_filter(VerificationNotes.client_id),
                 ControlAccount.name.in_(business_control_accounts),
             )
             .order_by(VerificationNotes.updated_at.desc())
@@ -373,6 +366,8 @@ class VerificationNotesListing:
         # filters
         page = kwargs.get("page", 1)
         rpp = kwargs.get("rpp", 20)
+        cursor = kwargs.get("cursor", None)
+        total = kwargs.get("total", None)
         ordering = kwargs.get("ordering", None)
         search = kwargs.get("search", None)
         start_date = kwargs.get("start_date", None)
@@ -380,7 +375,6 @@ class VerificationNotesListing:
         control_account = kwargs.get("control_account", None)
         stage = kwargs.get("stage", None)
         dashboard = kwargs.get("dashboard", False)
-        client_ids = kwargs.get("client_ids", None)
         user_role = kwargs.get("user_role", None)
         business_control_accounts = kwargs.get("business_control_accounts", [])
 
@@ -399,12 +393,8 @@ class VerificationNotesListing:
         verification_notes_schema = VerificationNotesDashboardSchema(many=True)
 
         if not dashboard:
-            # client ids
-            get_locations = Organization.get_locations()
-            client_ids = get_locations["client_list"]
-
             # user role
-            user_role = get_locations["user_role"]
+            user_role = Organization.get_user_role()
 
             # control accounts
             business_control_accounts = Permissions.get_business_settings()[
@@ -428,7 +418,7 @@ class VerificationNotesListing:
                     ]
                 )
             ),
-            VerificationNotes.client_id.in_(client_ids),
+            Organization.client_filter(VerificationNotes.client_id),
             ControlAccount.name.in_(business_control_accounts),
         )
 
@@ -581,8 +571,15 @@ class VerificationNotesListing:
                 VerificationNotes.updated_at.desc()
             )
 
-        # pagination
-        verification_notes = verification_notes.paginate(page, rpp, False)
+        from src.resources.v2.helpers.keyset_pagination import (
+            paginate_listing,
+            with_cursor,
+        )
+
+        # pagination, keyset pagination when a cursor is given
+        verification_notes = paginate_listing(
+            verification_notes, page, rpp, VerificationNotes.id, cursor=cursor, total=total
+        )
         total_pages = verification_notes.pages
         vn_results = verification_notes_schema.dump(verification_notes.items).data
         total_count = verification_notes.total
@@ -595,20 +592,26 @@ class VerificationNotesListing:
 
         # invalid page number
         if len(vn_results) < 1:
-            return {
-                "msg": get_invalid_page_msg,
+            return with_cursor(
+                {
+                    "msg": get_invalid_page_msg,
+                    "per_page": rpp,
+                    "current_page": page,
+                    "total_pages": 0,
+                    "total_count": 0,
+                    "data": [],
+                },
+                verification_notes,
+            )
+
+        return with_cursor(
+            {
+                "msg": "Records found",
                 "per_page": rpp,
                 "current_page": page,
-                "total_pages": 0,
-                "total_count": 0,
-                "data": [],
-            }
-
-        return {
-            "msg": "Records found",
-            "per_page": rpp,
-            "current_page": page,
-            "total_pages": total_pages,
-            "total_count": total_count,
-            "data": vn_results,
-        }
+                "total_pages": total_pages,
+                "total_count": total_count,
+                "data": vn_results,
+            },
+            verification_notes,
+        )
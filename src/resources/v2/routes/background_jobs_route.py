@@ -0,0 +1,12 @@
+from flask import Blueprint
+from src.resources.v2.controllers.background_jobs_controller import (
+    get_all,
+    get_one,
+    retry,
+)
+
+background_jobs_v2_api = Blueprint('background_jobs_v2_api', __name__)
+
+background_jobs_v2_api.add_url_rule('/', view_func=get_all, **{'methods':['GET']})
+background_jobs_v2_api.add_url_rule('/<int:background_job_id>', view_func=get_one, **{'methods':['GET']})
+background_jobs_v2_api.add_url_rule('/<int:background_job_id>/retry', view_func=retry, **{'methods':['POST']})
@@ -0,0 +1,10 @@
+from flask import Blueprint
+from src.resources.v2.controllers.profiling_controller import (
+    get_all,
+    reset,
+)
+
+profiling_v2_api = Blueprint('profiling_v2_api', __name__)
+
+profiling_v2_api.add_url_rule('/', view_func=get_all, **{'methods':['GET']})
+profiling_v2_api.add_url_rule('/', view_func=reset, **{'methods':['DELETE']})
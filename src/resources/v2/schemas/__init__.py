@@ -117,4 +117,7 @@ from .verification_notes_schema import (
 from .invoice_supporting_documents_schema import (
     InvoiceSupportingDocumentsSchema,
     InvoiceSupportingDocumentsRefSchema
-)
\ No newline at end of file
+)
+from .background_jobs_schema import (
+    BackgroundJobSchema,
+)
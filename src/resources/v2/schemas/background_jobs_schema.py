@@ -0,0 +1,37 @@
+from marshmallow import fields, Schema, post_dump
+from marshmallow_enum import EnumField
+from src.models import BackgroundJobType, BackgroundJobStatus
+
+
+class BackgroundJobSchema(Schema):
+    """
+    BackgroundJob Schema, payload is not dumped(has the user the job runs as)
+    """
+
+    id = fields.Int(dump_only=True)
+    job_type = EnumField(BackgroundJobType, dump_only=True)
+    ref_type = fields.Str(dump_only=True)
+    ref_id = fields.Int(dump_only=True)
+    idempotency_key = fields.Str(dump_only=True)
+    status = EnumField(BackgroundJobStatus, dump_only=True)
+    attempts = fields.Int(dump_only=True)
+    max_attempts = fields.Int(dump_only=True)
+    run_at = fields.DateTime(dump_only=True)
+    last_error = fields.Str(dump_only=True)
+    completed_at = fields.DateTime(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
+
+    @post_dump(pass_many=True)
+    def utc_to_est(self, data, many, **kwargs):
+        from src.resources.v2.helpers.convert_datetime import utc_to_local
+
+        datetime_fields = ["run_at", "completed_at", "created_at", "updated_at"]
+        for each_data in data if many and isinstance(data, list) else [data]:
+            for field in datetime_fields:
+                if each_data.get(field):
+                    each_data[field] = utc_to_local(dt=each_data[field])
+        return data
+
+    class Meta:
+        ordered = True
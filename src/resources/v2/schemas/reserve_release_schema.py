@@ -40,12 +40,18 @@ class ReserveReleaseSchema(Schema):
         return reserve_release.get_ref_client_rr_id()
     
     def get_rr_has_action_required(self, reserve_release):
+        if "had_action_required" in self.context:
+            return reserve_release.id in self.context["had_action_required"]
+
         rr_has_action_required = False
         if reserve_release.had_action_required():
             rr_has_action_required = True
         return rr_has_action_required
     
     def get_has_client_submitted(self, reserve_release):
+        if "had_client_submitted" in self.context:
+            return reserve_release.id in self.context["had_client_submitted"]
+
         has_client_submitted = False
         if reserve_release.had_client_submitted():
             has_client_submitted = True
@@ -58,11 +64,21 @@ class ReserveReleaseSchema(Schema):
         payment_type = None
         payment_type_dict = {}
 
-        disbursements_payment_type = reserve_release.get_disbursements_payment_type()
+        # listings prefetch payment types and user role for the whole page
+        if "disbursements_payment_type" in self.context:
+            disbursements_payment_type = self.context[
+                "disbursements_payment_type"
+            ].get(reserve_release.id, [])
+        else:
+            disbursements_payment_type = reserve_release.get_disbursements_payment_type()
+
         if disbursements_payment_type:
             # Only show payment status indicator for AE/BO LC-2342
             # get user role
-            user_role = Permissions.get_user_role_permissions()["user_role"]
+            if "user_role" in self.context:
+                user_role = self.context["user_role"]
+            else:
+                user_role = Permissions.get_user_role_permissions()["user_role"]
 
             # principal
             if user_role == Permissions.principal:
@@ -68,12 +68,18 @@ class SOASchema(Schema):
         return client_number_soa_id_number
 
     def get_soa_has_action_required(self, soa):
+        if "had_action_required" in self.context:
+            return soa.id in self.context["had_action_required"]
+
         soa_has_action_required = False
         if soa.had_action_required():
             soa_has_action_required = True
         return soa_has_action_required
 
     def get_has_client_submitted(self, soa):
+        if "had_client_submitted" in self.context:
+            return soa.id in self.context["had_client_submitted"]
+
         has_client_submitted = False
         if soa.had_client_submitted():
             has_client_submitted = True
@@ -86,11 +92,21 @@ class SOASchema(Schema):
         payment_type = None
         payment_type_dict = {}
 
-        disbursements_payment_type = soa.get_disbursements_payment_type()
+        # listings prefetch payment types and user role for the whole page
+        if "disbursements_payment_type" in self.context:
+            disbursements_payment_type = self.context[
+                "disbursements_payment_type"
+            ].get(soa.id, [])
+        else:
+            disbursements_payment_type = soa.get_disbursements_payment_type()
+
         if disbursements_payment_type:
             # Only show payment status indicator for AE/BO LC-2342
             # get user role
-            user_role = Permissions.get_user_role_permissions()["user_role"]
+            if "user_role" in self.context:
+                user_role = self.context["user_role"]
+            else:
+                user_role = Permissions.get_user_role_permissions()["user_role"]
 
             # principal
             if user_role == Permissions.principal:
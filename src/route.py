@@ -81,6 +81,8 @@ from src.resources.v2.routes.compliance_repository_route import compliance_repos
 from src.resources.v2.routes.collection_notes_route import collection_notes_v2_api
 from src.resources.v2.routes.verification_notes_route import verification_notes_v2_api
 from src.resources.v2.routes.invoice_supporting_documents_route import invoice_supporting_documents_v2_api
+from src.resources.v2.routes.background_jobs_route import background_jobs_v2_api
+from src.resources.v2.routes.profiling_route import profiling_v2_api
 
 
 def register_v2_blueprints(app):
@@ -244,3 +246,9 @@ def register_v2_blueprints(app):
     app.register_blueprint(
         invoice_supporting_documents_v2_api, url_prefix=f"{url_api_prefix}/invoice-supporting-documents"
     )
+    app.register_blueprint(
+        background_jobs_v2_api, url_prefix=f"{url_api_prefix}/background-jobs"
+    )
+    app.register_blueprint(
+        profiling_v2_api, url_prefix=f"{url_api_prefix}/profiling"
+    )